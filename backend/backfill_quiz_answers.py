@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Script to backfill per-question quiz answers from stored attempt answers
+"""
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.models.quiz import QuizAnswer
+from src.main import create_app
+
+def backfill_quiz_answers():
+    """Grade answers_json of completed attempts without quiz_answers rows"""
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        print("Backfilling quiz answers...")
+        backfilled = QuizAnswer.backfill()
+        print(f"Backfilled {backfilled} quiz attempts")
+
+if __name__ == "__main__":
+    backfill_quiz_answers()
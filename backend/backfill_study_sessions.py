@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Script to backfill the study session ledger from module time recorded before it existed
+"""
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.models.progress import StudySession, UserDailyActivity
+from src.main import create_app
+
+def backfill_study_sessions():
+    """Write study_sessions rows for uncovered user_progress minutes and rebuild the daily rollups"""
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        print("Backfilling study sessions...")
+        backfilled = StudySession.backfill()
+        print(f"Backfilled {backfilled} study sessions")
+        if backfilled:
+            print("Rebuilding daily activity rollups...")
+            replayed = UserDailyActivity.rebuild()
+            print(f"Replayed {replayed} analytics events")
+
+if __name__ == "__main__":
+    backfill_study_sessions()
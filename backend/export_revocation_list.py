@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Script to export the signed certificate revocation list and the signing public keys for offline verifiers
+Run periodically (e.g. from cron) and publish both output files
+"""
+import sys
+import os
+import json
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.main import create_app
+
+def write_json(document, path):
+    """Write a JSON document to path atomically"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(document, f, indent=2)
+    os.replace(temp_path, path)
+
+def export_revocation_list(output_path, keys_path):
+    """Write the signed revocation list to output_path and the public keys to keys_path"""
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        tokens = app.extensions['certificate_tokens']
+        if not tokens.enabled:
+            sys.exit("CERTIFICATE_SIGNING_KEY is not set; nothing to sign the revocation list with")
+        tokens.refresh_revocations()
+        document = tokens.export_revocation_list()
+        keys = tokens.public_keys()
+    
+    write_json(keys, keys_path)
+    write_json(document, output_path)
+    print(f"Exported {len(keys['keys'])} signing public keys to {keys_path}")
+    print(f"Exported {len(document['revoked'])} revoked certificates to {output_path}")
+
+if __name__ == "__main__":
+    export_revocation_list(sys.argv[1] if len(sys.argv) > 1 else 'certificate_revocations.json',
+                           sys.argv[2] if len(sys.argv) > 2 else 'certificate_signing_keys.json')
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild achievement counters from enrollments, quiz attempts, study sessions and certificates
+"""
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.models.achievement import UserAchievementCounter
+from src.models.progress import StudySession, UserDailyActivity
+from src.main import create_app
+
+def rebuild_achievement_counters(user_id=None):
+    """Recompute user_achievement_counters from the source tables"""
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        # Study time is counted from the ledger, so pre-ledger module time has to be in it first
+        print("Backfilling study sessions...")
+        backfilled = StudySession.backfill()
+        print(f"Backfilled {backfilled} study sessions")
+        if backfilled:
+            UserDailyActivity.rebuild()
+        
+        print("Rebuilding achievement counters...")
+        rebuilt = UserAchievementCounter.rebuild(user_id=user_id)
+        print(f"Rebuilt counters for {rebuilt} users")
+
+if __name__ == "__main__":
+    rebuild_achievement_counters(int(sys.argv[1]) if len(sys.argv) > 1 else None)
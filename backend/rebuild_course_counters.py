@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild course module/enrollment counters and module quiz counters
+"""
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.models.course import Course
+from src.main import create_app
+
+def rebuild_course_counters():
+    """Recompute denormalized catalog counters and mark the catalog for rebuild"""
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        print("Rebuilding course catalog counters...")
+        updated = Course.rebuild_counters()
+        print(f"Rebuilt counters for {updated} courses")
+
+if __name__ == "__main__":
+    rebuild_course_counters()
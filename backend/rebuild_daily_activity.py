@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild daily activity rollups from historical analytics rows
+"""
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.models.progress import UserDailyActivity
+from src.main import create_app
+
+def rebuild_daily_activity(user_id=None):
+    """Replay learning_analytics and study_sessions into user_daily_activity"""
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        print("Rebuilding daily activity rollups...")
+        replayed = UserDailyActivity.rebuild(user_id=user_id)
+        print(f"Replayed {replayed} analytics events")
+
+if __name__ == "__main__":
+    rebuild_daily_activity(int(sys.argv[1]) if len(sys.argv) > 1 else None)
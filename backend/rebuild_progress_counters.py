@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild enrollment progress counters from raw progress rows
+"""
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.models.course import CourseEnrollment
+from src.main import create_app
+
+def rebuild_progress_counters(course_id=None):
+    """Recompute completed/in-progress/time/score counters on every enrollment"""
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        print("Rebuilding enrollment progress counters...")
+        updated = CourseEnrollment.rebuild_progress_counters(course_id=course_id)
+        print(f"Rebuilt counters for {updated} enrollments")
+
+if __name__ == "__main__":
+    rebuild_progress_counters(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild materialized quiz statistics from attempts and questions
+"""
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.models.quiz import QuizStats
+from src.main import create_app
+
+def rebuild_quiz_stats(quiz_id=None):
+    """Recompute quiz_stats from quiz_attempts and questions"""
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    
+    with app.app_context():
+        print("Rebuilding quiz statistics...")
+        rebuilt = QuizStats.rebuild(quiz_id=quiz_id)
+        print(f"Rebuilt statistics for {rebuilt} quizzes")
+
+if __name__ == "__main__":
+    rebuild_quiz_stats(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -13,8 +13,9 @@ from datetime import timedelta
 # Import all models to ensure they're registered with SQLAlchemy
 from src.models.user import db, User
 from src.models.course import Course, Module, CourseEnrollment
-from src.models.quiz import Quiz, Question, QuizAttempt
-from src.models.progress import UserProgress, Certificate, LearningAnalytics
+from src.models.quiz import Quiz, Question, QuizAttempt, QuizAttemptCounter, QuizAnswer
+from src.models.progress import UserProgress, Certificate, LearningAnalytics, UserDailyActivity, StudySession
+from src.models.achievement import UserAchievementCounter
 from src.models.video import Video, VideoProgress, VideoBookmark
 from src.models.knowledge_base import (
     ResourceCategory, KnowledgeResource, ResourceDownload,
@@ -36,6 +37,12 @@ from src.routes.admin import admin_bp
 from src.routes.reporting import reporting_bp
 from src.routes.enterprise import enterprise_bp
 from src.routes.branding import branding_bp
+from src.utils.event_writer import AnalyticsEventWriter
+from src.utils.progress_buffer import VideoProgressBuffer
+from src.utils.grading_queue import GradingQueue
+from src.utils.certificate_jobs import CertificateRenderQueue
+from src.utils.certificate_tokens import CertificateTokens
+from src.utils.certificate_generator import CERTIFICATES_DIR
 
 def create_app(config_name='development'):
     """Application factory pattern for AWS deployment"""
@@ -47,11 +54,21 @@ def create_app(config_name='development'):
         app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 
             f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}")
         app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'qryti-jwt-secret-2025')
+        app.config['CERTIFICATE_SIGNING_KEY'] = os.environ.get('CERTIFICATE_SIGNING_KEY')
+        app.config['DEBUG'] = False
+    elif config_name == 'testing':
+        app.config['SECRET_KEY'] = 'qryti-learn-test-key-2025'
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite://')
+        app.config['JWT_SECRET_KEY'] = 'qryti-jwt-test-secret-2025'
+        app.config['CERTIFICATE_SIGNING_KEY'] = 'qryti-certificate-test-signing-key-2025'
+        app.config['TESTING'] = True
         app.config['DEBUG'] = False
     else:
         app.config['SECRET_KEY'] = 'qryti-learn-dev-key-2025'
         app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
         app.config['JWT_SECRET_KEY'] = 'qryti-jwt-dev-secret-2025'
+        app.config['CERTIFICATE_SIGNING_KEY'] = os.environ.get('CERTIFICATE_SIGNING_KEY',
+                                                               'qryti-certificate-dev-signing-key-2025')
         app.config['DEBUG'] = True
     
     # Database configuration
@@ -76,8 +93,69 @@ def create_app(config_name='development'):
     app.config['AWS_S3_BUCKET'] = os.environ.get('AWS_S3_BUCKET', 'qryti-learn-assets')
     app.config['AWS_REGION'] = os.environ.get('AWS_REGION', 'us-east-1')
     
+    # Analytics event writer: buffered in the background, synchronous for tests
+    app.config['ANALYTICS_EVENT_WRITER'] = os.environ.get(
+        'ANALYTICS_EVENT_WRITER', 'sync' if config_name == 'testing' else 'buffered'
+    )
+    app.config['ANALYTICS_EVENT_BATCH_SIZE'] = int(os.environ.get('ANALYTICS_EVENT_BATCH_SIZE', 200))
+    app.config['ANALYTICS_EVENT_FLUSH_INTERVAL'] = float(os.environ.get('ANALYTICS_EVENT_FLUSH_INTERVAL', 1.0))
+    app.config['ANALYTICS_EVENT_QUEUE_SIZE'] = int(os.environ.get('ANALYTICS_EVENT_QUEUE_SIZE', 10000))
+    app.config['ANALYTICS_BATCH_MAX_EVENTS'] = int(os.environ.get('ANALYTICS_BATCH_MAX_EVENTS', 1000))
+    
+    # Video progress heartbeats: coalesced and written behind, synchronous for tests
+    app.config['VIDEO_PROGRESS_WRITER'] = os.environ.get(
+        'VIDEO_PROGRESS_WRITER', 'sync' if config_name == 'testing' else 'buffered'
+    )
+    app.config['VIDEO_PROGRESS_FLUSH_INTERVAL'] = float(os.environ.get('VIDEO_PROGRESS_FLUSH_INTERVAL', 5.0))
+    app.config['VIDEO_PROGRESS_MAX_PENDING'] = int(os.environ.get('VIDEO_PROGRESS_MAX_PENDING', 50000))
+    
+    # Exam-mode quiz grading: background worker pool, synchronous for tests
+    app.config['QUIZ_GRADING_MODE'] = os.environ.get(
+        'QUIZ_GRADING_MODE', 'sync' if config_name == 'testing' else 'async'
+    )
+    app.config['QUIZ_GRADING_WORKERS'] = int(os.environ.get('QUIZ_GRADING_WORKERS', 4))
+    app.config['QUIZ_GRADING_SWEEP_INTERVAL'] = float(os.environ.get('QUIZ_GRADING_SWEEP_INTERVAL', 30.0))
+    app.config['QUIZ_GRADING_MAX_RETRIES'] = int(os.environ.get('QUIZ_GRADING_MAX_RETRIES', 5))
+    
+    # Certificate PDF rendering: process pool, synchronous for tests
+    app.config['CERTIFICATE_RENDER_MODE'] = os.environ.get(
+        'CERTIFICATE_RENDER_MODE', 'sync' if config_name == 'testing' else 'process'
+    )
+    app.config['CERTIFICATE_RENDER_WORKERS'] = int(os.environ.get('CERTIFICATE_RENDER_WORKERS', os.cpu_count() or 2))
+    app.config['CERTIFICATE_RENDER_MAX_ATTEMPTS'] = int(os.environ.get('CERTIFICATE_RENDER_MAX_ATTEMPTS', 3))
+    app.config['CERTIFICATE_RENDER_STALE_SECONDS'] = int(os.environ.get('CERTIFICATE_RENDER_STALE_SECONDS', 300))
+    app.config['CERTIFICATE_OUTPUT_DIR'] = os.environ.get('CERTIFICATE_OUTPUT_DIR', CERTIFICATES_DIR)
+    app.config['CERTIFICATE_ISSUE_CHUNK_SIZE'] = int(os.environ.get('CERTIFICATE_ISSUE_CHUNK_SIZE', 1000))
+    # Internal nginx location mapped to CERTIFICATE_OUTPUT_DIR; unset to stream PDFs from Flask
+    app.config['CERTIFICATE_X_ACCEL_PREFIX'] = os.environ.get('CERTIFICATE_X_ACCEL_PREFIX')
+    
+    # Bulk enrollment limits
+    app.config['BULK_ENROLL_MAX_USERS'] = int(os.environ.get('BULK_ENROLL_MAX_USERS', 100000))
+    app.config['BULK_ENROLL_CHUNK_SIZE'] = int(os.environ.get('BULK_ENROLL_CHUNK_SIZE', 1000))
+    app.config['BULK_UNENROLL_BATCH_SIZE'] = int(os.environ.get('BULK_UNENROLL_BATCH_SIZE', 1000))
+    
+    # Bulk certificate verification limits
+    app.config['CERTIFICATE_BULK_VERIFY_MAX'] = int(os.environ.get('CERTIFICATE_BULK_VERIFY_MAX', 5000))
+    app.config['CERTIFICATE_BULK_VERIFY_MAX_CODES'] = int(os.environ.get('CERTIFICATE_BULK_VERIFY_MAX_CODES', 10))
+    app.config['CERTIFICATE_BULK_VERIFY_CHUNK_SIZE'] = int(os.environ.get('CERTIFICATE_BULK_VERIFY_CHUNK_SIZE', 500))
+    app.config['CERTIFICATE_BULK_VERIFY_STREAM_THRESHOLD'] = int(os.environ.get('CERTIFICATE_BULK_VERIFY_STREAM_THRESHOLD', 1000))
+    
+    # Signed certificate tokens: public keys of rotated-out signing keys, still published and accepted,
+    # and the revocation set refresh (the dedicated CERTIFICATE_SIGNING_KEY is set above)
+    app.config['CERTIFICATE_RETIRED_PUBLIC_KEYS'] = [
+        key for key in os.environ.get('CERTIFICATE_RETIRED_PUBLIC_KEYS', '').split(',') if key.strip()
+    ]
+    app.config['CERTIFICATE_REVOCATION_REFRESH_INTERVAL'] = float(os.environ.get(
+        'CERTIFICATE_REVOCATION_REFRESH_INTERVAL', 0 if config_name == 'testing' else 60.0
+    ))
+    
     # Initialize extensions
     db.init_app(app)
+    AnalyticsEventWriter(app)
+    VideoProgressBuffer(app)
+    GradingQueue(app)
+    CertificateRenderQueue(app)
+    CertificateTokens(app)
     
     # Configure CORS for AWS deployment and frontend integration
     CORS(app, 
@@ -89,7 +167,7 @@ def create_app(config_name='development'):
              'https://*.amazonaws.com',  # AWS CloudFront
          ],
          supports_credentials=True,
-         allow_headers=['Content-Type', 'Authorization'],
+         allow_headers=['Content-Type', 'Authorization', 'Idempotency-Key'],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS']
     )
     
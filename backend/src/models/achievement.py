@@ -0,0 +1,179 @@
+"""
+Achievement Models for Qryti Learn
+Declarative achievement definitions backed by per-user counters
+"""
+
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import update, delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+
+AchievementDefinition = namedtuple(
+    'AchievementDefinition', ['id', 'title', 'description', 'icon', 'counter', 'target']
+)
+
+# Achievements are evaluated against the counter named in each definition
+ACHIEVEMENTS = (
+    AchievementDefinition('first_course', 'First Steps', 'Complete your first course', '🎯',
+                          'courses_completed', 1),
+    AchievementDefinition('quiz_master', 'Quiz Master', 'Pass 10 quizzes', '🧠',
+                          'quizzes_passed', 10),
+    AchievementDefinition('time_keeper', 'Time Keeper', 'Study for 100 hours', '⏰',
+                          'minutes_studied', 6000),  # 100 hours in minutes
+    AchievementDefinition('certificate_collector', 'Certificate Collector', 'Earn 5 certificates', '🏆',
+                          'certificates_earned', 5),
+)
+
+COUNTER_NAMES = ('courses_completed', 'quizzes_passed', 'minutes_studied', 'certificates_earned')
+
+
+class UserAchievementCounter(db.Model):
+    """Per-user counters that achievements are evaluated against"""
+    __tablename__ = 'user_achievement_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    courses_completed = db.Column(db.Integer, default=0, nullable=False)
+    quizzes_passed = db.Column(db.Integer, default=0, nullable=False)
+    minutes_studied = db.Column(db.Float, default=0, nullable=False)
+    certificates_earned = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<UserAchievementCounter User:{self.user_id}>'
+
+    def to_dict(self):
+        """Convert counters to dictionary"""
+        return {name: getattr(self, name) for name in COUNTER_NAMES}
+
+    @staticmethod
+    def increment(user_id, **deltas):
+        """
+        Atomically add deltas to a user's counters (no commit)
+
+        Uses a relative UPDATE and inserts the row on first use.
+        """
+        deltas = {name: value for name, value in deltas.items() if value}
+        if not deltas:
+            return
+
+        result = db.session.execute(
+            update(UserAchievementCounter)
+            .where(UserAchievementCounter.user_id == user_id)
+            .values({name: getattr(UserAchievementCounter, name) + value for name, value in deltas.items()})
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return
+
+        values = {name: 0 for name in COUNTER_NAMES}
+        values.update(deltas)
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(UserAchievementCounter).values(user_id=user_id, **values))
+        except IntegrityError:
+            # Another writer created the row first
+            UserAchievementCounter.increment(user_id, **deltas)
+
+    @staticmethod
+    def increment_many(user_ids, **deltas):
+        """
+        Add the same deltas to many users' counters with set-based statements (no commit)
+        """
+        deltas = {name: value for name, value in deltas.items() if value}
+        user_ids = list(user_ids)
+        if not deltas or not user_ids:
+            return
+
+        db.session.execute(
+            update(UserAchievementCounter)
+            .where(UserAchievementCounter.user_id.in_(user_ids))
+            .values({name: getattr(UserAchievementCounter, name) + value for name, value in deltas.items()})
+            .execution_options(synchronize_session=False)
+        )
+        existing = set(db.session.scalars(
+            select(UserAchievementCounter.user_id).where(UserAchievementCounter.user_id.in_(user_ids))
+        ))
+        missing = [user_id for user_id in user_ids if user_id not in existing]
+        if not missing:
+            return
+
+        values = {name: 0 for name in COUNTER_NAMES}
+        values.update(deltas)
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(UserAchievementCounter), [dict(values, user_id=user_id) for user_id in missing])
+        except IntegrityError:
+            # Another writer created some of the rows first
+            for user_id in missing:
+                UserAchievementCounter.increment(user_id, **deltas)
+
+    @staticmethod
+    def get_achievements(user_id):
+        """Evaluate every achievement for a user from a single primary-key lookup"""
+        counters = db.session.get(UserAchievementCounter, user_id)
+
+        achievements = []
+        for definition in ACHIEVEMENTS:
+            current = getattr(counters, definition.counter) if counters else 0
+            achievements.append({
+                'id': definition.id,
+                'title': definition.title,
+                'description': definition.description,
+                'icon': definition.icon,
+                'target': definition.target,
+                'current': current,
+                'completed': current >= definition.target,
+                'progress_percentage': min(100, (current / definition.target) * 100)
+            })
+        return achievements
+
+    @staticmethod
+    def rebuild(user_id=None, batch_size=1000):
+        """
+        Recompute counters from enrollments, quiz attempts, study sessions and certificates
+
+        Study time comes from the study session ledger only; run
+        StudySession.backfill first so module time logged before the ledger
+        existed is counted. Returns the number of users rebuilt.
+        """
+        from src.models.user import User
+        from src.models.course import CourseEnrollment
+        from src.models.quiz import QuizAttempt
+        from src.models.progress import Certificate, StudySession
+
+        sources = {
+            'courses_completed': db.session.query(CourseEnrollment.user_id, db.func.count(CourseEnrollment.id))
+                .filter(CourseEnrollment.status == 'completed'),
+            'quizzes_passed': db.session.query(QuizAttempt.user_id, db.func.count(QuizAttempt.id))
+                .filter(QuizAttempt.passed == True),
+            'minutes_studied': db.session.query(StudySession.user_id, db.func.sum(StudySession.minutes)),
+            'certificates_earned': db.session.query(Certificate.user_id, db.func.count(Certificate.id))
+                .filter(Certificate.is_valid == True),
+        }
+
+        rebuilt = 0
+        last_id = 0
+        while True:
+            users_query = db.session.query(User.id).filter(User.id > last_id)
+            if user_id:
+                users_query = users_query.filter(User.id == user_id)
+            user_ids = [row.id for row in users_query.order_by(User.id).limit(batch_size).all()]
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+
+            rows = {uid: {'user_id': uid, **{name: 0 for name in COUNTER_NAMES}} for uid in user_ids}
+            for name, query in sources.items():
+                model = query.column_descriptions[0]['entity']
+                for uid, value in query.filter(model.user_id.in_(user_ids)).group_by(model.user_id).all():
+                    rows[uid][name] = value or 0
+
+            db.session.execute(
+                delete(UserAchievementCounter).where(UserAchievementCounter.user_id.in_(user_ids))
+            )
+            db.session.execute(insert(UserAchievementCounter), list(rows.values()))
+            db.session.commit()
+            rebuilt += len(user_ids)
+
+        return rebuilt
@@ -180,6 +180,11 @@ class AdminUser(db.Model):
     # Relationships
     user = db.relationship('User', backref='admin_profile')
     
+    @property
+    def is_super_admin(self):
+        """Super admins act across all organizations"""
+        return self.role == 'super_admin'
+    
     @property
     def permissions(self):
         """Get permissions as a dict"""
@@ -1,6 +1,20 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from src.models.user import db
+import json
+import time
+import zlib
+from sqlalchemy import event, inspect, func, case, select, update, insert, delete, exists, tuple_
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db, User
+from src.models.achievement import UserAchievementCounter
+
+LEVEL_NAMES = {
+    1: "ISO 42001 Foundations",
+    2: "ISO 42001 Practitioner",
+    3: "ISO 42001 Lead Implementer",
+    4: "ISO 42001 Auditor/Assessor"
+}
+
 
 class Course(db.Model):
     __tablename__ = 'courses'
@@ -18,6 +32,10 @@ class Course(db.Model):
     # AWS S3 compatible fields
     thumbnail_url = db.Column(db.String(500), nullable=True)  # S3 URL for course thumbnail
     
+    # Denormalized counters, maintained by Module and CourseEnrollment events
+    module_count = db.Column(db.Integer, default=0, nullable=False)
+    enrollment_count = db.Column(db.Integer, default=0, nullable=False)
+    
     # Relationships
     modules = db.relationship('Module', backref='course', lazy=True, cascade='all, delete-orphan', order_by='Module.order_index')
     enrollments = db.relationship('CourseEnrollment', backref='course', lazy=True, cascade='all, delete-orphan')
@@ -40,8 +58,8 @@ class Course(db.Model):
             'thumbnail_url': self.thumbnail_url,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'module_count': len(self.modules),
-            'enrollment_count': len(self.enrollments)
+            'module_count': self.module_count,
+            'enrollment_count': self.enrollment_count
         }
         
         if include_modules:
@@ -51,13 +69,12 @@ class Course(db.Model):
 
     def get_level_name(self):
         """Get human-readable level name"""
-        level_names = {
-            1: "ISO 42001 Foundations",
-            2: "ISO 42001 Practitioner", 
-            3: "ISO 42001 Lead Implementer",
-            4: "ISO 42001 Auditor/Assessor"
-        }
-        return level_names.get(self.level, f"Level {self.level}")
+        return Course.level_name(self.level)
+
+    @staticmethod
+    def level_name(level):
+        """Human-readable name for a course level"""
+        return LEVEL_NAMES.get(level, f"Level {level}")
 
     def get_completion_rate(self):
         """Calculate course completion rate"""
@@ -76,12 +93,51 @@ class Course(db.Model):
         """Get all active courses"""
         return Course.query.filter_by(is_active=True).order_by(Course.level, Course.title).all()
 
+    @staticmethod
+    def apply_counter_delta(course_id, modules=0, enrollments=0):
+        """
+        Adjust a course's module/enrollment counters for changes made with bulk SQL
+
+        ORM inserts and deletes are counted by mapper events; bulk statements
+        bypass those, so their callers report the change here. Does not commit.
+        """
+        _adjust_course_counters(db.session.connection(), course_id, modules=modules, enrollments=enrollments)
+
+    @staticmethod
+    def rebuild_counters():
+        """
+        Recompute module, enrollment and quiz counters from the raw rows
+
+        Returns the number of courses updated.
+        """
+        from src.models.quiz import Quiz  # Import here to avoid circular import
+
+        courses = Course.__table__
+        modules = Module.__table__
+        enrollments = CourseEnrollment.__table__
+        quizzes = Quiz.__table__
+        result = db.session.execute(update(courses).values(
+            module_count=select(func.count(modules.c.id))
+                .where(modules.c.course_id == courses.c.id).scalar_subquery(),
+            enrollment_count=select(func.count(enrollments.c.id))
+                .where(enrollments.c.course_id == courses.c.id).scalar_subquery()
+        ))
+        db.session.execute(update(modules).values(
+            quiz_count=select(func.count(quizzes.c.id))
+                .where(quizzes.c.module_id == modules.c.id).scalar_subquery()
+        ))
+        CourseCatalog.touch(db.session.connection())
+        db.session.commit()
+        return result.rowcount
+
 
 class Module(db.Model):
     __tablename__ = 'modules'
     
     id = db.Column(db.Integer, primary_key=True)
-    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
+    # active_history keeps the previous course on reassignment, for the module counters
+    course_id = db.column_property(db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False),
+                                   active_history=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     content_text = db.Column(db.Text, nullable=True)  # Rich text content
@@ -96,6 +152,9 @@ class Module(db.Model):
     video_s3_key = db.Column(db.String(500), nullable=True)  # S3 object key for video
     transcript_s3_key = db.Column(db.String(500), nullable=True)  # S3 object key for transcript
     
+    # Denormalized counter, maintained by Quiz events
+    quiz_count = db.Column(db.Integer, default=0, nullable=False)
+    
     # Relationships
     progress = db.relationship('UserProgress', backref='module', lazy=True, cascade='all, delete-orphan')
     quizzes = db.relationship('Quiz', backref='module', lazy=True, cascade='all, delete-orphan')
@@ -116,7 +175,7 @@ class Module(db.Model):
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'quiz_count': len(self.quizzes)
+            'quiz_count': self.quiz_count
         }
         
         if include_content:
@@ -151,6 +210,14 @@ class CourseEnrollment(db.Model):
     completed_at = db.Column(db.DateTime, nullable=True)
     final_score = db.Column(db.Float, nullable=True)  # Final course score percentage
     
+    # Denormalized progress counters, maintained by UserProgress
+    total_module_count = db.Column(db.Integer, default=0, nullable=False)  # Snapshot of active modules
+    completed_module_count = db.Column(db.Integer, default=0, nullable=False)
+    in_progress_module_count = db.Column(db.Integer, default=0, nullable=False)
+    time_spent_minutes = db.Column(db.Integer, default=0, nullable=False)
+    score_sum = db.Column(db.Float, default=0, nullable=False)
+    score_count = db.Column(db.Integer, default=0, nullable=False)
+    
     # Unique constraint to prevent duplicate enrollments
     __table_args__ = (db.UniqueConstraint('user_id', 'course_id', name='unique_user_course_enrollment'),)
 
@@ -168,9 +235,39 @@ class CourseEnrollment(db.Model):
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'final_score': self.final_score,
+            'progress': self.get_progress_summary(),
             'course': self.course.to_dict() if self.course else None
         }
 
+    @property
+    def completion_percentage(self):
+        """Completion percentage from the progress counters"""
+        if not self.total_module_count:
+            return 0
+        return min(100.0, self.completed_module_count / self.total_module_count * 100)
+
+    @property
+    def average_score(self):
+        """Average module score from the progress counters"""
+        if not self.score_count:
+            return 0
+        return round(self.score_sum / self.score_count, 2)
+
+    def is_progress_complete(self):
+        """Check whether every module in the snapshot has been completed"""
+        return self.total_module_count > 0 and self.completed_module_count >= self.total_module_count
+
+    def get_progress_summary(self):
+        """Get course progress summary from the progress counters"""
+        return {
+            'total_modules': self.total_module_count,
+            'completed_modules': self.completed_module_count,
+            'in_progress_modules': self.in_progress_module_count,
+            'completion_percentage': self.completion_percentage,
+            'total_time_minutes': self.time_spent_minutes,
+            'average_score': self.average_score
+        }
+
     def start_course(self):
         """Mark course as started"""
         if self.status == 'enrolled':
@@ -180,6 +277,8 @@ class CourseEnrollment(db.Model):
 
     def complete_course(self, final_score):
         """Mark course as completed"""
+        if self.status != 'completed':
+            UserAchievementCounter.increment(self.user_id, courses_completed=1)
         self.status = 'completed'
         self.completed_at = datetime.utcnow()
         self.final_score = final_score
@@ -199,9 +298,541 @@ class CourseEnrollment(db.Model):
     def enroll_user(user_id, course_id):
         """Enroll user in course"""
         if not CourseEnrollment.is_enrolled(user_id, course_id):
-            enrollment = CourseEnrollment(user_id=user_id, course_id=course_id)
+            enrollment = CourseEnrollment(
+                user_id=user_id,
+                course_id=course_id,
+                total_module_count=Module.query.filter_by(course_id=course_id, is_active=True).count()
+            )
             db.session.add(enrollment)
             db.session.commit()
             return enrollment
         return None
 
+    @staticmethod
+    def bulk_enroll(course_id, user_ids=None, organization=None, department=None, chunk_size=1000):
+        """
+        Enroll many users in a course with set-based statements
+
+        Targets are the active users in user_ids (when given) that also match
+        organization and department (when given). The query that selects the
+        targets also flags who is already enrolled, so deduplication costs no
+        extra round trips, and only integer ids are loaded. New enrollments
+        are inserted chunk by chunk, one executemany and one commit each.
+        Returns a summary of the counts.
+        """
+        already_enrolled = exists().where(
+            CourseEnrollment.user_id == User.id, CourseEnrollment.course_id == course_id
+        )
+        targets = select(User.id, already_enrolled).where(User.is_active == True)
+        if organization is not None:
+            targets = targets.where(User.organization == organization)
+        if department is not None:
+            targets = targets.where(User.department == department)
+
+        if user_ids is None:
+            matched = db.session.execute(targets.order_by(User.id)).all()
+        else:
+            user_ids = sorted(set(user_ids))
+            matched = []
+            for start in range(0, len(user_ids), chunk_size):
+                chunk = user_ids[start:start + chunk_size]
+                matched.extend(db.session.execute(targets.where(User.id.in_(chunk)).order_by(User.id)))
+        pending = [user_id for user_id, enrolled in matched if not enrolled]
+
+        total_module_count = Module.query.filter_by(course_id=course_id, is_active=True).count()
+        enrolled = 0
+        for start in range(0, len(pending), chunk_size):
+            inserted = CourseEnrollment._insert_enrollments(
+                course_id, pending[start:start + chunk_size], total_module_count
+            )
+            Course.apply_counter_delta(course_id, enrollments=inserted)
+            db.session.commit()
+            enrolled += inserted
+
+        summary = {
+            'course_id': course_id,
+            'matched': len(matched),
+            'enrolled': enrolled,
+            'already_enrolled': len(matched) - enrolled
+        }
+        if user_ids is not None:
+            # Unknown, inactive or out-of-scope ids
+            summary['skipped'] = len(user_ids) - len(matched)
+        return summary
+
+    @staticmethod
+    def _insert_enrollments(course_id, user_ids, total_module_count):
+        """Bulk insert enrollments for one chunk of users; returns the number inserted"""
+        now = datetime.utcnow()
+        rows = [{
+            'user_id': user_id,
+            'course_id': course_id,
+            'status': 'enrolled',
+            'enrolled_at': now,
+            'total_module_count': total_module_count
+        } for user_id in user_ids]
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(CourseEnrollment), rows)
+        except IntegrityError:
+            # Some users enrolled themselves meanwhile: insert only the rest
+            existing = set(db.session.scalars(
+                select(CourseEnrollment.user_id)
+                .where(CourseEnrollment.course_id == course_id, CourseEnrollment.user_id.in_(user_ids))
+            ))
+            rows = [row for row in rows if row['user_id'] not in existing]
+            if rows:
+                db.session.execute(insert(CourseEnrollment), rows)
+        return len(rows)
+
+    @staticmethod
+    def bulk_unenroll(course_id=None, user_ids=None, organization=None, department=None,
+                      include_completed=False, include_quiz_attempts=False, include_video_progress=False,
+                      batch_size=1000, dry_run=False):
+        """
+        Remove many enrollments and their dependent rows with set-based DELETEs
+
+        Targets the enrollments in course_id (or in every course when None)
+        of the users in user_ids and/or matching organization and department.
+        Completed enrollments are kept unless include_completed is set. Each
+        batch of at most batch_size enrollments deletes its user_progress
+        rows, optionally its quiz attempts (with their answers, attempt
+        counters and stats) and video progress, then the enrollments, and
+        commits, so write locks are held for one batch at a time. With
+        dry_run the same batches are counted instead of deleted. Returns the
+        per-table row counts.
+        """
+        from src.models.progress import UserProgress  # Import here to avoid circular import
+
+        from src.utils.item_analysis import item_analysis_cache
+
+        targets = select(CourseEnrollment.id, CourseEnrollment.user_id, CourseEnrollment.course_id,
+                         CourseEnrollment.status)
+        if course_id is not None:
+            targets = targets.where(CourseEnrollment.course_id == course_id)
+        if not include_completed:
+            targets = targets.where(CourseEnrollment.status != 'completed')
+        if organization is not None or department is not None:
+            targets = targets.join(User, User.id == CourseEnrollment.user_id)
+            if organization is not None:
+                targets = targets.where(User.organization == organization)
+            if department is not None:
+                targets = targets.where(User.department == department)
+
+        summary = {'course_enrollments': 0, 'user_progress': 0}
+        if include_quiz_attempts:
+            summary.update(quiz_attempts=0, quiz_answers=0)
+        if include_video_progress:
+            summary['video_progress'] = 0
+
+        for batch in CourseEnrollment._unenroll_batches(targets, user_ids, batch_size):
+            pairs = [(row.user_id, row.course_id) for row in batch]
+            counts = {
+                'user_progress': _delete_or_count(
+                    UserProgress, tuple_(UserProgress.user_id, UserProgress.course_id).in_(pairs), dry_run
+                )
+            }
+            quiz_ids = set()
+            if include_quiz_attempts:
+                counts.update(CourseEnrollment._remove_quiz_attempts(pairs, dry_run, quiz_ids))
+            if include_video_progress:
+                counts['video_progress'] = CourseEnrollment._remove_video_progress(pairs, dry_run)
+            counts['course_enrollments'] = _delete_or_count(
+                CourseEnrollment, CourseEnrollment.id.in_([row.id for row in batch]), dry_run
+            )
+
+            if not dry_run:
+                per_course = {}
+                for row in batch:
+                    per_course[row.course_id] = per_course.get(row.course_id, 0) + 1
+                for target_course_id, removed in per_course.items():
+                    Course.apply_counter_delta(target_course_id, enrollments=-removed)
+                completed_per_user = {}
+                for row in batch:
+                    if row.status == 'completed':
+                        completed_per_user[row.user_id] = completed_per_user.get(row.user_id, 0) + 1
+                _subtract_from_counters('courses_completed', completed_per_user.items())
+                db.session.commit()
+                # Cached item statistics would otherwise keep counting the deleted attempts
+                for quiz_id in quiz_ids:
+                    item_analysis_cache.invalidate(quiz_id)
+            for name, count in counts.items():
+                summary[name] += count
+
+        summary['dry_run'] = dry_run
+        return summary
+
+    @staticmethod
+    def _unenroll_batches(targets, user_ids, batch_size):
+        """Yield target enrollment rows in batches, by id keyset or by chunks of user_ids"""
+        if user_ids is not None:
+            user_ids = sorted(set(user_ids))
+            for start in range(0, len(user_ids), batch_size):
+                batch = db.session.execute(
+                    targets.where(CourseEnrollment.user_id.in_(user_ids[start:start + batch_size]))
+                ).all()
+                if batch:
+                    yield batch
+            return
+
+        last_id = 0
+        while True:
+            batch = db.session.execute(
+                targets.where(CourseEnrollment.id > last_id).order_by(CourseEnrollment.id).limit(batch_size)
+            ).all()
+            if not batch:
+                return
+            last_id = batch[-1].id
+            yield batch
+
+    @staticmethod
+    def _remove_quiz_attempts(pairs, dry_run, quiz_ids):
+        """
+        Delete (or count) the quiz attempts of (user, course) pairs and keep quiz counters consistent
+
+        Adds the ids of quizzes that lost attempts to quiz_ids.
+        """
+        from src.models.quiz import Quiz, QuizAttempt, QuizAnswer, QuizAttemptCounter, QuizStats
+
+        attempts = select(QuizAttempt.id).join(Quiz, Quiz.id == QuizAttempt.quiz_id)\
+            .join(Module, Module.id == Quiz.module_id)\
+            .where(tuple_(QuizAttempt.user_id, Module.course_id).in_(pairs))
+        if dry_run:
+            return {
+                'quiz_answers': _delete_or_count(QuizAnswer, QuizAnswer.attempt_id.in_(attempts), True),
+                'quiz_attempts': _delete_or_count(QuizAttempt, QuizAttempt.id.in_(attempts), True)
+            }
+
+        # Bulk deletes skip the QuizAttempt events, so take the attempts out of the stats here
+        completed = (QuizAttempt.completed_at != None) & (QuizAttempt.score != None)
+        stats = db.session.execute(
+            select(
+                QuizAttempt.quiz_id,
+                func.count(QuizAttempt.id),
+                func.sum(case((completed, 1), else_=0)),
+                func.coalesce(func.sum(case((completed, QuizAttempt.score), else_=0)), 0),
+                func.sum(case((completed & (QuizAttempt.passed == True), 1), else_=0))
+            ).where(QuizAttempt.id.in_(attempts)).group_by(QuizAttempt.quiz_id)
+        ).all()
+        for quiz_id, attempt_count, completion_count, score_sum, pass_count in stats:
+            quiz_ids.add(quiz_id)
+            db.session.execute(
+                update(QuizStats).where(QuizStats.quiz_id == quiz_id).values(
+                    attempt_count=QuizStats.attempt_count - attempt_count,
+                    completion_count=QuizStats.completion_count - (completion_count or 0),
+                    score_sum=QuizStats.score_sum - score_sum,
+                    pass_count=QuizStats.pass_count - (pass_count or 0)
+                )
+            )
+
+        # Passed attempts no longer count towards quizzes_passed; group users by how many they lose
+        passed = db.session.execute(
+            select(QuizAttempt.user_id, func.count(QuizAttempt.id))
+            .where(QuizAttempt.id.in_(attempts), QuizAttempt.passed == True)
+            .group_by(QuizAttempt.user_id)
+        ).all()
+        _subtract_from_counters('quizzes_passed', passed)
+
+        # Reset attempt limits along with the attempts
+        counters = db.session.execute(
+            select(QuizAttemptCounter.user_id, QuizAttemptCounter.quiz_id)
+            .join(Quiz, Quiz.id == QuizAttemptCounter.quiz_id)
+            .join(Module, Module.id == Quiz.module_id)
+            .where(tuple_(QuizAttemptCounter.user_id, Module.course_id).in_(pairs))
+        ).all()
+        if counters:
+            _delete_or_count(QuizAttemptCounter, tuple_(QuizAttemptCounter.user_id, QuizAttemptCounter.quiz_id)
+                             .in_([tuple(row) for row in counters]), False)
+        return {
+            'quiz_answers': _delete_or_count(QuizAnswer, QuizAnswer.attempt_id.in_(attempts), False),
+            'quiz_attempts': _delete_or_count(QuizAttempt, QuizAttempt.id.in_(attempts), False)
+        }
+
+    @staticmethod
+    def _remove_video_progress(pairs, dry_run):
+        """Delete (or count) the video progress of (user, course) pairs"""
+        from src.models.video import Video, VideoProgress
+
+        progress = select(VideoProgress.id).join(Video, Video.id == VideoProgress.video_id)\
+            .where(tuple_(VideoProgress.user_id, Video.course_id).in_(pairs))
+        return _delete_or_count(VideoProgress, VideoProgress.id.in_(progress), dry_run)
+
+    @staticmethod
+    def apply_progress_delta(user_id, course_id, completed=0, in_progress=0, minutes=0, score_sum=0, score_count=0):
+        """
+        Atomically adjust the progress counters of an enrollment
+
+        Issues a single UPDATE with relative increments and does not commit,
+        so the change lands in the caller's transaction.
+        """
+        db.session.execute(
+            update(CourseEnrollment)
+            .where(CourseEnrollment.user_id == user_id, CourseEnrollment.course_id == course_id)
+            .values(
+                completed_module_count=CourseEnrollment.completed_module_count + completed,
+                in_progress_module_count=CourseEnrollment.in_progress_module_count + in_progress,
+                time_spent_minutes=CourseEnrollment.time_spent_minutes + minutes,
+                score_sum=CourseEnrollment.score_sum + score_sum,
+                score_count=CourseEnrollment.score_count + score_count
+            )
+        )
+
+    @staticmethod
+    def rebuild_progress_counters(course_id=None, batch_size=1000):
+        """
+        Recompute enrollment progress counters from the raw progress rows
+
+        Returns the number of enrollments updated.
+        """
+        from src.models.progress import UserProgress  # Import here to avoid circular import
+
+        module_counts_query = db.session.query(Module.course_id, func.count(Module.id))\
+            .filter(Module.is_active == True).group_by(Module.course_id)
+        if course_id:
+            module_counts_query = module_counts_query.filter(Module.course_id == course_id)
+        module_counts = dict(module_counts_query.all())
+
+        updated = 0
+        last_id = 0
+        while True:
+            enrollments_query = db.session.query(
+                CourseEnrollment.id, CourseEnrollment.user_id, CourseEnrollment.course_id
+            ).filter(CourseEnrollment.id > last_id)
+            if course_id:
+                enrollments_query = enrollments_query.filter(CourseEnrollment.course_id == course_id)
+            enrollments = enrollments_query.order_by(CourseEnrollment.id).limit(batch_size).all()
+            if not enrollments:
+                break
+            last_id = enrollments[-1].id
+
+            progress_query = db.session.query(
+                UserProgress.user_id,
+                UserProgress.course_id,
+                func.sum(case((UserProgress.status == 'completed', 1), else_=0)),
+                func.sum(case((UserProgress.status == 'in_progress', 1), else_=0)),
+                func.coalesce(func.sum(UserProgress.time_spent_minutes), 0),
+                func.coalesce(func.sum(UserProgress.score), 0),
+                func.count(UserProgress.score)
+            ).filter(UserProgress.user_id.in_({e.user_id for e in enrollments}))
+            if course_id:
+                progress_query = progress_query.filter(UserProgress.course_id == course_id)
+            progress_totals = {
+                (row[0], row[1]): row[2:]
+                for row in progress_query.group_by(UserProgress.user_id, UserProgress.course_id).all()
+            }
+
+            batch = []
+            for enrollment in enrollments:
+                completed, in_progress, minutes, score_sum, score_count = progress_totals.get(
+                    (enrollment.user_id, enrollment.course_id), (0, 0, 0, 0, 0)
+                )
+                batch.append({
+                    'id': enrollment.id,
+                    'total_module_count': module_counts.get(enrollment.course_id, 0),
+                    'completed_module_count': int(completed or 0),
+                    'in_progress_module_count': int(in_progress or 0),
+                    'time_spent_minutes': int(minutes or 0),
+                    'score_sum': float(score_sum or 0),
+                    'score_count': int(score_count or 0)
+                })
+            db.session.execute(update(CourseEnrollment), batch)
+            updated += len(batch)
+
+        db.session.commit()
+        return updated
+
+
+
+class CourseCatalog(db.Model):
+    """
+    Precomputed JSON payload of the active course catalog
+
+    A single row whose version is bumped (in the writer's transaction) by
+    every course or module change. Readers compare version with
+    built_version: when they match, the stored payload is current and each
+    process serves it from memory, so a catalog request costs one small
+    SELECT. When they differ, the first reader rebuilds the payload.
+
+    Enrollments do not bump the version, so they neither contend on this row
+    nor force rebuilds. Each process overlays the courses' enrollment
+    counters on the payload instead, re-reading them at most every
+    ENROLLMENT_COUNTS_TTL seconds, so listed counts lag by at most that long.
+    """
+    __tablename__ = 'course_catalog'
+    
+    ROW_ID = 1
+    ENROLLMENT_COUNTS_TTL = 30.0
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, default=1, nullable=False)  # Bumped on every catalog change
+    built_version = db.Column(db.Integer, default=0, nullable=False)  # Version payload_json was built from
+    payload_json = db.Column(db.Text, nullable=True)
+    built_at = db.Column(db.DateTime, nullable=True)
+
+    # Per-process copy of the current payload: (version, stored courses, counts stamp, courses, {level: (etag, body)})
+    _cache = (None, None, None, None, {})
+    # Per-process enrollment counters: (monotonic expiry, {course_id: count}, stamp)
+    _enrollments = (0.0, {}, None)
+
+    def __repr__(self):
+        return f'<CourseCatalog v{self.version}>'
+
+    @staticmethod
+    def touch(connection):
+        """Mark the catalog stale; runs on the caller's connection so it commits with the change"""
+        table = CourseCatalog.__table__
+        connection.execute(
+            update(table).where(table.c.id == CourseCatalog.ROW_ID).values(version=table.c.version + 1)
+        )
+
+    @staticmethod
+    def get_payload(level=None):
+        """
+        Serialized catalog for all active courses, or for one level
+
+        Returns (etag, body) where body is the JSON document served by the
+        course listing and etag changes whenever the catalog does.
+        """
+        table = CourseCatalog.__table__
+        row = db.session.execute(
+            select(table.c.version, table.c.built_version).where(table.c.id == CourseCatalog.ROW_ID)
+        ).first()
+        if row is None:
+            CourseCatalog._create()
+            return CourseCatalog.get_payload(level)
+        
+        version, stored, stamp, courses, bodies = CourseCatalog._cache
+        if version != row.version or row.built_version != row.version:
+            if row.built_version == row.version:
+                payload = db.session.execute(
+                    select(table.c.payload_json).where(table.c.id == CourseCatalog.ROW_ID)
+                ).scalar()
+            else:
+                payload = CourseCatalog._rebuild(row.version)
+            stored, stamp = json.loads(payload), None
+        
+        counts, counts_stamp = CourseCatalog._enrollment_counts()
+        if stamp != counts_stamp:
+            courses = [dict(course, enrollment_count=counts.get(course['id'], course['enrollment_count']))
+                       for course in stored]
+            stamp, bodies = counts_stamp, {}
+            CourseCatalog._cache = (row.version, stored, stamp, courses, bodies)
+        
+        if level not in bodies:
+            selected = courses if level is None else [course for course in courses if course['level'] == level]
+            etag = f"catalog-{row.version}-{stamp}" if level is None else f"catalog-{row.version}-{stamp}-level-{level}"
+            bodies[level] = (etag, json.dumps({
+                'courses': selected, 'total': len(selected), 'catalog_version': row.version
+            }))
+        return bodies[level]
+
+    @staticmethod
+    def _enrollment_counts():
+        """Enrollment counters of the active courses, re-read once they are ENROLLMENT_COUNTS_TTL old"""
+        expires_at, counts, stamp = CourseCatalog._enrollments
+        now = time.monotonic()
+        if now >= expires_at:
+            counts = dict(db.session.execute(
+                select(Course.id, Course.enrollment_count).where(Course.is_active == True)
+            ).all())
+            # Derived from the counts alone, so every process serves the same ETag for them
+            stamp = f"{zlib.crc32(json.dumps(sorted(counts.items())).encode()):08x}"
+            CourseCatalog._enrollments = (now + CourseCatalog.ENROLLMENT_COUNTS_TTL, counts, stamp)
+        return counts, stamp
+
+    @staticmethod
+    def _rebuild(version):
+        """Build the payload for a version and store it unless a newer change has landed meanwhile"""
+        payload = json.dumps([course.to_dict() for course in Course.get_active_courses()])
+        table = CourseCatalog.__table__
+        db.session.execute(
+            update(table)
+            .where(table.c.id == CourseCatalog.ROW_ID, table.c.version == version)
+            .values(built_version=version, payload_json=payload, built_at=datetime.utcnow())
+        )
+        db.session.commit()
+        return payload
+
+    @staticmethod
+    def _create():
+        """Seed the catalog row (stale, so the first reader builds it)"""
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(CourseCatalog).values(
+                    id=CourseCatalog.ROW_ID, version=1, built_version=0
+                ))
+        except IntegrityError:
+            # Another reader seeded it first
+            pass
+        db.session.commit()
+
+
+def _delete_or_count(model, condition, dry_run):
+    """Set-based DELETE of the matching rows, or just their count for a dry run"""
+    if dry_run:
+        return db.session.execute(select(func.count()).select_from(model).where(condition)).scalar()
+    return db.session.execute(
+        delete(model).where(condition).execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def _subtract_from_counters(counter, losses):
+    """Take (user_id, count) losses off an achievement counter, one UPDATE per distinct count"""
+    users_by_loss = {}
+    for user_id, lost in losses:
+        users_by_loss.setdefault(lost, []).append(user_id)
+    for lost, user_ids in users_by_loss.items():
+        UserAchievementCounter.increment_many(user_ids, **{counter: -lost})
+
+
+def _adjust_course_counters(connection, course_id, modules=0, enrollments=0):
+    """Relative update of a course's counters, plus a catalog version bump for module changes"""
+    table = Course.__table__
+    connection.execute(
+        update(table).where(table.c.id == course_id).values(
+            module_count=table.c.module_count + modules,
+            enrollment_count=table.c.enrollment_count + enrollments
+        )
+    )
+    # Enrollment counts are overlaid at read time (see CourseCatalog)
+    if modules:
+        CourseCatalog.touch(connection)
+
+
+@event.listens_for(Course, 'after_insert')
+@event.listens_for(Course, 'after_update')
+@event.listens_for(Course, 'after_delete')
+def _touch_catalog_on_course_change(mapper, connection, target):
+    """Any course change alters the catalog"""
+    CourseCatalog.touch(connection)
+
+
+@event.listens_for(Module, 'after_insert')
+def _count_module(mapper, connection, target):
+    _adjust_course_counters(connection, target.course_id, modules=1)
+
+
+@event.listens_for(Module, 'after_delete')
+def _uncount_module(mapper, connection, target):
+    _adjust_course_counters(connection, target.course_id, modules=-1)
+
+
+@event.listens_for(Module, 'after_update')
+def _move_module(mapper, connection, target):
+    """Move the count when a module is reassigned to another course"""
+    history = inspect(target).attrs.course_id.history
+    if not history.added:
+        return
+    for course_id in history.deleted or ():
+        _adjust_course_counters(connection, course_id, modules=-1)
+    _adjust_course_counters(connection, target.course_id, modules=1)
+
+
+@event.listens_for(CourseEnrollment, 'after_insert')
+def _count_enrollment(mapper, connection, target):
+    _adjust_course_counters(connection, target.course_id, enrollments=1)
+
+
+@event.listens_for(CourseEnrollment, 'after_delete')
+def _uncount_enrollment(mapper, connection, target):
+    _adjust_course_counters(connection, target.course_id, enrollments=-1)
@@ -1,9 +1,16 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, timedelta
+import os
 import uuid
 import secrets
 import json
+from flask import current_app, has_app_context
+from sqlalchemy import insert, delete, update, select, or_, and_, text
+from sqlalchemy.exc import IntegrityError
 from src.models.user import db
+from src.models.course import CourseEnrollment
+from src.models.achievement import UserAchievementCounter
+from src.utils.certificate_verification import CertificateVerification, certificate_verification_cache
 
 class UserProgress(db.Model):
     __tablename__ = 'user_progress'
@@ -47,21 +54,48 @@ class UserProgress(db.Model):
             self.status = 'in_progress'
             self.started_at = datetime.utcnow()
             self.last_accessed = datetime.utcnow()
+            CourseEnrollment.apply_progress_delta(self.user_id, self.course_id, in_progress=1)
             db.session.commit()
 
-    def complete_module(self, score=None):
-        """Mark module as completed"""
+    def complete_module(self, score=None, additional_minutes=0):
+        """Mark module as completed and update enrollment counters in the same transaction"""
+        previous_status = self.status
+        previous_score = self.score
+
         self.status = 'completed'
         self.completed_at = datetime.utcnow()
         self.last_accessed = datetime.utcnow()
         if score is not None:
             self.score = score
+        if additional_minutes and additional_minutes > 0:
+            self.time_spent_minutes = (self.time_spent_minutes or 0) + additional_minutes
+        else:
+            additional_minutes = 0
+
+        score_sum_delta = 0
+        score_count_delta = 0
+        if score is not None:
+            score_sum_delta = score - (previous_score or 0)
+            score_count_delta = 1 if previous_score is None else 0
+
+        CourseEnrollment.apply_progress_delta(
+            self.user_id,
+            self.course_id,
+            completed=1 if previous_status != 'completed' else 0,
+            in_progress=-1 if previous_status == 'in_progress' else 0,
+            minutes=additional_minutes,
+            score_sum=score_sum_delta,
+            score_count=score_count_delta
+        )
+        StudySession.record(self.user_id, additional_minutes, course_id=self.course_id, module_id=self.module_id)
         db.session.commit()
 
     def update_time_spent(self, additional_minutes):
         """Update time spent on module"""
         self.time_spent_minutes += additional_minutes
         self.last_accessed = datetime.utcnow()
+        CourseEnrollment.apply_progress_delta(self.user_id, self.course_id, minutes=additional_minutes)
+        StudySession.record(self.user_id, additional_minutes, course_id=self.course_id, module_id=self.module_id)
         db.session.commit()
 
     @staticmethod
@@ -131,6 +165,7 @@ class Certificate(db.Model):
     pdf_s3_key = db.Column(db.String(500), nullable=True)  # S3 object key for PDF
     pdf_url = db.Column(db.String(500), nullable=True)  # Public S3 URL for PDF
     pdf_path = db.Column(db.String(500), nullable=True)  # Local PDF file path
+    pdf_sha256 = db.Column(db.String(64), nullable=True)  # Artifact store key (content hash) of the PDF
     verification_url = db.Column(db.String(500), nullable=True)  # Public verification URL
     
     # Metadata
@@ -167,13 +202,52 @@ class Certificate(db.Model):
 
     def generate_verification_url(self, base_url="https://learn.qryti.com"):
         """Generate public verification URL"""
-        self.verification_url = f"{base_url}/verify/{self.certificate_id}"
+        self.verification_url = Certificate.build_verification_url(self.certificate_id, base_url)
         return self.verification_url
 
+    @staticmethod
+    def build_verification_url(certificate_id, base_url="https://learn.qryti.com"):
+        """Public verification URL for a certificate ID"""
+        return f"{base_url}/verify/{certificate_id}"
+
+    def get_render_data(self):
+        """Plain data needed to render this certificate's PDF"""
+        return {
+            'recipient_name': self.user.get_full_name(),
+            'course_name': self.course.title,
+            'certificate_id': self.certificate_id,
+            'final_score': self.final_score,
+            'completion_date': self.issued_at or datetime.utcnow(),
+            'course_description': self.course.description,
+            'verification_token': self.get_verification_token()
+        }
+
+    def get_verification_token(self):
+        """Signed token carrying this certificate's public claims"""
+        return current_app.extensions['certificate_tokens'].issue(
+            certificate_id=self.certificate_id,
+            holder_name=self.user.get_full_name(),
+            course_title=self.course.title,
+            final_score=self.final_score,
+            issued_at=self.issued_at,
+            expires_at=self.expires_at
+        )
+
+    def has_pdf(self):
+        """Check whether the rendered PDF is on disk"""
+        return bool(self.pdf_path) and os.path.exists(self.pdf_path)
+
     def revoke(self):
         """Revoke the certificate"""
+        if self.is_valid:
+            UserAchievementCounter.increment(self.user_id, certificates_earned=-1)
         self.is_valid = False
+        CertificateRevocationVersion.bump()
         db.session.commit()
+        certificate_verification_cache.invalidate(self.certificate_id, self.verification_code)
+        tokens = current_app.extensions.get('certificate_tokens') if has_app_context() else None
+        if tokens is not None:
+            tokens.revoke(self.certificate_id)
 
     def is_expired(self):
         """Check if certificate is expired"""
@@ -210,7 +284,9 @@ class Certificate(db.Model):
         certificate.generate_verification_url()
         
         db.session.add(certificate)
+        UserAchievementCounter.increment(user_id, certificates_earned=1)
         db.session.commit()
+        certificate_verification_cache.invalidate(certificate.certificate_id, certificate.verification_code)
         return certificate
 
     @staticmethod
@@ -229,6 +305,81 @@ class Certificate(db.Model):
             return certificate
         return None
 
+    @staticmethod
+    def get_verification(certificate_id=None, verification_code=None):
+        """
+        Cached verification projection by certificate ID or verification code
+
+        Returns a CertificateVerification (check is_current() for validity)
+        or None if no such certificate exists. Only the columns shown to a
+        verifier are read, in one joined query, and never the course's
+        modules or enrollments.
+        """
+        if certificate_id is not None:
+            key, column = ('id', certificate_id), Certificate.certificate_id
+        else:
+            key, column = ('code', verification_code), Certificate.verification_code
+        return certificate_verification_cache.get(key, lambda: Certificate._load_verification(column, key[1]),
+                                                  version=CertificateRevocationVersion.current)
+
+    @staticmethod
+    def _load_verification(column, value):
+        row = db.session.execute(Certificate._verification_query().where(column == value)).first()
+        return Certificate._verification_from_row(row) if row is not None else None
+
+    @staticmethod
+    def _verification_query():
+        """Select just the columns of the verification projection"""
+        from src.models.user import User
+        from src.models.course import Course
+
+        return select(Certificate.certificate_id, Certificate.verification_code, Certificate.final_score,
+                      Certificate.issued_at, Certificate.expires_at, Certificate.is_valid,
+                      User.first_name, User.last_name, User.organization, Course.title, Course.level)\
+            .join(User, User.id == Certificate.user_id)\
+            .join(Course, Course.id == Certificate.course_id)
+
+    @staticmethod
+    def _verification_from_row(row):
+        from src.models.course import Course
+
+        return CertificateVerification(
+            certificate_id=row.certificate_id,
+            verification_code=row.verification_code,
+            user_name=f"{row.first_name} {row.last_name}",
+            organization=row.organization,
+            course_title=row.title,
+            course_level=Course.level_name(row.level),
+            final_score=row.final_score,
+            issued_at=row.issued_at,
+            expires_at=row.expires_at,
+            is_valid=row.is_valid
+        )
+
+    @staticmethod
+    def verify_many(certificate_ids=(), verification_codes=(), chunk_size=500):
+        """
+        Yield a compact status entry for every requested ID or code, in request order
+
+        Each chunk of inputs is resolved with one IN query against the unique
+        certificate_id / verification_code indexes. Status is valid, revoked,
+        expired or unknown.
+        """
+        now = datetime.utcnow()
+        for column, key_type, values in ((Certificate.certificate_id, 'certificate_id', list(certificate_ids)),
+                                         (Certificate.verification_code, 'verification_code', list(verification_codes))):
+            for start in range(0, len(values), chunk_size):
+                chunk = values[start:start + chunk_size]
+                found = {}
+                for row in db.session.execute(Certificate._verification_query().where(column.in_(set(chunk)))):
+                    verification = Certificate._verification_from_row(row)
+                    found[getattr(verification, key_type)] = verification
+                for value in chunk:
+                    verification = found.get(value)
+                    entry = verification.to_status_dict(now) if verification else {'status': 'unknown'}
+                    entry[key_type] = value
+                    yield entry
+
     @staticmethod
     def get_user_certificates(user_id):
         """Get all certificates for a user"""
@@ -240,6 +391,361 @@ class Certificate(db.Model):
         return Certificate.query.filter_by(course_id=course_id, is_valid=True).order_by(Certificate.issued_at.desc()).all()
 
 
+class CertificateRevocationVersion(db.Model):
+    """
+    Single row whose version is bumped by every certificate revocation
+
+    Committed with the revocation, so every process can tell with one small
+    SELECT whether a certificate it cached as valid may have been revoked.
+    """
+    __tablename__ = 'certificate_revocation_version'
+    
+    ROW_ID = 1
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, default=1, nullable=False)
+
+    def __repr__(self):
+        return f'<CertificateRevocationVersion v{self.version}>'
+
+    @staticmethod
+    def current():
+        """Current revocation version (1 before the first revocation)"""
+        table = CertificateRevocationVersion.__table__
+        version = db.session.execute(
+            select(table.c.version).where(table.c.id == CertificateRevocationVersion.ROW_ID)
+        ).scalar()
+        return version or 1
+
+    @staticmethod
+    def bump():
+        """Advance the version in the caller's transaction (no commit)"""
+        table = CertificateRevocationVersion.__table__
+        bump = update(table).where(table.c.id == CertificateRevocationVersion.ROW_ID)\
+            .values(version=table.c.version + 1)
+        if db.session.execute(bump).rowcount:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table).values(id=CertificateRevocationVersion.ROW_ID, version=2))
+        except IntegrityError:
+            # Another revocation seeded it first
+            db.session.execute(bump)
+
+
+class CertificateRenderJob(db.Model):
+    """Background PDF rendering job for a certificate"""
+    __tablename__ = 'certificate_render_jobs'
+    __table_args__ = (
+        db.Index('ix_certificate_render_jobs_certificate', 'certificate_id'),
+        db.Index('ix_certificate_render_jobs_issuance_status', 'issuance_id', 'status'),
+    )
+
+    ACTIVE_STATUSES = ('queued', 'rendering')
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(36), unique=True, nullable=False, default=lambda: uuid.uuid4().hex)
+    certificate_id = db.Column(db.Integer, db.ForeignKey('certificates.id'), nullable=False)
+    issuance_id = db.Column(db.Integer, db.ForeignKey('certificate_issuances.id'), nullable=True)  # Bulk issuance
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, rendering, completed, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Relationships
+    certificate = db.relationship('Certificate', backref=db.backref('render_jobs', lazy=True))
+
+    def __repr__(self):
+        return f'<CertificateRenderJob {self.job_id} {self.status}>'
+
+    def to_dict(self):
+        """Convert render job to dictionary"""
+        return {
+            'job_id': self.job_id,
+            'certificate_id': self.certificate.certificate_id if self.certificate else None,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'status_url': f'/api/certificates/jobs/{self.job_id}'
+        }
+
+    def is_active(self, stale_after_seconds=None):
+        """Check whether the job is still queued or rendering (and not abandoned)"""
+        if self.status not in self.ACTIVE_STATUSES:
+            return False
+        if stale_after_seconds:
+            since = self.started_at or self.created_at
+            return datetime.utcnow() - since < timedelta(seconds=stale_after_seconds)
+        return True
+
+    @staticmethod
+    def get_latest(certificate_id):
+        """Get the most recent render job for a certificate row id"""
+        return CertificateRenderJob.query.filter_by(certificate_id=certificate_id)\
+            .order_by(CertificateRenderJob.id.desc()).first()
+
+    @staticmethod
+    def load_render_data(job_ids):
+        """Render data for many jobs in one joined query; returns [(job id, data)] for queued jobs"""
+        from src.models.user import User
+        from src.models.course import Course
+
+        rows = db.session.execute(
+            select(CertificateRenderJob.id, Certificate.certificate_id, Certificate.final_score,
+                   Certificate.issued_at, Certificate.expires_at, User.first_name, User.last_name,
+                   Course.title, Course.description)
+            .join(Certificate, Certificate.id == CertificateRenderJob.certificate_id)
+            .join(User, User.id == Certificate.user_id)
+            .join(Course, Course.id == Certificate.course_id)
+            .where(CertificateRenderJob.id.in_(job_ids), CertificateRenderJob.status == 'queued')
+        ).all()
+        tokens = current_app.extensions['certificate_tokens']
+        return [(row.id, {
+            'recipient_name': f"{row.first_name} {row.last_name}",
+            'course_name': row.title,
+            'certificate_id': row.certificate_id,
+            'final_score': row.final_score,
+            'completion_date': row.issued_at,
+            'course_description': row.description,
+            'verification_token': tokens.issue(
+                certificate_id=row.certificate_id,
+                holder_name=f"{row.first_name} {row.last_name}",
+                course_title=row.title,
+                final_score=row.final_score,
+                issued_at=row.issued_at,
+                expires_at=row.expires_at
+            )
+        }) for row in rows]
+
+    @staticmethod
+    def start_attempts(job_ids):
+        """Move queued jobs to rendering and count the attempt in one statement (no commit)"""
+        db.session.execute(
+            update(CertificateRenderJob)
+            .where(CertificateRenderJob.id.in_(job_ids), CertificateRenderJob.status == 'queued')
+            .values(status='rendering', attempts=CertificateRenderJob.attempts + 1,
+                    started_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+
+class CertificateIssuance(db.Model):
+    """Bulk certificate issuance for a course cohort, resumable after partial failure"""
+    __tablename__ = 'certificate_issuances'
+
+    id = db.Column(db.Integer, primary_key=True)
+    issuance_id = db.Column(db.String(36), unique=True, nullable=False, default=lambda: uuid.uuid4().hex)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
+    requested_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    user_ids_json = db.Column(db.Text, nullable=True)  # Requested learners; all eligible when null
+    status = db.Column(db.String(20), default='issuing', nullable=False)  # issuing, rendering
+    issued_count = db.Column(db.Integer, default=0, nullable=False)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # Relationships
+    course = db.relationship('Course')
+
+    def __repr__(self):
+        return f'<CertificateIssuance {self.issuance_id} Course:{self.course_id}>'
+
+    def to_dict(self):
+        """Convert issuance to dictionary with render progress"""
+        counts = dict(
+            db.session.query(CertificateRenderJob.status, db.func.count(CertificateRenderJob.id))
+            .filter(CertificateRenderJob.issuance_id == self.id)
+            .group_by(CertificateRenderJob.status).all()
+        )
+        rendered = counts.get('completed', 0)
+        failed = counts.get('failed', 0)
+        pending = counts.get('queued', 0) + counts.get('rendering', 0)
+
+        status = self.status
+        if status == 'rendering' and not pending:
+            status = 'completed_with_errors' if failed else 'completed'
+
+        return {
+            'issuance_id': self.issuance_id,
+            'course_id': self.course_id,
+            'status': status,
+            'issued': self.issued_count,
+            'rendered': rendered,
+            'failed': failed,
+            'pending': pending,
+            'progress_percentage': (rendered + failed) / self.issued_count * 100 if self.issued_count else 100.0,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'status_url': f'/api/certificates/admin/issuances/{self.issuance_id}'
+        }
+
+    def get_user_ids(self):
+        """Requested learner ids, or None for every eligible learner"""
+        return json.loads(self.user_ids_json) if self.user_ids_json is not None else None
+
+    @staticmethod
+    def start(course_id, requested_by=None, user_ids=None):
+        """Record a new bulk issuance"""
+        issuance = CertificateIssuance(
+            course_id=course_id,
+            requested_by=requested_by,
+            user_ids_json=json.dumps(sorted(set(user_ids))) if user_ids is not None else None
+        )
+        db.session.add(issuance)
+        db.session.commit()
+        return issuance
+
+    def get_eligible(self):
+        """Completed enrollments in scope that have no certificate yet, in one query"""
+        from src.models.course import CourseEnrollment
+
+        query = db.session.query(CourseEnrollment.user_id, CourseEnrollment.final_score)\
+            .outerjoin(Certificate, and_(Certificate.user_id == CourseEnrollment.user_id,
+                                         Certificate.course_id == CourseEnrollment.course_id))\
+            .filter(CourseEnrollment.course_id == self.course_id,
+                    CourseEnrollment.status == 'completed',
+                    Certificate.id.is_(None))
+        user_ids = self.get_user_ids()
+        if user_ids is not None:
+            scope = set(user_ids)
+            return [row for row in query.order_by(CourseEnrollment.user_id).all() if row.user_id in scope]
+        return query.order_by(CourseEnrollment.user_id).all()
+
+    def issue_certificates(self, chunk_size=1000, max_attempts=3, on_chunk=None):
+        """
+        Create certificates and render jobs for every eligible learner, chunk by chunk
+
+        Each chunk is one bulk insert of certificates with pre-generated IDs
+        and verification codes, one bulk insert of render jobs and one commit,
+        so a failure leaves every earlier chunk issued and a later call picks
+        up where this one stopped. on_chunk receives the new render job ids
+        after each commit. Returns the number of certificates issued.
+        """
+        issued = 0
+        try:
+            eligible = self.get_eligible()
+            for start in range(0, len(eligible), chunk_size):
+                chunk = eligible[start:start + chunk_size]
+                rows = self._insert_certificates(chunk)
+                if not rows:
+                    continue
+
+                certificate_ids = [row['certificate_id'] for row in rows]
+                ids = db.session.scalars(
+                    select(Certificate.id).where(Certificate.certificate_id.in_(certificate_ids))
+                ).all()
+                db.session.execute(insert(CertificateRenderJob), [
+                    {'job_id': uuid.uuid4().hex, 'certificate_id': certificate_pk, 'issuance_id': self.id,
+                     'status': 'queued', 'attempts': 0, 'max_attempts': max_attempts,
+                     'created_at': datetime.utcnow()}
+                    for certificate_pk in ids
+                ])
+                UserAchievementCounter.increment_many([row['user_id'] for row in rows], certificates_earned=1)
+                self.issued_count += len(rows)
+                db.session.commit()
+                issued += len(rows)
+
+                if on_chunk is not None:
+                    on_chunk(db.session.scalars(
+                        select(CertificateRenderJob.id).where(CertificateRenderJob.certificate_id.in_(ids))
+                    ).all())
+        except Exception as e:
+            db.session.rollback()
+            self.error = str(e)
+            db.session.commit()
+            raise
+
+        self.status = 'rendering'
+        self.error = None
+        db.session.commit()
+
+        LearningAnalytics.log_event(
+            user_id=self.requested_by,
+            event_type='certificates_bulk_issued',
+            event_data={'course_id': self.course_id, 'issuance_id': self.issuance_id, 'issued': issued}
+        )
+        return issued
+
+    def _insert_certificates(self, chunk):
+        """Bulk insert one chunk of certificates; returns the rows actually inserted"""
+        now = datetime.utcnow()
+        certificate_ids = set()
+        codes = set()
+        rows = []
+        for enrollment in chunk:
+            certificate_id = Certificate.generate_certificate_id()
+            code = Certificate.generate_verification_code()
+            while certificate_id in certificate_ids or code in codes:
+                certificate_id = Certificate.generate_certificate_id()
+                code = Certificate.generate_verification_code()
+            certificate_ids.add(certificate_id)
+            codes.add(code)
+            rows.append({
+                'user_id': enrollment.user_id,
+                'course_id': self.course_id,
+                'certificate_id': certificate_id,
+                'verification_code': code,
+                'final_score': enrollment.final_score or 0,
+                'issued_at': now,
+                'is_valid': True,
+                'verification_url': Certificate.build_verification_url(certificate_id)
+            })
+
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(Certificate), rows)
+        except IntegrityError:
+            # A code collided with an existing certificate, or a learner was
+            # issued one concurrently: fall back to one savepoint per row
+            rows = [row for row in map(self._insert_certificate, rows) if row]
+
+        # Forget any cached "unknown" answers for the new IDs and codes
+        for row in rows:
+            certificate_verification_cache.invalidate(row['certificate_id'], row['verification_code'])
+        return rows
+
+    def _insert_certificate(self, row, retries=3):
+        """Insert one certificate row, regenerating codes on collision; None if already issued"""
+        for _ in range(retries):
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(Certificate), [row])
+                return row
+            except IntegrityError:
+                if Certificate.query.filter_by(user_id=row['user_id'], course_id=row['course_id']).first():
+                    return None
+                certificate_id = Certificate.generate_certificate_id()
+                row = dict(row, certificate_id=certificate_id,
+                           verification_code=Certificate.generate_verification_code(),
+                           verification_url=Certificate.build_verification_url(certificate_id))
+        raise RuntimeError(f"Could not allocate a unique certificate ID for user {row['user_id']}")
+
+    def reset_unfinished_jobs(self, stale_after_seconds=300):
+        """Requeue failed and abandoned render jobs of this issuance (no commit); returns queued job ids"""
+        stale_before = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+        db.session.execute(
+            update(CertificateRenderJob)
+            .where(CertificateRenderJob.issuance_id == self.id,
+                   or_(CertificateRenderJob.status == 'failed',
+                       and_(CertificateRenderJob.status == 'rendering',
+                            CertificateRenderJob.started_at < stale_before)))
+            .values(status='queued', attempts=0, error=None, finished_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        return db.session.scalars(
+            select(CertificateRenderJob.id)
+            .where(CertificateRenderJob.issuance_id == self.id, CertificateRenderJob.status == 'queued')
+        ).all()
+
+
 class LearningAnalytics(db.Model):
     __tablename__ = 'learning_analytics'
     
@@ -268,20 +774,44 @@ class LearningAnalytics(db.Model):
             'user_agent': self.user_agent
         }
 
+    @staticmethod
+    def build_event_row(user_id, event_type, event_data=None, session_id=None, ip_address=None,
+                        user_agent=None, timestamp=None):
+        """Build a column dict for a learning analytics event"""
+        return {
+            'user_id': user_id,
+            'event_type': event_type,
+            'event_data_json': json.dumps(event_data) if event_data else None,
+            'timestamp': timestamp or datetime.utcnow(),
+            'session_id': session_id,
+            'ip_address': ip_address,
+            'user_agent': user_agent
+        }
+
+    @staticmethod
+    def write_events(rows):
+        """Bulk insert event rows and fold them into daily rollups (no commit)"""
+        if rows:
+            db.session.execute(insert(LearningAnalytics), rows)
+            UserDailyActivity.apply_events(rows)
+
     @staticmethod
     def log_event(user_id, event_type, event_data=None, session_id=None, ip_address=None, user_agent=None):
-        """Log a learning analytics event"""
-        analytics = LearningAnalytics(
+        """Log a learning analytics event through the configured event writer"""
+        row = LearningAnalytics.build_event_row(
             user_id=user_id,
             event_type=event_type,
-            event_data_json=json.dumps(event_data) if event_data else None,
+            event_data=event_data,
             session_id=session_id,
             ip_address=ip_address,
             user_agent=user_agent
         )
-        db.session.add(analytics)
-        db.session.commit()
-        return analytics
+        writer = current_app.extensions.get('analytics_event_writer') if has_app_context() else None
+        if writer is not None:
+            writer.enqueue(row)
+        else:
+            LearningAnalytics.write_events([row])
+            db.session.commit()
 
     @staticmethod
     def get_user_analytics(user_id, event_type=None, limit=100):
@@ -291,3 +821,345 @@ class LearningAnalytics(db.Model):
             query = query.filter_by(event_type=event_type)
         return query.order_by(LearningAnalytics.timestamp.desc()).limit(limit).all()
 
+
+class UserDailyActivity(db.Model):
+    """Per-user per-day rollup of learning activity"""
+    __tablename__ = 'user_daily_activity'
+    
+    # Event types that count towards a learning streak
+    LEARNING_EVENT_TYPES = ('module_started', 'module_completed', 'quiz_attempt')
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    activity_date = db.Column(db.Date, nullable=False)
+    event_count = db.Column(db.Integer, default=0, nullable=False)
+    learning_event_count = db.Column(db.Integer, default=0, nullable=False)
+    hourly_counts_json = db.Column(db.Text, nullable=True)  # JSON array of 24 event counts by hour (UTC)
+    minutes_studied = db.Column(db.Float, default=0, nullable=False)  # Fractional, heartbeats add seconds at a time
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'activity_date', name='unique_user_daily_activity'),)
+
+    def __repr__(self):
+        return f'<UserDailyActivity User:{self.user_id} Date:{self.activity_date}>'
+
+    @property
+    def hourly_counts(self):
+        """Get hourly event counts as a list of 24 integers"""
+        return json.loads(self.hourly_counts_json) if self.hourly_counts_json else [0] * 24
+
+    @hourly_counts.setter
+    def hourly_counts(self, value):
+        """Set hourly event counts from a list of 24 integers"""
+        self.hourly_counts_json = json.dumps(value)
+
+    @property
+    def day_of_week(self):
+        """Day of week with Sunday as 0"""
+        return (self.activity_date.weekday() + 1) % 7
+
+    def to_dict(self):
+        """Convert daily activity to dictionary"""
+        return {
+            'user_id': self.user_id,
+            'date': self.activity_date.isoformat() if self.activity_date else None,
+            'event_count': self.event_count,
+            'learning_event_count': self.learning_event_count,
+            'hourly_counts': self.hourly_counts,
+            'minutes_studied': self.minutes_studied
+        }
+
+    @staticmethod
+    def apply_events(rows):
+        """Fold learning analytics event rows into the daily rollups"""
+        buckets = {}
+        for row in rows:
+            UserDailyActivity._add_event(buckets, row['user_id'], row['event_type'], row['timestamp'])
+        UserDailyActivity._merge(buckets)
+
+    @staticmethod
+    def _add_event(buckets, user_id, event_type, timestamp):
+        """Count one event into its (user, day) bucket"""
+        bucket = buckets.setdefault(
+            (user_id, timestamp.date()),
+            {'events': 0, 'learning_events': 0, 'hours': [0] * 24, 'minutes': 0}
+        )
+        bucket['events'] += 1
+        if event_type in UserDailyActivity.LEARNING_EVENT_TYPES:
+            bucket['learning_events'] += 1
+        bucket['hours'][timestamp.hour] += 1
+
+    @staticmethod
+    def add_minutes(user_id, minutes, when=None):
+        """Add studied minutes to a user's rollup for the given day (no commit)"""
+        if not minutes or minutes <= 0:
+            return
+        day = (when or datetime.utcnow()).date()
+        UserDailyActivity._merge({
+            (user_id, day): {'events': 0, 'learning_events': 0, 'hours': None, 'minutes': minutes}
+        })
+
+    @staticmethod
+    def _lock(user_ids, dates=None):
+        """
+        Lock users' rollup rows (on the given dates) against other writers until commit
+
+        A no-op UPDATE takes the row locks SELECT ... FOR UPDATE would, and on
+        SQLite, which ignores FOR UPDATE, the database write lock.
+        """
+        query = update(UserDailyActivity).where(UserDailyActivity.user_id.in_(user_ids))
+        if dates is not None:
+            query = query.where(UserDailyActivity.activity_date.in_(dates))
+        db.session.execute(
+            query.values(event_count=UserDailyActivity.event_count).execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _merge(buckets):
+        """Add bucket deltas to existing rollup rows, inserting missing ones"""
+        if not buckets:
+            return
+        
+        user_ids = {key[0] for key in buckets}
+        dates = {key[1] for key in buckets}
+        # Lock before reading, as the hourly counts are read, modified and written back
+        UserDailyActivity._lock(user_ids, dates)
+        existing = {
+            (row.user_id, row.activity_date): row
+            for row in UserDailyActivity.query.filter(
+                UserDailyActivity.user_id.in_(user_ids),
+                UserDailyActivity.activity_date.in_(dates)
+            ).populate_existing().all()
+        }
+        
+        for key, bucket in buckets.items():
+            activity = existing.get(key)
+            if activity is None:
+                activity = UserDailyActivity(
+                    user_id=key[0], activity_date=key[1], event_count=0,
+                    learning_event_count=0, minutes_studied=0
+                )
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(activity)
+                except IntegrityError:
+                    # Another writer created the row first
+                    activity = UserDailyActivity.query.filter_by(
+                        user_id=key[0], activity_date=key[1]
+                    ).with_for_update().one()
+            
+            activity.event_count += bucket['events']
+            activity.learning_event_count += bucket['learning_events']
+            activity.minutes_studied += bucket['minutes']
+            if bucket['hours']:
+                activity.hourly_counts = [a + b for a, b in zip(activity.hourly_counts, bucket['hours'])]
+
+    @staticmethod
+    def get_user_activity(user_id, days):
+        """Get rollup rows for the last N days keyed by date"""
+        start_date = datetime.utcnow().date() - timedelta(days=days - 1)
+        return {
+            row.activity_date: row
+            for row in UserDailyActivity.query.filter(
+                UserDailyActivity.user_id == user_id,
+                UserDailyActivity.activity_date >= start_date
+            ).all()
+        }
+
+    @staticmethod
+    def rebuild(user_id=None, batch_size=500):
+        """
+        Rebuild rollups by replaying learning_analytics and study_sessions rows
+
+        Users are rebuilt batch_size at a time. Each batch locks out writers
+        to its rollups, recomputes them, swaps them in and commits in one
+        transaction, so events logged during a rebuild are counted exactly
+        once and readers never see partial totals.
+        Returns the number of events replayed.
+        """
+        from src.models.user import User  # Import here to avoid circular import
+
+        replayed = 0
+        last_id = 0
+        while True:
+            users_query = db.session.query(User.id).filter(User.id > last_id)
+            if user_id:
+                users_query = users_query.filter(User.id == user_id)
+            user_ids = [row.id for row in users_query.order_by(User.id).limit(batch_size).all()]
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+            replayed += UserDailyActivity._rebuild_users(user_ids)
+            db.session.commit()
+        
+        return replayed
+
+    @staticmethod
+    def _rebuild_users(user_ids):
+        """Replace the rollups of user_ids with ones replayed from the raw rows (no commit)"""
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # Row locks cannot cover rollup rows a writer is about to insert
+            db.session.execute(text(
+                f'LOCK TABLE {UserDailyActivity.__tablename__} IN SHARE ROW EXCLUSIVE MODE'
+            ))
+        else:
+            UserDailyActivity._lock(user_ids)
+        
+        buckets = {}
+        events = db.session.query(
+            LearningAnalytics.user_id,
+            LearningAnalytics.event_type,
+            LearningAnalytics.timestamp
+        ).filter(LearningAnalytics.user_id.in_(user_ids)).yield_per(5000)
+        replayed = 0
+        for event in events:
+            UserDailyActivity._add_event(buckets, event.user_id, event.event_type, event.timestamp)
+            replayed += 1
+        
+        # Study minutes come from the study session ledger
+        minutes_query = db.session.query(
+            StudySession.user_id,
+            StudySession.study_date,
+            db.func.sum(StudySession.minutes).label('total_minutes')
+        ).filter(StudySession.user_id.in_(user_ids))
+        for row in minutes_query.group_by(StudySession.user_id, StudySession.study_date).all():
+            bucket = buckets.setdefault(
+                (row.user_id, row.study_date),
+                {'events': 0, 'learning_events': 0, 'hours': None, 'minutes': 0}
+            )
+            bucket['minutes'] += row.total_minutes or 0
+        
+        db.session.execute(delete(UserDailyActivity).where(UserDailyActivity.user_id.in_(user_ids)))
+        if buckets:
+            now = datetime.utcnow()
+            db.session.execute(insert(UserDailyActivity), [
+                {
+                    'user_id': key[0],
+                    'activity_date': key[1],
+                    'event_count': bucket['events'],
+                    'learning_event_count': bucket['learning_events'],
+                    'hourly_counts_json': json.dumps(bucket['hours']) if bucket['hours'] else None,
+                    'minutes_studied': bucket['minutes'],
+                    'updated_at': now
+                }
+                for key, bucket in buckets.items()
+            ])
+        return replayed
+
+
+class StudySession(db.Model):
+    """Append-only ledger of study time"""
+    __tablename__ = 'study_sessions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=True)
+    module_id = db.Column(db.Integer, db.ForeignKey('modules.id'), nullable=True)
+    video_id = db.Column(db.Integer, db.ForeignKey('videos.id'), nullable=True)
+    started_at = db.Column(db.DateTime, nullable=False)
+    ended_at = db.Column(db.DateTime, nullable=False)
+    minutes = db.Column(db.Float, nullable=False)
+    study_date = db.Column(db.Date, nullable=False)  # UTC date of ended_at, for range scans
+    
+    __table_args__ = (db.Index('ix_study_sessions_user_date', 'user_id', 'study_date'),)
+
+    def __repr__(self):
+        return f'<StudySession User:{self.user_id} Minutes:{self.minutes}>'
+
+    def to_dict(self):
+        """Convert study session to dictionary"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'course_id': self.course_id,
+            'module_id': self.module_id,
+            'video_id': self.video_id,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'ended_at': self.ended_at.isoformat() if self.ended_at else None,
+            'minutes': self.minutes,
+            'study_date': self.study_date.isoformat() if self.study_date else None
+        }
+
+    @staticmethod
+    def record(user_id, minutes, course_id=None, module_id=None, video_id=None, ended_at=None):
+        """Append a study session ending now (or at ended_at) to the ledger (no commit)"""
+        if not minutes or minutes <= 0:
+            return None
+        
+        ended_at = ended_at or datetime.utcnow()
+        study_session = StudySession(
+            user_id=user_id,
+            course_id=course_id,
+            module_id=module_id,
+            video_id=video_id,
+            started_at=ended_at - timedelta(minutes=minutes),
+            ended_at=ended_at,
+            minutes=minutes,
+            study_date=ended_at.date()
+        )
+        db.session.add(study_session)
+        UserDailyActivity.add_minutes(user_id, minutes, when=ended_at)
+        UserAchievementCounter.increment(user_id, minutes_studied=minutes)
+        return study_session
+
+    @staticmethod
+    def get_daily_minutes(user_id, start_date, end_date):
+        """Get total minutes per study date in [start_date, end_date] with one grouped query"""
+        rows = db.session.query(
+            StudySession.study_date,
+            db.func.sum(StudySession.minutes)
+        ).filter(
+            StudySession.user_id == user_id,
+            StudySession.study_date >= start_date,
+            StudySession.study_date <= end_date
+        ).group_by(StudySession.study_date).all()
+        return {study_date: total or 0 for study_date, total in rows}
+
+    @staticmethod
+    def backfill(batch_size=500):
+        """
+        Write ledger rows for module study time recorded before the ledger existed
+
+        Each user_progress row gets one session, ending at its last_accessed,
+        for the minutes its time_spent_minutes has beyond the module sessions
+        already in the ledger, so running it again writes nothing. Daily
+        rollups and achievement counters are not touched; rebuild them
+        afterwards. Returns the number of sessions written.
+        """
+        covered = select(db.func.coalesce(db.func.sum(StudySession.minutes), 0)).where(
+            StudySession.user_id == UserProgress.user_id,
+            StudySession.module_id == UserProgress.module_id,
+            StudySession.video_id.is_(None)
+        ).scalar_subquery()
+        
+        written = 0
+        last_id = 0
+        while True:
+            rows = db.session.query(
+                UserProgress.id,
+                UserProgress.user_id,
+                UserProgress.course_id,
+                UserProgress.module_id,
+                UserProgress.last_accessed,
+                (UserProgress.time_spent_minutes - covered).label('missing')
+            ).filter(UserProgress.id > last_id).order_by(UserProgress.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            
+            sessions = [{
+                'user_id': row.user_id,
+                'course_id': row.course_id,
+                'module_id': row.module_id,
+                'video_id': None,
+                'started_at': row.last_accessed - timedelta(minutes=row.missing),
+                'ended_at': row.last_accessed,
+                'minutes': row.missing,
+                'study_date': row.last_accessed.date()
+            } for row in rows if row.missing and row.missing > 0]
+            if sessions:
+                db.session.execute(insert(StudySession), sessions)
+            db.session.commit()
+            written += len(sessions)
+        
+        return written
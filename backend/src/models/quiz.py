@@ -1,18 +1,27 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import json
+from datetime import timedelta
+from sqlalchemy import event, inspect, select, update, insert, delete, case
+from sqlalchemy.exc import IntegrityError
 from src.models.user import db
+from src.models.achievement import UserAchievementCounter
+from src.models.course import Module
+from src.utils.quiz_cache import compiled_quiz_cache, answer_matches, grade as grade_compiled_quiz
 
 class Quiz(db.Model):
     __tablename__ = 'quizzes'
     
     id = db.Column(db.Integer, primary_key=True)
-    module_id = db.Column(db.Integer, db.ForeignKey('modules.id'), nullable=False)
+    # active_history keeps the previous module on reassignment, for the quiz counters
+    module_id = db.column_property(db.Column(db.Integer, db.ForeignKey('modules.id'), nullable=False),
+                                   active_history=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     time_limit_minutes = db.Column(db.Integer, default=30, nullable=False)
     passing_score = db.Column(db.Integer, default=70, nullable=False)  # Percentage required to pass
     max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    exam_mode = db.Column(db.Boolean, default=False, nullable=False)  # Grade submissions in the background
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -20,12 +29,18 @@ class Quiz(db.Model):
     # Relationships
     questions = db.relationship('Question', backref='quiz', lazy=True, cascade='all, delete-orphan', order_by='Question.order_index')
     attempts = db.relationship('QuizAttempt', backref='quiz', lazy=True, cascade='all, delete-orphan')
+    stats = db.relationship('QuizStats', uselist=False, lazy='joined', cascade='all, delete-orphan')
 
     def __repr__(self):
         return f'<Quiz {self.title}>'
 
-    def to_dict(self, include_questions=False):
+    def to_dict(self, include_questions=False, include_stats=False):
         """Convert quiz to dictionary"""
+        if self.stats:
+            question_count, total_points = self.stats.question_count, self.stats.total_points
+        else:
+            question_count, total_points = len(self.questions), sum(q.points for q in self.questions)
+        
         data = {
             'id': self.id,
             'module_id': self.module_id,
@@ -34,31 +49,32 @@ class Quiz(db.Model):
             'time_limit_minutes': self.time_limit_minutes,
             'passing_score': self.passing_score,
             'max_attempts': self.max_attempts,
+            'exam_mode': self.exam_mode,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'question_count': len(self.questions),
-            'total_points': sum(q.points for q in self.questions)
+            'question_count': question_count,
+            'total_points': total_points
         }
         
+        if include_stats:
+            data['stats'] = {
+                'total_attempts': self.stats.attempt_count if self.stats else len(self.attempts),
+                'average_score': self.get_average_score()
+            }
+        
         if include_questions:
             data['questions'] = [question.to_dict() for question in self.questions]
             
         return data
 
+    def grade(self, answers):
+        """Grade answers in one pass against the cached compiled quiz"""
+        return grade_compiled_quiz(compiled_quiz_cache.get(self), answers)
+
     def calculate_score(self, answers):
         """Calculate quiz score based on answers"""
-        total_points = 0
-        earned_points = 0
-        
-        for question in self.questions:
-            total_points += question.points
-            if str(question.id) in answers:
-                user_answer = answers[str(question.id)]
-                if question.check_answer(user_answer):
-                    earned_points += question.points
-        
-        return (earned_points / total_points * 100) if total_points > 0 else 0
+        return self.grade(answers).score
 
     def get_user_attempts(self, user_id):
         """Get user's attempts for this quiz"""
@@ -66,17 +82,15 @@ class Quiz(db.Model):
 
     def can_attempt(self, user_id):
         """Check if user can attempt this quiz"""
-        attempts = self.get_user_attempts(user_id)
-        return len(attempts) < self.max_attempts
+        return QuizAttemptCounter.get_attempt_count(user_id, self.id) < self.max_attempts
 
     def get_average_score(self):
         """Get average score for this quiz across all attempts"""
-        from src.models.quiz import QuizAttempt  # Import here to avoid circular import
-        attempts = QuizAttempt.query.filter_by(quiz_id=self.id).filter(QuizAttempt.score.isnot(None)).all()
-        if not attempts:
-            return 0
-        total_score = sum(attempt.score for attempt in attempts)
-        return round(total_score / len(attempts), 1)
+        if self.stats:
+            return self.stats.average_score
+        average = db.session.query(db.func.avg(QuizAttempt.score))\
+            .filter(QuizAttempt.quiz_id == self.id, QuizAttempt.score.isnot(None)).scalar()
+        return round(average, 1) if average is not None else 0
 
     @staticmethod
     def get_by_module(module_id):
@@ -98,6 +112,9 @@ class Question(db.Model):
     order_index = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    attempt_answers = db.relationship('QuizAnswer', backref='question', lazy=True, cascade='all, delete-orphan')
 
     def __repr__(self):
         return f'<Question {self.id}>'
@@ -144,20 +161,7 @@ class Question(db.Model):
 
     def check_answer(self, user_answer):
         """Check if user answer is correct"""
-        correct = self.correct_answers
-        
-        if self.question_type == 'mcq' or self.question_type == 'true_false':
-            return user_answer in correct
-        elif self.question_type == 'multiple_select':
-            # For multiple select, user must select all correct answers and no incorrect ones
-            if isinstance(user_answer, list):
-                return set(user_answer) == set(correct)
-            return False
-        elif self.question_type == 'case_study':
-            # Case study questions may have multiple acceptable answers
-            return user_answer in correct
-        
-        return False
+        return answer_matches(self.question_type, frozenset(self.correct_answers), user_answer)
 
     @staticmethod
     def create_mcq(quiz_id, question_text, options, correct_answer, explanation=None, points=1, order_index=1):
@@ -192,6 +196,12 @@ class Question(db.Model):
 
 class QuizAttempt(db.Model):
     __tablename__ = 'quiz_attempts'
+    __table_args__ = (
+        db.Index('ix_quiz_attempts_user_quiz', 'user_id', 'quiz_id'),
+        db.Index('ix_quiz_attempts_quiz_completed', 'quiz_id', 'completed_at', 'id'),
+        db.Index('ix_quiz_attempts_grading_status', 'grading_status'),
+        db.UniqueConstraint('user_id', 'quiz_id', 'submission_key', name='unique_user_quiz_submission_key'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -204,6 +214,11 @@ class QuizAttempt(db.Model):
     completed_at = db.Column(db.DateTime, nullable=True)
     time_taken_minutes = db.Column(db.Integer, nullable=True)
     passed = db.Column(db.Boolean, nullable=True)
+    grading_status = db.Column(db.String(20), nullable=True)  # pending, graded, failed (exam mode only)
+    submission_key = db.Column(db.String(64), nullable=True)  # Client idempotency key
+    
+    # Relationships
+    question_answers = db.relationship('QuizAnswer', backref='attempt', lazy=True, cascade='all, delete-orphan')
 
     def __repr__(self):
         return f'<QuizAttempt User:{self.user_id} Quiz:{self.quiz_id}>'
@@ -231,6 +246,7 @@ class QuizAttempt(db.Model):
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'time_taken_minutes': self.time_taken_minutes,
             'passed': self.passed,
+            'grading_status': self.grading_status,
             'quiz': self.quiz.to_dict() if self.quiz else None
         }
 
@@ -244,29 +260,45 @@ class QuizAttempt(db.Model):
             time_diff = self.completed_at - self.started_at
             self.time_taken_minutes = int(time_diff.total_seconds() / 60)
         
-        # Calculate score
-        self.score = self.quiz.calculate_score(answers)
-        self.passed = self.score >= self.quiz.passing_score
+        # Grade all questions in a single pass
+        result = self.quiz.grade(answers)
+        self.score = result.score
+        self.passed = result.passed
+        self.correct_answers = result.correct_count
+        self.total_questions = result.total_questions
+        if self.grading_status:
+            self.grading_status = 'graded'
+        if self.passed:
+            UserAchievementCounter.increment(self.user_id, quizzes_passed=1)
         
-        # Count correct answers
-        correct_count = 0
-        for question in self.quiz.questions:
-            if str(question.id) in answers:
-                user_answer = answers[str(question.id)]
-                if question.check_answer(user_answer):
-                    correct_count += 1
-        
-        self.correct_answers = correct_count
-        self.total_questions = len(self.quiz.questions)
+        if self.id is None:
+            db.session.flush()
+        QuizAnswer.write_results(self.id, result, answers)
         
         db.session.commit()
         return self
 
+    def get_feedback(self):
+        """Get per-question feedback for a completed attempt"""
+        result = self.quiz.grade(self.answers)
+        explanations = {question.id: question.explanation for question in self.quiz.questions}
+        return {
+            'message': 'Congratulations, you passed!' if self.passed else
+                       f'You need {self.quiz.passing_score}% to pass. Review the explanations and try again.',
+            'questions': [{
+                'question_id': question_result.question_id,
+                'is_correct': question_result.is_correct,
+                'points_earned': question_result.points_earned,
+                'explanation': explanations.get(question_result.question_id)
+            } for question_result in result.question_results]
+        }
+
     @staticmethod
     def start_attempt(user_id, quiz_id):
         """Start a new quiz attempt"""
         quiz = Quiz.query.get(quiz_id)
-        if not quiz or not quiz.can_attempt(user_id):
+        if not quiz or not QuizAttemptCounter.reserve(user_id, quiz_id, quiz.max_attempts):
+            db.session.rollback()
             return None
         
         attempt = QuizAttempt(
@@ -278,6 +310,115 @@ class QuizAttempt(db.Model):
         db.session.commit()
         return attempt
 
+    @staticmethod
+    def create_and_complete(user_id, quiz_id, answers, time_taken_seconds=0):
+        """Reserve an attempt and grade it in one transaction; None if the limit is reached"""
+        quiz = db.session.get(Quiz, quiz_id)
+        if not quiz or not QuizAttemptCounter.reserve(user_id, quiz_id, quiz.max_attempts):
+            db.session.rollback()
+            return None
+        
+        attempt = QuizAttempt(
+            user_id=user_id,
+            quiz=quiz,
+            total_questions=len(quiz.questions),
+            started_at=datetime.utcnow() - timedelta(seconds=max(0, time_taken_seconds or 0))
+        )
+        db.session.add(attempt)
+        return attempt.complete_attempt(answers)
+
+    @staticmethod
+    def accept_submission(user_id, quiz, answers, submission_key=None, time_taken_seconds=0):
+        """
+        Durably store a submission for background grading
+
+        Returns (attempt, created). A repeated submission_key returns the
+        original attempt; (None, False) means the attempt limit was reached.
+        """
+        if submission_key:
+            existing = QuizAttempt.find_submission(user_id, quiz.id, submission_key)
+            if existing:
+                return existing, False
+        
+        if not QuizAttemptCounter.reserve(user_id, quiz.id, quiz.max_attempts):
+            db.session.rollback()
+            # The slot may have gone to a concurrent retry of this very submission
+            existing = submission_key and QuizAttempt.find_submission(user_id, quiz.id, submission_key)
+            return (existing, False) if existing else (None, False)
+        
+        attempt = QuizAttempt(
+            user_id=user_id,
+            quiz_id=quiz.id,
+            total_questions=len(compiled_quiz_cache.get(quiz).questions),
+            started_at=datetime.utcnow() - timedelta(seconds=max(0, time_taken_seconds or 0)),
+            grading_status='pending',
+            submission_key=submission_key
+        )
+        attempt.answers = answers
+        db.session.add(attempt)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent retry with the same key won; its reservation stands
+            db.session.rollback()
+            existing = QuizAttempt.find_submission(user_id, quiz.id, submission_key)
+            if existing is None:
+                raise
+            return existing, False
+        return attempt, True
+
+    @staticmethod
+    def find_submission(user_id, quiz_id, submission_key):
+        """Get the attempt a user already submitted to a quiz under an idempotency key"""
+        return QuizAttempt.query.filter_by(
+            user_id=user_id, quiz_id=quiz_id, submission_key=submission_key
+        ).first()
+
+    @staticmethod
+    def grade_pending(attempt_id):
+        """Claim and grade a pending attempt; None if it is not pending"""
+        claimed = db.session.execute(
+            update(QuizAttempt)
+            .where(QuizAttempt.id == attempt_id, QuizAttempt.grading_status == 'pending')
+            .values(grading_status='graded')
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return None
+        
+        attempt = db.session.get(QuizAttempt, attempt_id)
+        return attempt.complete_attempt(attempt.answers)
+
+    @staticmethod
+    def mark_grading_failed(attempt_id):
+        """Mark a pending attempt as failed and give its attempt slot back"""
+        attempt = db.session.get(QuizAttempt, attempt_id)
+        if not attempt or attempt.grading_status != 'pending':
+            return
+        
+        attempt.grading_status = 'failed'
+        db.session.execute(
+            update(QuizAttemptCounter)
+            .where(QuizAttemptCounter.user_id == attempt.user_id, QuizAttemptCounter.quiz_id == attempt.quiz_id)
+            .values(attempt_count=QuizAttemptCounter.attempt_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    @staticmethod
+    def get_pending_attempt_ids(limit=1000):
+        """Get ids of attempts still waiting to be graded, oldest first"""
+        rows = db.session.query(QuizAttempt.id).filter_by(grading_status='pending')\
+            .order_by(QuizAttempt.id).limit(limit).all()
+        return [row.id for row in rows]
+
+    def get_status(self):
+        """Get the grading status exposed to polling clients"""
+        if self.grading_status:
+            return self.grading_status
+        return 'graded' if self.completed_at else 'in_progress'
+
     @staticmethod
     def get_user_attempts(user_id, quiz_id=None):
         """Get user's quiz attempts"""
@@ -286,3 +427,387 @@ class QuizAttempt(db.Model):
             query = query.filter_by(quiz_id=quiz_id)
         return query.order_by(QuizAttempt.started_at.desc()).all()
 
+
+class QuizAnswer(db.Model):
+    """One graded answer per (attempt, question) for SQL-side per-question reporting"""
+    __tablename__ = 'quiz_answers'
+    __table_args__ = (db.Index('ix_quiz_answers_question', 'question_id', 'is_correct'),)
+
+    attempt_id = db.Column(db.Integer, db.ForeignKey('quiz_attempts.id'), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), primary_key=True)
+    selected_mask = db.Column(db.BigInteger, nullable=True)  # Bit i set when option i was chosen
+    answered = db.Column(db.Boolean, default=False, nullable=False)
+    is_correct = db.Column(db.Boolean, default=False, nullable=False)
+    points_earned = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<QuizAnswer Attempt:{self.attempt_id} Question:{self.question_id}>'
+
+    @staticmethod
+    def build_rows(attempt_id, grade_result, answers):
+        """Build quiz_answers rows from a grade result"""
+        answers = answers or {}
+        return [{
+            'attempt_id': attempt_id,
+            'question_id': question_result.question_id,
+            'selected_mask': question_result.selected_mask,
+            'answered': str(question_result.question_id) in answers,
+            'is_correct': bool(question_result.is_correct),
+            'points_earned': question_result.points_earned
+        } for question_result in grade_result.question_results]
+
+    @staticmethod
+    def write_results(attempt_id, grade_result, answers):
+        """Bulk insert one row per question of a graded attempt (no commit)"""
+        rows = QuizAnswer.build_rows(attempt_id, grade_result, answers)
+        if rows:
+            db.session.execute(insert(QuizAnswer), rows)
+
+    @staticmethod
+    def get_attempt_results(attempt):
+        """
+        Per-question results for an attempt, keyed by question id
+
+        Answers are returned as submitted, from the attempt's answers_json;
+        selected_mask only feeds statistics, as it cannot hold free text and
+        its option indexes shift when a question's options are edited.
+        """
+        rows = QuizAnswer.query.filter_by(attempt_id=attempt.id).all()
+        if not rows:
+            return None
+        
+        answers = attempt.answers
+        results = {}
+        for row in rows:
+            results[row.question_id] = {
+                'user_answer': answers.get(str(row.question_id)),
+                'answered': row.answered,
+                'is_correct': row.is_correct,
+                'points_earned': row.points_earned
+            }
+        return results
+
+    @staticmethod
+    def get_question_stats(quiz_id):
+        """Per-question answer and pass rates for a quiz from one grouped query"""
+        rows = db.session.query(
+            Question.id,
+            Question.order_index,
+            db.func.count(QuizAnswer.attempt_id),
+            db.func.sum(case((QuizAnswer.answered == True, 1), else_=0)),
+            db.func.sum(case((QuizAnswer.is_correct == True, 1), else_=0)),
+            db.func.avg(QuizAnswer.points_earned)
+        ).outerjoin(QuizAnswer, QuizAnswer.question_id == Question.id)\
+         .filter(Question.quiz_id == quiz_id)\
+         .group_by(Question.id, Question.order_index)\
+         .order_by(Question.order_index).all()
+        
+        return [{
+            'question_id': question_id,
+            'attempts': attempts,
+            'answered': answered or 0,
+            'correct': correct or 0,
+            'pass_rate': round((correct or 0) / attempts * 100, 1) if attempts else 0,
+            'average_points': round(average_points or 0, 2)
+        } for question_id, _, attempts, answered, correct, average_points in rows]
+
+    @staticmethod
+    def backfill(batch_size=500):
+        """
+        Write quiz_answers rows for completed attempts that have none
+
+        Grades each attempt's answers_json against its quiz's current questions.
+        Returns the number of attempts backfilled.
+        """
+        has_rows = db.session.query(QuizAnswer.attempt_id)\
+            .filter(QuizAnswer.attempt_id == QuizAttempt.id).exists()
+        
+        backfilled = 0
+        last_id = 0
+        while True:
+            attempts = QuizAttempt.query.filter(
+                QuizAttempt.id > last_id,
+                QuizAttempt.completed_at.isnot(None),
+                ~has_rows
+            ).order_by(QuizAttempt.id).limit(batch_size).all()
+            if not attempts:
+                break
+            last_id = attempts[-1].id
+            
+            rows = []
+            for attempt in attempts:
+                answers = attempt.answers
+                rows.extend(QuizAnswer.build_rows(attempt.id, attempt.quiz.grade(answers), answers))
+            if rows:
+                db.session.execute(insert(QuizAnswer), rows)
+            db.session.commit()
+            backfilled += len(attempts)
+        
+        return backfilled
+
+
+class QuizStats(db.Model):
+    """Materialized per-quiz listing statistics"""
+    __tablename__ = 'quiz_stats'
+
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, default=0, nullable=False)
+    completion_count = db.Column(db.Integer, default=0, nullable=False)
+    score_sum = db.Column(db.Float, default=0, nullable=False)
+    pass_count = db.Column(db.Integer, default=0, nullable=False)
+    question_count = db.Column(db.Integer, default=0, nullable=False)
+    total_points = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<QuizStats Quiz:{self.quiz_id}>'
+
+    @property
+    def average_score(self):
+        """Average score of completed attempts"""
+        return round(self.score_sum / self.completion_count, 1) if self.completion_count else 0
+
+    @property
+    def pass_rate(self):
+        """Percentage of completed attempts that passed"""
+        return round(self.pass_count / self.completion_count * 100, 1) if self.completion_count else 0
+
+    def to_dict(self):
+        """Convert quiz stats to dictionary"""
+        return {
+            'quiz_id': self.quiz_id,
+            'attempt_count': self.attempt_count,
+            'completion_count': self.completion_count,
+            'average_score': self.average_score,
+            'pass_rate': self.pass_rate,
+            'question_count': self.question_count,
+            'total_points': self.total_points
+        }
+
+    @staticmethod
+    def rebuild(quiz_id=None):
+        """
+        Recompute stats rows from quiz_attempts and questions
+
+        Returns the number of quizzes rebuilt.
+        """
+        quizzes = db.session.query(Quiz.id)
+        attempts = db.session.query(
+            QuizAttempt.quiz_id,
+            db.func.count(QuizAttempt.id),
+            db.func.count(QuizAttempt.score),
+            db.func.sum(QuizAttempt.score),
+            db.func.sum(case((QuizAttempt.passed == True, 1), else_=0))
+        )
+        questions = db.session.query(
+            Question.quiz_id,
+            db.func.count(Question.id),
+            db.func.sum(Question.points)
+        )
+        if quiz_id:
+            quizzes = quizzes.filter(Quiz.id == quiz_id)
+            attempts = attempts.filter(QuizAttempt.quiz_id == quiz_id)
+            questions = questions.filter(Question.quiz_id == quiz_id)
+        
+        rows = {row.id: {
+            'quiz_id': row.id, 'attempt_count': 0, 'completion_count': 0, 'score_sum': 0,
+            'pass_count': 0, 'question_count': 0, 'total_points': 0
+        } for row in quizzes.all()}
+        for qid, attempt_count, completion_count, score_sum, pass_count in attempts.group_by(QuizAttempt.quiz_id):
+            if qid in rows:
+                rows[qid].update(attempt_count=attempt_count, completion_count=completion_count,
+                                 score_sum=score_sum or 0, pass_count=pass_count or 0)
+        for qid, question_count, total_points in questions.group_by(Question.quiz_id):
+            if qid in rows:
+                rows[qid].update(question_count=question_count, total_points=total_points or 0)
+        
+        if not rows:
+            return 0
+        db.session.execute(delete(QuizStats).where(QuizStats.quiz_id.in_(list(rows))))
+        db.session.execute(insert(QuizStats), list(rows.values()))
+        db.session.commit()
+        return len(rows)
+
+
+class QuizAttemptCounter(db.Model):
+    """Per-(user, quiz) attempt counter used to enforce max_attempts without races"""
+    __tablename__ = 'quiz_attempt_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<QuizAttemptCounter User:{self.user_id} Quiz:{self.quiz_id}>'
+
+    @staticmethod
+    def get_attempt_count(user_id, quiz_id):
+        """Get attempts used from the counter row, falling back to an indexed count"""
+        count = db.session.query(QuizAttemptCounter.attempt_count).filter_by(
+            user_id=user_id, quiz_id=quiz_id
+        ).scalar()
+        if count is None:
+            count = QuizAttempt.query.filter_by(user_id=user_id, quiz_id=quiz_id).count()
+        return count
+
+    @staticmethod
+    def reserve(user_id, quiz_id, max_attempts):
+        """
+        Claim one attempt slot (no commit)
+
+        A conditional UPDATE only succeeds while attempt_count < max_attempts, so
+        concurrent submitters can never exceed the limit. The counter row is
+        seeded from existing attempts the first time a user attempts a quiz.
+        """
+        result = db.session.execute(
+            update(QuizAttemptCounter)
+            .where(
+                QuizAttemptCounter.user_id == user_id,
+                QuizAttemptCounter.quiz_id == quiz_id,
+                QuizAttemptCounter.attempt_count < max_attempts
+            )
+            .values(attempt_count=QuizAttemptCounter.attempt_count + 1, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return True
+        
+        exists = db.session.query(QuizAttemptCounter.user_id).filter_by(
+            user_id=user_id, quiz_id=quiz_id
+        ).first() is not None
+        if exists:
+            return False
+        
+        existing_attempts = QuizAttempt.query.filter_by(user_id=user_id, quiz_id=quiz_id).count()
+        allowed = existing_attempts < max_attempts
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(QuizAttemptCounter).values(
+                    user_id=user_id,
+                    quiz_id=quiz_id,
+                    attempt_count=existing_attempts + 1 if allowed else existing_attempts
+                ))
+        except IntegrityError:
+            # Another submitter seeded the row first
+            return QuizAttemptCounter.reserve(user_id, quiz_id, max_attempts)
+        return allowed
+
+
+@event.listens_for(Quiz, 'after_update')
+@event.listens_for(Quiz, 'after_delete')
+def _invalidate_compiled_quiz(mapper, connection, target):
+    """Drop the compiled form of a quiz when it changes"""
+    compiled_quiz_cache.invalidate(target.id)
+
+
+@event.listens_for(Quiz, 'after_insert')
+def _create_quiz_stats(mapper, connection, target):
+    """Start every new quiz with an empty stats row"""
+    connection.execute(insert(QuizStats.__table__).values(
+        quiz_id=target.id, attempt_count=0, completion_count=0, score_sum=0,
+        pass_count=0, question_count=0, total_points=0, updated_at=datetime.utcnow()
+    ))
+
+
+def _adjust_module_quiz_count(connection, module_id, delta):
+    table = Module.__table__
+    connection.execute(
+        update(table).where(table.c.id == module_id).values(quiz_count=table.c.quiz_count + delta)
+    )
+
+
+@event.listens_for(Quiz, 'after_insert')
+def _count_module_quiz(mapper, connection, target):
+    _adjust_module_quiz_count(connection, target.module_id, 1)
+
+
+@event.listens_for(Quiz, 'after_delete')
+def _uncount_module_quiz(mapper, connection, target):
+    _adjust_module_quiz_count(connection, target.module_id, -1)
+
+
+@event.listens_for(Quiz, 'after_update')
+def _move_module_quiz(mapper, connection, target):
+    """Move the count when a quiz is reassigned to another module"""
+    history = inspect(target).attrs.module_id.history
+    if not history.added:
+        return
+    for module_id in history.deleted or ():
+        _adjust_module_quiz_count(connection, module_id, -1)
+    _adjust_module_quiz_count(connection, target.module_id, 1)
+
+
+def _completion_values(table, target, sign=1):
+    """Relative stats updates for adding (or removing) one completed attempt"""
+    return {
+        'completion_count': table.c.completion_count + sign,
+        'score_sum': table.c.score_sum + sign * target.score,
+        'pass_count': table.c.pass_count + (sign if target.passed else 0)
+    }
+
+
+@event.listens_for(QuizAttempt, 'after_insert')
+def _count_quiz_attempt(mapper, connection, target):
+    """Count a new attempt (and its completion, if it was stored already completed)"""
+    table = QuizStats.__table__
+    values = {'attempt_count': table.c.attempt_count + 1}
+    if target.completed_at is not None and target.score is not None:
+        values.update(_completion_values(table, target))
+    connection.execute(update(table).where(table.c.quiz_id == target.quiz_id).values(values))
+
+
+@event.listens_for(QuizAttempt, 'after_update')
+def _count_quiz_completion(mapper, connection, target):
+    """Count an attempt the first time it is completed"""
+    history = inspect(target).attrs.completed_at.history
+    was_completed = any(value is not None for value in history.deleted or ())
+    if not history.added or was_completed or target.completed_at is None or target.score is None:
+        return
+    
+    table = QuizStats.__table__
+    connection.execute(
+        update(table).where(table.c.quiz_id == target.quiz_id).values(_completion_values(table, target))
+    )
+
+
+@event.listens_for(QuizAttempt, 'after_delete')
+def _uncount_quiz_attempt(mapper, connection, target):
+    """Remove a deleted attempt from its quiz's stats"""
+    table = QuizStats.__table__
+    values = {'attempt_count': table.c.attempt_count - 1}
+    if target.completed_at is not None and target.score is not None:
+        values.update(_completion_values(table, target, sign=-1))
+    connection.execute(update(table).where(table.c.quiz_id == target.quiz_id).values(values))
+
+
+@event.listens_for(Question, 'after_insert')
+@event.listens_for(Question, 'after_update')
+@event.listens_for(Question, 'after_delete')
+def _touch_quiz_on_question_change(mapper, connection, target):
+    """Bump the parent quiz version so every process recompiles it"""
+    quiz_ids = {target.quiz_id}
+    quiz_ids.update(inspect(target).attrs.quiz_id.history.deleted or ())
+    quiz_ids.discard(None)
+    if not quiz_ids:
+        return
+    
+    connection.execute(
+        update(Quiz.__table__).where(Quiz.__table__.c.id.in_(quiz_ids)).values(updated_at=datetime.utcnow())
+    )
+    
+    # Recount questions and points for the affected quizzes
+    questions = Question.__table__
+    for quiz_id in quiz_ids:
+        connection.execute(
+            update(QuizStats.__table__)
+            .where(QuizStats.__table__.c.quiz_id == quiz_id)
+            .values(
+                question_count=select(db.func.count(questions.c.id))
+                    .where(questions.c.quiz_id == quiz_id).scalar_subquery(),
+                total_points=select(db.func.coalesce(db.func.sum(questions.c.points), 0))
+                    .where(questions.c.quiz_id == quiz_id).scalar_subquery()
+            )
+        )
+    for quiz_id in quiz_ids:
+        compiled_quiz_cache.invalidate(quiz_id)
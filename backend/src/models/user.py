@@ -14,6 +14,7 @@ class User(db.Model):
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     organization = db.Column(db.String(100), nullable=True)
+    department = db.Column(db.String(100), nullable=True)
     role = db.Column(db.String(20), nullable=False, default='student')  # student, admin, enterprise_admin
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -25,6 +26,9 @@ class User(db.Model):
     quiz_attempts = db.relationship('QuizAttempt', backref='user', lazy=True, cascade='all, delete-orphan')
     certificates = db.relationship('Certificate', backref='user', lazy=True, cascade='all, delete-orphan')
     enrollments = db.relationship('CourseEnrollment', backref='user', lazy=True, cascade='all, delete-orphan')
+    
+    # Bulk enrollment selects users by organization and department
+    __table_args__ = (db.Index('ix_users_organization_department', 'organization', 'department'),)
 
     def __repr__(self):
         return f'<User {self.email}>'
@@ -50,6 +54,7 @@ class User(db.Model):
             'last_name': self.last_name,
             'full_name': self.get_full_name(),
             'organization': self.organization,
+            'department': self.department,
             'role': self.role,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
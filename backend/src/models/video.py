@@ -4,9 +4,15 @@ Handles video content, YouTube integration, and progress tracking
 """
 
 from datetime import datetime
+from sqlalchemy import select, insert, update, bindparam, func, or_, tuple_
+from sqlalchemy.exc import IntegrityError
 from .user import db
+from ..utils.watch_bitmap import segment_mask, segments_mask, merge as merge_bitmap, watched_percentage
 import json
 
+# Share of the video that must actually have been watched to complete it
+COMPLETION_PERCENTAGE = 90.0
+
 class Video(db.Model):
     """Video content model for course modules"""
     __tablename__ = 'videos'
@@ -123,7 +129,9 @@ class VideoProgress(db.Model):
     # Progress tracking
     watch_time_seconds = db.Column(db.Integer, default=0)  # Total time watched
     current_position_seconds = db.Column(db.Integer, default=0)  # Current playback position
-    completion_percentage = db.Column(db.Float, default=0.0)  # Percentage completed (0-100)
+    completion_percentage = db.Column(db.Float, default=0.0)  # Percentage of seconds watched (0-100)
+    watched_bitmap = db.Column(db.LargeBinary, nullable=True)  # Bit i set once second i was watched
+    watched_seconds = db.Column(db.Integer, default=0, nullable=False)  # Popcount of watched_bitmap
     
     # Status tracking
     is_completed = db.Column(db.Boolean, default=False)
@@ -182,21 +190,173 @@ class VideoProgress(db.Model):
         else:
             return f"{minutes}:{seconds:02d}"
     
-    def update_progress(self, current_position, watch_time_increment=0):
+    def update_progress(self, current_position, watch_time_increment=0, segments=None):
         """Update video progress"""
+        duration = self.video.duration_seconds if self.video else 0
+        if not duration:
+            watched = 0  # Coverage needs a known duration to be bounded
+        elif segments is not None:
+            watched = segments_mask(segments, duration)
+        else:
+            watched = segment_mask(current_position - watch_time_increment, current_position, duration)
         self.current_position_seconds = current_position
-        self.watch_time_seconds += watch_time_increment
+        self.watch_time_seconds = (self.watch_time_seconds or 0) + watch_time_increment
         self.last_watched_at = datetime.utcnow()
         
-        # Calculate completion percentage
-        if self.video and self.video.duration_seconds > 0:
-            self.completion_percentage = min(100.0, (self.current_position_seconds / self.video.duration_seconds) * 100)
+        # Completion counts distinct seconds watched, so seeking to the end does not complete a video
+        self.watched_bitmap, self.watched_seconds = merge_bitmap(self.watched_bitmap, watched)
+        if duration > 0:
+            self.completion_percentage = watched_percentage(self.watched_seconds, duration)
             
-            # Mark as completed if watched 90% or more
-            if self.completion_percentage >= 90.0 and not self.is_completed:
+            if self.completion_percentage >= COMPLETION_PERCENTAGE and not self.is_completed:
                 self.is_completed = True
                 self.completed_at = datetime.utcnow()
     
+    @staticmethod
+    def apply_heartbeats(entries, chunk_size=500):
+        """
+        Upsert merged heartbeats (PendingProgress entries) without committing
+
+        Per chunk: one SELECT finds the existing rows, missing ones are bulk
+        inserted and existing ones get one executemany UPDATE with relative
+        increments, so concurrent writers for the same viewer add up instead
+        of overwriting each other. Watched-second bitmaps are ORed in Python
+        with the stored ones and written back whole, under locks on the rows
+        read, so coverage cannot regress. Watched time goes to the study
+        session ledger as one session per entry.
+        """
+        from .progress import StudySession  # Import here to avoid circular import
+
+        for start in range(0, len(entries), chunk_size):
+            chunk = entries[start:start + chunk_size]
+            now = datetime.utcnow()
+            existing = VideoProgress._existing_rows(chunk)
+            new = [entry for entry in chunk if (entry.user_id, entry.video_id) not in existing]
+            if new:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(insert(VideoProgress.__table__),
+                                           [VideoProgress._insert_row(entry, now) for entry in new])
+                except IntegrityError:
+                    # Rows created meanwhile (e.g. by another worker) are updated instead
+                    existing = VideoProgress._existing_rows(chunk)
+                    new = [entry for entry in chunk if (entry.user_id, entry.video_id) not in existing]
+                    if new:
+                        db.session.execute(insert(VideoProgress.__table__),
+                                           [VideoProgress._insert_row(entry, now) for entry in new])
+            
+            updates = [entry for entry in chunk if (entry.user_id, entry.video_id) in existing]
+            if updates:
+                db.session.execute(VideoProgress._heartbeat_update(), [
+                    VideoProgress._update_params(entry, *existing[(entry.user_id, entry.video_id)], now)
+                    for entry in updates
+                ])
+            
+            for entry in chunk:
+                StudySession.record(
+                    entry.user_id,
+                    entry.watch_time / 60,
+                    course_id=entry.course_id,
+                    module_id=entry.module_id,
+                    video_id=entry.video_id,
+                    ended_at=entry.last_watched_at
+                )
+
+    @staticmethod
+    def _existing_rows(entries):
+        """
+        Map (user_id, video_id) to (row id, watched bitmap) for the entries that have a row
+
+        The rows stay locked until commit, as their bitmaps are written back
+        whole. FOR UPDATE locks them where rows can be locked; the no-op
+        UPDATE first takes the database write lock on SQLite, which ignores
+        FOR UPDATE.
+        """
+        table = VideoProgress.__table__
+        keys = tuple_(table.c.user_id, table.c.video_id).in_([(e.user_id, e.video_id) for e in entries])
+        db.session.execute(update(table).where(keys).values(watched_seconds=table.c.watched_seconds))
+        rows = db.session.execute(
+            select(table.c.user_id, table.c.video_id, table.c.id, table.c.watched_bitmap)
+            .where(keys).with_for_update()
+        )
+        return {(user_id, video_id): (row_id, bitmap) for user_id, video_id, row_id, bitmap in rows}
+
+    @staticmethod
+    def _watch_state(entry, bitmap):
+        """Merged bitmap, watched seconds, completion percentage and completion flag"""
+        bitmap, watched_seconds = merge_bitmap(bitmap, entry.watched)
+        percentage = watched_percentage(watched_seconds, entry.duration_seconds)
+        return bitmap, watched_seconds, percentage, percentage is not None and percentage >= COMPLETION_PERCENTAGE
+
+    @staticmethod
+    def _insert_row(entry, now):
+        bitmap, watched_seconds, percentage, completed = VideoProgress._watch_state(entry, None)
+        return {
+            'user_id': entry.user_id,
+            'video_id': entry.video_id,
+            'watch_time_seconds': entry.watch_time,
+            'current_position_seconds': entry.position or 0,
+            'completion_percentage': percentage or 0.0,
+            'watched_bitmap': bitmap,
+            'watched_seconds': watched_seconds,
+            'is_completed': completed,
+            'is_bookmarked': False,
+            'last_watched_at': entry.last_watched_at,
+            'play_count': entry.play_count,
+            'pause_count': entry.pause_count,
+            'seek_count': entry.seek_count,
+            'playback_quality': entry.playback_quality,
+            'average_engagement': entry.average_engagement or 0.0,
+            'started_at': now,
+            'completed_at': entry.last_watched_at if completed else None,
+            'updated_at': now
+        }
+
+    @staticmethod
+    def _update_params(entry, row_id, bitmap, now):
+        bitmap, watched_seconds, percentage, completed = VideoProgress._watch_state(entry, bitmap)
+        return {
+            'b_id': row_id,
+            'b_position': entry.position,
+            'b_completion': percentage,
+            'b_bitmap': bitmap,
+            'b_watched_seconds': watched_seconds,
+            'b_watch_time': entry.watch_time,
+            'b_play': entry.play_count,
+            'b_pause': entry.pause_count,
+            'b_seek': entry.seek_count,
+            'b_quality': entry.playback_quality,
+            'b_engagement': entry.average_engagement,
+            'b_completed': completed,
+            'b_completed_at': entry.last_watched_at if completed else None,
+            'b_last_watched_at': entry.last_watched_at,
+            'b_now': now
+        }
+
+    @staticmethod
+    def _heartbeat_update():
+        """UPDATE applying one merged heartbeat; values left as None keep the stored ones"""
+        table = VideoProgress.__table__
+        return update(table).where(table.c.id == bindparam('b_id')).values(
+            current_position_seconds=func.coalesce(bindparam('b_position', type_=db.Integer),
+                                                   table.c.current_position_seconds),
+            completion_percentage=func.coalesce(bindparam('b_completion', type_=db.Float),
+                                                table.c.completion_percentage),
+            watched_bitmap=bindparam('b_bitmap', type_=db.LargeBinary),
+            watched_seconds=bindparam('b_watched_seconds'),
+            watch_time_seconds=func.coalesce(table.c.watch_time_seconds, 0) + bindparam('b_watch_time'),
+            play_count=func.coalesce(table.c.play_count, 0) + bindparam('b_play'),
+            pause_count=func.coalesce(table.c.pause_count, 0) + bindparam('b_pause'),
+            seek_count=func.coalesce(table.c.seek_count, 0) + bindparam('b_seek'),
+            playback_quality=func.coalesce(bindparam('b_quality', type_=db.String), table.c.playback_quality),
+            average_engagement=func.coalesce(bindparam('b_engagement', type_=db.Float),
+                                             table.c.average_engagement),
+            is_completed=or_(func.coalesce(table.c.is_completed, False), bindparam('b_completed', type_=db.Boolean)),
+            completed_at=func.coalesce(table.c.completed_at, bindparam('b_completed_at', type_=db.DateTime)),
+            last_watched_at=bindparam('b_last_watched_at'),
+            updated_at=bindparam('b_now')
+        )
+
     def to_dict(self):
         """Convert progress to dictionary"""
         return {
@@ -206,6 +366,7 @@ class VideoProgress(db.Model):
             'watch_time_seconds': self.watch_time_seconds,
             'current_position_seconds': self.current_position_seconds,
             'completion_percentage': self.completion_percentage,
+            'watched_seconds': self.watched_seconds,
             'progress_percentage': self.progress_percentage,
             'is_completed': self.is_completed,
             'is_bookmarked': self.is_bookmarked,
@@ -1,15 +1,19 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from sqlalchemy import func, desc, and_
 
 from src.models.user import User, db
 from src.models.course import Course, CourseEnrollment
 from src.models.quiz import Quiz, QuizAttempt
-from src.models.progress import UserProgress, Certificate, LearningAnalytics
+from src.models.progress import UserProgress, LearningAnalytics, UserDailyActivity, StudySession
+from src.models.achievement import UserAchievementCounter
 
 analytics_bp = Blueprint('analytics', __name__)
 
+# Longest window served by the daily study time series
+MAX_STUDY_TIME_DAYS = 365
+
 @analytics_bp.route('/summary', methods=['GET'])
 @jwt_required()
 def get_analytics_summary():
@@ -133,6 +137,100 @@ def log_analytics_event():
         current_app.logger.error(f"Log analytics event error: {str(e)}")
         return jsonify({'error': 'Failed to log event'}), 500
 
+@analytics_bp.route('/log-events', methods=['POST'])
+@jwt_required()
+def log_analytics_events():
+    """Log a batch of analytics events in one transaction"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True) or {}
+        events = data.get('events')
+        
+        if not isinstance(events, list) or not events:
+            return jsonify({'error': 'A non-empty events array is required'}), 400
+        
+        max_events = current_app.config.get('ANALYTICS_BATCH_MAX_EVENTS', 1000)
+        if len(events) > max_events:
+            return jsonify({'error': f'At most {max_events} events per batch'}), 413
+        
+        chunk_size = current_app.config.get('ANALYTICS_BATCH_CHUNK_SIZE', 200)
+        received_at = datetime.utcnow()
+        ip_address = request.remote_addr
+        user_agent = request.headers.get('User-Agent')
+        
+        results = []
+        accepted = 0
+        chunk = []
+        for index, event in enumerate(events):
+            row, error = build_batch_event_row(
+                event, current_user_id, received_at, ip_address, user_agent
+            )
+            if error:
+                results.append({'index': index, 'status': 'rejected', 'error': error})
+                continue
+            
+            chunk.append(row)
+            results.append({'index': index, 'status': 'accepted'})
+            accepted += 1
+            if len(chunk) >= chunk_size:
+                LearningAnalytics.write_events(chunk)
+                chunk = []
+        
+        LearningAnalytics.write_events(chunk)
+        db.session.commit()
+        
+        return jsonify({
+            'accepted': accepted,
+            'rejected': len(events) - accepted,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Log analytics events error: {str(e)}")
+        return jsonify({'error': 'Failed to log events'}), 500
+
+def build_batch_event_row(event, user_id, received_at, ip_address, user_agent):
+    """Validate one batch item and build its event row, returning (row, error)"""
+    if not isinstance(event, dict):
+        return None, 'Event must be an object'
+    
+    event_type = event.get('event_type')
+    if not isinstance(event_type, str) or not event_type.strip():
+        return None, 'Event type is required'
+    if len(event_type) > 50:
+        return None, 'Event type must be at most 50 characters'
+    
+    event_data = event.get('event_data')
+    if event_data is not None and not isinstance(event_data, dict):
+        return None, 'Event data must be an object'
+    
+    session_id = event.get('session_id')
+    if session_id is not None and (not isinstance(session_id, str) or len(session_id) > 100):
+        return None, 'Session ID must be a string of at most 100 characters'
+    
+    timestamp = received_at
+    client_timestamp = event.get('timestamp')
+    if client_timestamp is not None:
+        try:
+            timestamp = datetime.fromisoformat(str(client_timestamp).replace('Z', '+00:00'))
+        except ValueError:
+            return None, 'Timestamp must be ISO 8601'
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        if timestamp > received_at + timedelta(minutes=5):
+            return None, 'Timestamp is in the future'
+    
+    return LearningAnalytics.build_event_row(
+        user_id=user_id,
+        event_type=event_type.strip(),
+        event_data=event_data,
+        session_id=session_id,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        timestamp=timestamp
+    ), None
+
 def get_activity_description(activity):
     """Generate human-readable description for activity"""
     event_type = activity.event_type
@@ -158,15 +256,14 @@ def get_activity_description(activity):
 def calculate_learning_streak(user_id):
     """Calculate current and longest learning streak"""
     try:
-        # Get all learning days (days with any learning activity)
-        learning_days = db.session.query(
-            func.date(LearningAnalytics.timestamp).label('learning_date')
-        ).filter(
-            LearningAnalytics.user_id == user_id,
-            LearningAnalytics.event_type.in_([
-                'module_started', 'module_completed', 'quiz_attempt'
-            ])
-        ).distinct().order_by(desc('learning_date')).all()
+        # Active learning days come from the compact daily rollup
+        learning_days = [
+            row.activity_date for row in db.session.query(UserDailyActivity.activity_date)
+            .filter(
+                UserDailyActivity.user_id == user_id,
+                UserDailyActivity.learning_event_count > 0
+            ).order_by(desc(UserDailyActivity.activity_date)).all()
+        ]
         
         if not learning_days:
             return {'current_streak': 0, 'longest_streak': 0}
@@ -176,8 +273,7 @@ def calculate_learning_streak(user_id):
         today = datetime.utcnow().date()
         
         for i, day in enumerate(learning_days):
-            expected_date = today - timedelta(days=i)
-            if day.learning_date == expected_date:
+            if day == today - timedelta(days=i):
                 current_streak += 1
             else:
                 break
@@ -187,10 +283,7 @@ def calculate_learning_streak(user_id):
         current_temp_streak = 1
         
         for i in range(1, len(learning_days)):
-            prev_date = learning_days[i-1].learning_date
-            curr_date = learning_days[i].learning_date
-            
-            if (prev_date - curr_date).days == 1:
+            if (learning_days[i-1] - learning_days[i]).days == 1:
                 current_temp_streak += 1
             else:
                 longest_streak = max(longest_streak, current_temp_streak)
@@ -210,35 +303,21 @@ def calculate_learning_streak(user_id):
 def get_daily_study_time(user_id, days):
     """Get daily study time for the last N days"""
     try:
+        days = max(1, min(days, MAX_STUDY_TIME_DAYS))
         end_date = datetime.utcnow().date()
-        start_date = end_date - timedelta(days=days)
+        start_date = end_date - timedelta(days=days - 1)
         
-        # Get time spent by day
-        daily_time = db.session.query(
-            func.date(UserProgress.last_accessed).label('study_date'),
-            func.sum(UserProgress.time_spent_minutes).label('total_minutes')
-        ).filter(
-            UserProgress.user_id == user_id,
-            func.date(UserProgress.last_accessed) >= start_date
-        ).group_by('study_date').all()
+        minutes_by_date = StudySession.get_daily_minutes(user_id, start_date, end_date)
         
-        # Create a complete list for all days
         daily_data = []
         for i in range(days):
-            date = end_date - timedelta(days=i)
-            minutes = 0
-            
-            for record in daily_time:
-                if record.study_date == date:
-                    minutes = record.total_minutes or 0
-                    break
-            
+            date = start_date + timedelta(days=i)
             daily_data.append({
                 'date': date.isoformat(),
-                'minutes': minutes
+                'minutes': round(minutes_by_date.get(date, 0), 1)
             })
         
-        return list(reversed(daily_data))
+        return daily_data
         
     except Exception as e:
         current_app.logger.error(f"Get daily study time error: {str(e)}")
@@ -284,71 +363,7 @@ def get_performance_metrics(user_id, days):
 def get_achievement_progress(user_id):
     """Get achievement progress for user"""
     try:
-        # Define achievements
-        achievements = [
-            {
-                'id': 'first_course',
-                'title': 'First Steps',
-                'description': 'Complete your first course',
-                'icon': '🎯',
-                'target': 1,
-                'current': 0
-            },
-            {
-                'id': 'quiz_master',
-                'title': 'Quiz Master',
-                'description': 'Pass 10 quizzes',
-                'icon': '🧠',
-                'target': 10,
-                'current': 0
-            },
-            {
-                'id': 'time_keeper',
-                'title': 'Time Keeper',
-                'description': 'Study for 100 hours',
-                'icon': '⏰',
-                'target': 6000,  # 100 hours in minutes
-                'current': 0
-            },
-            {
-                'id': 'certificate_collector',
-                'title': 'Certificate Collector',
-                'description': 'Earn 5 certificates',
-                'icon': '🏆',
-                'target': 5,
-                'current': 0
-            }
-        ]
-        
-        # Calculate current progress
-        completed_courses = CourseEnrollment.query.filter_by(
-            user_id=user_id, status='completed'
-        ).count()
-        
-        passed_quizzes = QuizAttempt.query.filter_by(
-            user_id=user_id, passed=True
-        ).count()
-        
-        total_time = db.session.query(func.sum(UserProgress.time_spent_minutes))\
-            .filter_by(user_id=user_id).scalar() or 0
-        
-        certificates = Certificate.query.filter_by(
-            user_id=user_id, is_valid=True
-        ).count()
-        
-        # Update achievement progress
-        achievements[0]['current'] = completed_courses
-        achievements[1]['current'] = passed_quizzes
-        achievements[2]['current'] = total_time
-        achievements[3]['current'] = certificates
-        
-        # Mark completed achievements
-        for achievement in achievements:
-            achievement['completed'] = achievement['current'] >= achievement['target']
-            achievement['progress_percentage'] = min(100, 
-                (achievement['current'] / achievement['target']) * 100)
-        
-        return achievements
+        return UserAchievementCounter.get_achievements(user_id)
         
     except Exception as e:
         current_app.logger.error(f"Get achievement progress error: {str(e)}")
@@ -357,35 +372,22 @@ def get_achievement_progress(user_id):
 def get_learning_patterns(user_id, days):
     """Analyze learning patterns"""
     try:
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
+        hourly_totals = [0] * 24
+        weekly_totals = [0] * 7
         
-        # Get activity by hour of day
-        hourly_activity = db.session.query(
-            func.extract('hour', LearningAnalytics.timestamp).label('hour'),
-            func.count(LearningAnalytics.id).label('activity_count')
-        ).filter(
-            LearningAnalytics.user_id == user_id,
-            LearningAnalytics.timestamp >= start_date
-        ).group_by('hour').all()
-        
-        # Get activity by day of week
-        weekly_activity = db.session.query(
-            func.extract('dow', LearningAnalytics.timestamp).label('day_of_week'),
-            func.count(LearningAnalytics.id).label('activity_count')
-        ).filter(
-            LearningAnalytics.user_id == user_id,
-            LearningAnalytics.timestamp >= start_date
-        ).group_by('day_of_week').all()
+        for activity in UserDailyActivity.get_user_activity(user_id, days).values():
+            for hour, count in enumerate(activity.hourly_counts):
+                hourly_totals[hour] += count
+            weekly_totals[activity.day_of_week] += activity.event_count
         
         return {
             'hourly_activity': [
-                {'hour': int(row.hour), 'count': row.activity_count}
-                for row in hourly_activity
+                {'hour': hour, 'count': count}
+                for hour, count in enumerate(hourly_totals) if count
             ],
             'weekly_activity': [
-                {'day': int(row.day_of_week), 'count': row.activity_count}
-                for row in weekly_activity
+                {'day': day, 'count': count}
+                for day, count in enumerate(weekly_totals) if count
             ]
         }
         
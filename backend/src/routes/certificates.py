@@ -1,12 +1,13 @@
-from flask import Blueprint, request, jsonify, current_app, send_file
+from flask import Blueprint, request, jsonify, current_app, send_file, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
+import json
 import os
 
 from src.models.user import User, db
 from src.models.course import Course, CourseEnrollment
-from src.models.progress import Certificate, LearningAnalytics
-from src.utils.certificate_generator import create_certificate
+from src.models.progress import Certificate, CertificateIssuance, CertificateRenderJob, LearningAnalytics
+from src.utils.certificate_tokens import InvalidToken, TokensDisabled
 
 certificates_bp = Blueprint('certificates', __name__)
 
@@ -64,26 +65,8 @@ def generate_certificate(course_id):
             final_score=enrollment.final_score or 0
         )
         
-        # Generate PDF certificate
-        try:
-            user = User.query.get(current_user_id)
-            course = Course.query.get(course_id)
-            
-            pdf_path = create_certificate(
-                user=user,
-                course=course,
-                certificate_id=certificate.certificate_id,
-                final_score=certificate.final_score,
-                completion_date=certificate.issued_date
-            )
-            
-            # Store PDF path in certificate record
-            certificate.pdf_path = pdf_path
-            db.session.commit()
-            
-        except Exception as pdf_error:
-            current_app.logger.error(f"PDF generation error: {str(pdf_error)}")
-            # Continue without PDF if generation fails
+        # Render the PDF in the background
+        job = current_app.extensions['certificate_render_queue'].enqueue(certificate)
         
         # Log certificate generation event
         LearningAnalytics.log_event(
@@ -99,15 +82,40 @@ def generate_certificate(course_id):
         )
         
         return jsonify({
-            'message': 'Certificate generated successfully',
-            'certificate': certificate.to_dict()
-        }), 201
+            'message': 'Certificate generated, PDF rendering queued',
+            'certificate': certificate.to_dict(),
+            'job': job.to_dict()
+        }), 202
         
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Generate certificate error: {str(e)}")
         return jsonify({'error': 'Failed to generate certificate'}), 500
 
+@certificates_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_render_job(job_id):
+    """Get the status of a certificate PDF render job"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        job = CertificateRenderJob.query.filter_by(job_id=job_id).first()
+        
+        if not job:
+            return jsonify({'error': 'Render job not found'}), 404
+        
+        if job.certificate.user_id != current_user_id:
+            return jsonify({'error': 'Access denied'}), 403
+        
+        response = job.to_dict()
+        if job.status == 'completed':
+            response['download_url'] = f'/api/certificates/{job.certificate.certificate_id}/download'
+        return jsonify(response), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Get render job error: {str(e)}")
+        return jsonify({'error': 'Failed to get render job'}), 500
+
 @certificates_bp.route('/<certificate_id>', methods=['GET'])
 def get_certificate(certificate_id):
     """Get certificate details (public endpoint)"""
@@ -129,9 +137,9 @@ def get_certificate(certificate_id):
 def verify_certificate(certificate_id):
     """Verify certificate authenticity (public endpoint)"""
     try:
-        certificate = Certificate.verify_certificate(certificate_id)
+        verification = Certificate.get_verification(certificate_id=certificate_id)
         
-        if not certificate:
+        if not verification or not verification.is_current():
             return jsonify({
                 'valid': False,
                 'message': 'Certificate not found, expired, or revoked'
@@ -139,22 +147,69 @@ def verify_certificate(certificate_id):
         
         return jsonify({
             'valid': True,
-            'certificate': {
-                'certificate_id': certificate.certificate_id,
-                'user_name': certificate.user.get_full_name(),
-                'course_title': certificate.course.title,
-                'course_level': certificate.course.get_level_name(),
-                'final_score': certificate.final_score,
-                'issued_at': certificate.issued_at.isoformat(),
-                'expires_at': certificate.expires_at.isoformat() if certificate.expires_at else None,
-                'organization': certificate.user.organization
-            }
+            'certificate': verification.to_dict()
         }), 200
         
     except Exception as e:
         current_app.logger.error(f"Verify certificate error: {str(e)}")
         return jsonify({'error': 'Failed to verify certificate'}), 500
 
+@certificates_bp.route('/verify/token/<token>', methods=['GET'])
+def verify_certificate_token(token):
+    """Verify a signed certificate token without a database lookup (public endpoint)"""
+    try:
+        status, claims = current_app.extensions['certificate_tokens'].verify(token)
+    except InvalidToken:
+        return jsonify({'valid': False, 'status': 'invalid', 'message': 'Invalid certificate token'}), 400
+    except TokensDisabled:
+        return jsonify({'error': 'Certificate token verification is not available'}), 503
+    
+    try:
+        response = {
+            'valid': status == 'valid',
+            'status': status,
+            'certificate': {
+                'certificate_id': claims['cid'],
+                'user_name': claims['name'],
+                'course_title': claims['course'],
+                'final_score': claims['score'],
+                'issued_at': datetime.utcfromtimestamp(claims['iat']).isoformat() if claims.get('iat') else None,
+                'expires_at': datetime.utcfromtimestamp(claims['exp']).isoformat() if claims.get('exp') else None
+            }
+        }
+        if status != 'valid':
+            response['message'] = 'Certificate expired or revoked'
+            return jsonify(response), 404
+        return jsonify(response), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Verify certificate token error: {str(e)}")
+        return jsonify({'error': 'Failed to verify certificate token'}), 500
+
+@certificates_bp.route('/signing-keys', methods=['GET'])
+def get_signing_keys():
+    """Public keys that certificate tokens and the revocation list are signed with (public endpoint)"""
+    try:
+        return jsonify(current_app.extensions['certificate_tokens'].public_keys()), 200
+        
+    except TokensDisabled:
+        return jsonify({'error': 'Certificate signing keys are not available'}), 503
+    except Exception as e:
+        current_app.logger.error(f"Get signing keys error: {str(e)}")
+        return jsonify({'error': 'Failed to get signing keys'}), 500
+
+@certificates_bp.route('/revocations', methods=['GET'])
+def get_revocation_list():
+    """Signed list of revoked certificate IDs for offline verification (public endpoint)"""
+    try:
+        return jsonify(current_app.extensions['certificate_tokens'].export_revocation_list()), 200
+        
+    except TokensDisabled:
+        return jsonify({'error': 'Certificate revocation list is not available'}), 503
+    except Exception as e:
+        current_app.logger.error(f"Get revocation list error: {str(e)}")
+        return jsonify({'error': 'Failed to get revocation list'}), 500
+
 @certificates_bp.route('/verify-code', methods=['POST'])
 def verify_by_code():
     """Verify certificate by verification code (public endpoint)"""
@@ -165,9 +220,9 @@ def verify_by_code():
         if not verification_code:
             return jsonify({'error': 'Verification code is required'}), 400
         
-        certificate = Certificate.verify_by_code(verification_code.upper())
+        verification = Certificate.get_verification(verification_code=verification_code.upper())
         
-        if not certificate:
+        if not verification or not verification.is_current():
             return jsonify({
                 'valid': False,
                 'message': 'Invalid verification code or certificate expired/revoked'
@@ -175,22 +230,69 @@ def verify_by_code():
         
         return jsonify({
             'valid': True,
-            'certificate': {
-                'certificate_id': certificate.certificate_id,
-                'user_name': certificate.user.get_full_name(),
-                'course_title': certificate.course.title,
-                'course_level': certificate.course.get_level_name(),
-                'final_score': certificate.final_score,
-                'issued_at': certificate.issued_at.isoformat(),
-                'expires_at': certificate.expires_at.isoformat() if certificate.expires_at else None,
-                'organization': certificate.user.organization
-            }
+            'certificate': verification.to_dict()
         }), 200
         
     except Exception as e:
         current_app.logger.error(f"Verify by code error: {str(e)}")
         return jsonify({'error': 'Failed to verify certificate'}), 500
 
+@certificates_bp.route('/verify-bulk', methods=['POST'])
+def verify_bulk():
+    """Verify many certificate IDs and/or a few verification codes at once (public endpoint)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        certificate_ids = data.get('certificate_ids') or []
+        verification_codes = data.get('verification_codes') or []
+        
+        if not isinstance(certificate_ids, list) or not isinstance(verification_codes, list) \
+                or not all(isinstance(value, str) for value in certificate_ids + verification_codes):
+            return jsonify({'error': 'certificate_ids and verification_codes must be lists of strings'}), 400
+        
+        total = len(certificate_ids) + len(verification_codes)
+        if not total:
+            return jsonify({'error': 'certificate_ids or verification_codes is required'}), 400
+        
+        max_items = current_app.config.get('CERTIFICATE_BULK_VERIFY_MAX', 5000)
+        if total > max_items:
+            return jsonify({'error': f'At most {max_items} certificates can be verified per request'}), 400
+        
+        # Short codes are guessable in bulk, so only the long certificate IDs get the large batches
+        max_codes = current_app.config.get('CERTIFICATE_BULK_VERIFY_MAX_CODES', 10)
+        if len(verification_codes) > max_codes:
+            return jsonify({
+                'error': f'At most {max_codes} verification codes can be verified per request; use certificate_ids for larger batches'
+            }), 400
+        
+        results = Certificate.verify_many(
+            certificate_ids=certificate_ids,
+            verification_codes=[code.upper() for code in verification_codes],
+            chunk_size=current_app.config.get('CERTIFICATE_BULK_VERIFY_CHUNK_SIZE', 500)
+        )
+        
+        # Large batches (or clients asking for it) get one JSON object per line as they resolve
+        wants_ndjson = request.accept_mimetypes.best == 'application/x-ndjson'
+        if wants_ndjson or total > current_app.config.get('CERTIFICATE_BULK_VERIFY_STREAM_THRESHOLD', 1000):
+            def generate():
+                for entry in results:
+                    yield json.dumps(entry) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        results = list(results)
+        summary = {}
+        for entry in results:
+            summary[entry['status']] = summary.get(entry['status'], 0) + 1
+        
+        return jsonify({
+            'results': results,
+            'total': len(results),
+            'summary': summary
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Bulk verify error: {str(e)}")
+        return jsonify({'error': 'Failed to verify certificates'}), 500
+
 @certificates_bp.route('/course/<int:course_id>/eligible', methods=['GET'])
 @jwt_required()
 def check_certificate_eligibility(course_id):
@@ -312,6 +414,102 @@ def revoke_certificate(certificate_id):
         current_app.logger.error(f"Revoke certificate error: {str(e)}")
         return jsonify({'error': 'Failed to revoke certificate'}), 500
 
+@certificates_bp.route('/admin/courses/<int:course_id>/issue', methods=['POST'])
+@jwt_required()
+def issue_course_certificates(course_id):
+    """Issue certificates to every eligible learner of a course (admin only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = db.session.get(User, current_user_id)
+        
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        if not db.session.get(Course, course_id):
+            return jsonify({'error': 'Course not found'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        user_ids = data.get('user_ids')
+        if user_ids is not None and (not isinstance(user_ids, list)
+                                     or not all(isinstance(uid, int) for uid in user_ids)):
+            return jsonify({'error': 'user_ids must be a list of integers'}), 400
+        
+        issuance = CertificateIssuance.start(course_id, requested_by=current_user_id, user_ids=user_ids)
+        render_queue = current_app.extensions['certificate_render_queue']
+        issuance.issue_certificates(
+            chunk_size=current_app.config.get('CERTIFICATE_ISSUE_CHUNK_SIZE', 1000),
+            max_attempts=render_queue.max_attempts,
+            on_chunk=render_queue.dispatch_jobs
+        )
+        
+        return jsonify({
+            'message': 'Certificates issued, PDF rendering queued',
+            'issuance': issuance.to_dict()
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Issue course certificates error: {str(e)}")
+        return jsonify({'error': 'Failed to issue certificates'}), 500
+
+@certificates_bp.route('/admin/issuances/<issuance_id>', methods=['GET'])
+@jwt_required()
+def get_issuance(issuance_id):
+    """Get progress of a bulk certificate issuance (admin only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = db.session.get(User, current_user_id)
+        
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        issuance = CertificateIssuance.query.filter_by(issuance_id=issuance_id).first()
+        if not issuance:
+            return jsonify({'error': 'Issuance not found'}), 404
+        
+        return jsonify(issuance.to_dict()), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Get issuance error: {str(e)}")
+        return jsonify({'error': 'Failed to get issuance'}), 500
+
+@certificates_bp.route('/admin/issuances/<issuance_id>/resume', methods=['POST'])
+@jwt_required()
+def resume_issuance(issuance_id):
+    """Finish an interrupted bulk issuance and retry its failed renders (admin only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = db.session.get(User, current_user_id)
+        
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        issuance = CertificateIssuance.query.filter_by(issuance_id=issuance_id).first()
+        if not issuance:
+            return jsonify({'error': 'Issuance not found'}), 404
+        
+        render_queue = current_app.extensions['certificate_render_queue']
+        
+        # Retry failed and abandoned renders first, then issue to anyone left out
+        job_ids = issuance.reset_unfinished_jobs(render_queue.stale_after_seconds)
+        db.session.commit()
+        render_queue.dispatch_jobs(job_ids)
+        issuance.issue_certificates(
+            chunk_size=current_app.config.get('CERTIFICATE_ISSUE_CHUNK_SIZE', 1000),
+            max_attempts=render_queue.max_attempts,
+            on_chunk=render_queue.dispatch_jobs
+        )
+        
+        return jsonify({
+            'message': 'Issuance resumed',
+            'issuance': issuance.to_dict()
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Resume issuance error: {str(e)}")
+        return jsonify({'error': 'Failed to resume issuance'}), 500
+
 @certificates_bp.route('/<certificate_id>/download', methods=['GET'])
 @jwt_required()
 def download_certificate_pdf(certificate_id):
@@ -329,36 +527,53 @@ def download_certificate_pdf(certificate_id):
         if certificate.user_id != current_user_id:
             return jsonify({'error': 'Access denied'}), 403
         
-        # Check if PDF exists
-        if not certificate.pdf_path or not os.path.exists(certificate.pdf_path):
-            # Try to regenerate PDF
-            try:
-                user = User.query.get(current_user_id)
-                course = Course.query.get(certificate.course_id)
-                
-                pdf_path = create_certificate(
-                    user=user,
-                    course=course,
-                    certificate_id=certificate.certificate_id,
-                    final_score=certificate.final_score,
-                    completion_date=certificate.issued_date
-                )
-                
-                certificate.pdf_path = pdf_path
-                db.session.commit()
-                
-            except Exception as regen_error:
-                current_app.logger.error(f"PDF regeneration error: {str(regen_error)}")
-                return jsonify({'error': 'Certificate PDF not available'}), 404
-        
-        # Send the PDF file
+        # Report pending rendering (starting it if needed) until the PDF exists
+        render_queue = current_app.extensions['certificate_render_queue']
+        job = render_queue.ensure_rendered(certificate)
+        if job is not None and job.status != 'completed':
+            if job.status == 'failed':
+                return jsonify({'error': 'Certificate PDF not available', 'job': job.to_dict()}), 500
+            return jsonify({
+                'message': 'Certificate PDF is being rendered',
+                'job': job.to_dict()
+            }), 202
+        
+        # The store key is the content hash, so it doubles as a strong ETag
+        store = render_queue.store
+        key = certificate.pdf_sha256
+        path = store.path_for(key)
         filename = f"certificate_{certificate.certificate_id}.pdf"
-        return send_file(
-            certificate.pdf_path,
+        last_modified = datetime.utcfromtimestamp(os.stat(path).st_mtime)
+        
+        accel_prefix = current_app.config.get('CERTIFICATE_X_ACCEL_PREFIX')
+        if accel_prefix:
+            # Let nginx serve the bytes (including Range requests) from its internal location
+            response = current_app.response_class(mimetype='application/pdf')
+            response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{store.relative_path(key)}"
+            response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+            response.set_etag(key)
+            response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response = response.make_conditional(request)
+            if response.status_code == 304:
+                # nginx would otherwise follow the redirect and send the full file
+                del response.headers['X-Accel-Redirect']
+                del response.headers['Content-Disposition']
+            return response
+        
+        # Send the PDF file, answering If-None-Match/If-Modified-Since with 304 and Range with 206
+        response = send_file(
+            path,
             as_attachment=True,
             download_name=filename,
-            mimetype='application/pdf'
+            mimetype='application/pdf',
+            etag=key,
+            last_modified=last_modified,
+            conditional=True
         )
+        response.cache_control.private = True
+        return response
         
     except Exception as e:
         current_app.logger.error(f"Download certificate PDF error: {str(e)}")
@@ -3,8 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 
 from src.models.user import User, db
-from src.models.course import Course, Module, CourseEnrollment
-from src.models.quiz import Quiz, QuizAttempt
+from src.models.course import Course, Module, CourseEnrollment, CourseCatalog
+from src.models.quiz import Quiz
 from src.models.progress import UserProgress, LearningAnalytics
 
 courses_bp = Blueprint('courses', __name__)
@@ -15,15 +15,13 @@ def get_courses():
     try:
         level = request.args.get('level', type=int)
         
-        if level:
-            courses = Course.get_by_level(level)
-        else:
-            courses = Course.get_active_courses()
-        
-        return jsonify({
-            'courses': [course.to_dict() for course in courses],
-            'total': len(courses)
-        }), 200
+        # Served from the precomputed catalog; clients revalidate with If-None-Match
+        etag, body = CourseCatalog.get_payload(level or None)
+        response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
         
     except Exception as e:
         current_app.logger.error(f"Get courses error: {str(e)}")
@@ -60,16 +58,8 @@ def get_course_quizzes(course_id):
             Quiz.is_active == True
         ).all()
         
-        quizzes_data = []
-        for quiz in quizzes:
-            quiz_data = quiz.to_dict()
-            # Add some basic stats
-            quiz_data['question_count'] = len(quiz.questions)
-            quiz_data['stats'] = {
-                'total_attempts': QuizAttempt.query.filter_by(quiz_id=quiz.id).count(),
-                'average_score': quiz.get_average_score()
-            }
-            quizzes_data.append(quiz_data)
+        # Stats come from the eagerly joined quiz_stats row
+        quizzes_data = [quiz.to_dict(include_stats=True) for quiz in quizzes]
         
         return jsonify(quizzes_data), 200
         
@@ -201,16 +191,7 @@ def get_my_courses():
         
         courses_data = []
         for enrollment in enrollments:
-            course_data = enrollment.to_dict()
-            
-            # Add progress summary
-            progress_summary = UserProgress.get_course_progress_summary(
-                current_user_id, 
-                enrollment.course_id
-            )
-            course_data['progress'] = progress_summary
-            
-            courses_data.append(course_data)
+            courses_data.append(enrollment.to_dict())
         
         return jsonify({
             'enrollments': courses_data,
@@ -239,7 +220,7 @@ def get_course_progress(course_id):
         
         # Get detailed progress
         progress_records = UserProgress.get_user_progress(current_user_id, course_id)
-        progress_summary = UserProgress.get_course_progress_summary(current_user_id, course_id)
+        progress_summary = enrollment.get_progress_summary()
         
         return jsonify({
             'enrollment': enrollment.to_dict(),
@@ -332,16 +313,16 @@ def complete_module(module_id):
             module_id
         )
         
-        # Complete module
+        # Update enrollment status
+        if enrollment.status == 'enrolled':
+            enrollment.status = 'in_progress'
+            enrollment.started_at = datetime.utcnow()
+        
+        # Complete module (progress row and enrollment counters in one transaction)
         score = data.get('score')
         time_spent = data.get('time_spent_minutes', 0)
         
-        progress.complete_module(score)
-        progress.update_time_spent(time_spent)
-        
-        # Update enrollment status
-        if enrollment.status == 'enrolled':
-            enrollment.start_course()
+        progress.complete_module(score, additional_minutes=time_spent)
         
         # Log module completion event
         LearningAnalytics.log_event(
@@ -359,8 +340,8 @@ def complete_module(module_id):
         )
         
         # Check if course is completed
-        course_progress = UserProgress.get_course_progress_summary(current_user_id, module.course_id)
-        if course_progress['completion_percentage'] == 100:
+        course_progress = enrollment.get_progress_summary()
+        if enrollment.is_progress_complete() and enrollment.status != 'completed':
             enrollment.complete_course(course_progress['average_score'])
             
             # Log course completion event
@@ -9,8 +9,8 @@ from datetime import datetime, timedelta
 from sqlalchemy import func, and_, or_, desc
 from ..models.user import db, User
 from ..models.admin import AdminUser, Organization, AuditLog
-from ..models.course import CourseEnrollment
-from ..models.progress import UserProgress
+from ..models.course import Course, CourseEnrollment
+from ..models.progress import UserProgress, LearningAnalytics
 import csv
 import io
 import json
@@ -35,6 +35,21 @@ def require_enterprise_admin():
         return decorated_function
     return decorator
 
+def scoped_organization(admin_user, organization):
+    """
+    Organization a bulk operation is limited to
+
+    Super admins may name any organization (or none); organization admins
+    are always limited to their own. Returns False when an organization
+    admin names another organization.
+    """
+    if admin_user.is_super_admin:
+        return organization
+    own_organization = db.session.get(Organization, admin_user.organization_id)
+    if organization and organization != own_organization.name:
+        return False
+    return own_organization.name
+
 # Organization Management
 @enterprise_bp.route('/organizations', methods=['GET'])
 @jwt_required()
@@ -277,6 +292,145 @@ def bulk_import_users(admin_user):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@enterprise_bp.route('/courses/<int:course_id>/bulk-enroll', methods=['POST'])
+@jwt_required()
+@require_enterprise_admin()
+def bulk_enroll_users(admin_user, course_id):
+    """Enroll a list of users, an organization or a department in a course"""
+    try:
+        course = db.session.get(Course, course_id)
+        if not course or not course.is_active:
+            return jsonify({'error': 'Course not found'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        user_ids = data.get('user_ids')
+        organization = data.get('organization')
+        department = data.get('department')
+        
+        if user_ids is not None and (not isinstance(user_ids, list)
+                                     or not all(isinstance(value, int) for value in user_ids)):
+            return jsonify({'error': 'user_ids must be a list of integers'}), 400
+        if not user_ids and not organization and not department:
+            return jsonify({'error': 'user_ids, organization or department is required'}), 400
+        
+        max_users = current_app.config.get('BULK_ENROLL_MAX_USERS', 100000)
+        if user_ids and len(user_ids) > max_users:
+            return jsonify({'error': f'At most {max_users} users can be enrolled per request'}), 400
+        
+        organization = scoped_organization(admin_user, organization)
+        if organization is False:
+            return jsonify({'error': 'Cannot enroll users of another organization'}), 403
+        
+        summary = CourseEnrollment.bulk_enroll(
+            course_id,
+            user_ids=user_ids,
+            organization=organization,
+            department=department,
+            chunk_size=current_app.config.get('BULK_ENROLL_CHUNK_SIZE', 1000)
+        )
+        
+        # One summarized record for the whole operation
+        audit_log = AuditLog(
+            admin_user_id=admin_user.id,
+            organization_id=admin_user.organization_id,
+            action='bulk_enroll',
+            resource_type='course',
+            resource_id=course_id,
+            description=f"Enrolled {summary['enrolled']} users in {course.title}",
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
+        audit_log.audit_metadata = dict(summary, organization=organization, department=department,
+                                        requested_user_ids=len(user_ids) if user_ids else None)
+        db.session.add(audit_log)
+        db.session.commit()
+        
+        LearningAnalytics.log_event(
+            user_id=admin_user.user_id,
+            event_type='course_bulk_enrolled',
+            event_data=dict(summary, organization=organization, department=department),
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
+        
+        return jsonify({
+            'message': f"{summary['enrolled']} users enrolled",
+            'summary': summary
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Bulk enrollment error: {str(e)}")
+        return jsonify({'error': 'Failed to enroll users'}), 500
+
+@enterprise_bp.route('/enrollments/bulk-unenroll', methods=['POST'])
+@jwt_required()
+@require_enterprise_admin()
+def bulk_unenroll_users(admin_user):
+    """Remove users, an organization or a department from one course (or all courses)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        course_id = data.get('course_id')
+        user_ids = data.get('user_ids')
+        organization = data.get('organization')
+        department = data.get('department')
+        dry_run = bool(data.get('dry_run', False))
+        
+        if course_id is not None and not isinstance(course_id, int):
+            return jsonify({'error': 'course_id must be an integer'}), 400
+        if user_ids is not None and (not isinstance(user_ids, list)
+                                     or not all(isinstance(value, int) for value in user_ids)):
+            return jsonify({'error': 'user_ids must be a list of integers'}), 400
+        if not user_ids and not organization and not department:
+            return jsonify({'error': 'user_ids, organization or department is required'}), 400
+        
+        max_users = current_app.config.get('BULK_ENROLL_MAX_USERS', 100000)
+        if user_ids and len(user_ids) > max_users:
+            return jsonify({'error': f'At most {max_users} users can be unenrolled per request'}), 400
+        
+        organization = scoped_organization(admin_user, organization)
+        if organization is False:
+            return jsonify({'error': 'Cannot unenroll users of another organization'}), 403
+        
+        summary = CourseEnrollment.bulk_unenroll(
+            course_id=course_id,
+            user_ids=user_ids,
+            organization=organization,
+            department=department,
+            include_completed=bool(data.get('include_completed', False)),
+            include_quiz_attempts=bool(data.get('include_quiz_attempts', False)),
+            include_video_progress=bool(data.get('include_video_progress', False)),
+            batch_size=current_app.config.get('BULK_UNENROLL_BATCH_SIZE', 1000),
+            dry_run=dry_run
+        )
+        
+        if not dry_run:
+            audit_log = AuditLog(
+                admin_user_id=admin_user.id,
+                organization_id=admin_user.organization_id,
+                action='bulk_unenroll',
+                resource_type='course' if course_id is not None else 'organization',
+                resource_id=course_id if course_id is not None else admin_user.organization_id,
+                description=f"Removed {summary['course_enrollments']} enrollments",
+                ip_address=request.remote_addr,
+                user_agent=request.headers.get('User-Agent')
+            )
+            audit_log.audit_metadata = dict(summary, course_id=course_id, organization=organization,
+                                            department=department,
+                                            requested_user_ids=len(user_ids) if user_ids else None)
+            db.session.add(audit_log)
+            db.session.commit()
+        
+        return jsonify({
+            'message': f"{summary['course_enrollments']} enrollments {'would be removed' if dry_run else 'removed'}",
+            'summary': summary
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Bulk unenrollment error: {str(e)}")
+        return jsonify({'error': 'Failed to unenroll users'}), 500
+
 @enterprise_bp.route('/users/bulk-export', methods=['GET'])
 @jwt_required()
 @require_enterprise_admin()
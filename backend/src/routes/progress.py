@@ -7,6 +7,7 @@ from src.models.user import User, db
 from src.models.course import Course, CourseEnrollment
 from src.models.quiz import Quiz, QuizAttempt
 from src.models.progress import UserProgress, Certificate, LearningAnalytics
+from src.utils.progress_dashboard import build_progress_dashboard
 
 progress_bp = Blueprint('progress', __name__)
 
@@ -17,74 +18,7 @@ def get_progress_dashboard():
     try:
         current_user_id = int(get_jwt_identity())
         
-        # Get overview statistics
-        enrolled_courses = CourseEnrollment.query.filter_by(user_id=current_user_id).count()
-        completed_courses = CourseEnrollment.query.filter_by(
-            user_id=current_user_id, 
-            status='completed'
-        ).count()
-        certificates_earned = Certificate.query.filter_by(
-            user_id=current_user_id, 
-            is_valid=True
-        ).count()
-        
-        # Calculate total time spent
-        total_time = db.session.query(func.sum(UserProgress.time_spent_minutes))\
-            .filter_by(user_id=current_user_id).scalar() or 0
-        
-        # Get course progress details
-        enrollments = CourseEnrollment.query.filter_by(user_id=current_user_id)\
-            .join(Course).all()
-        
-        courses_progress = []
-        for enrollment in enrollments:
-            course = enrollment.course
-            
-            # Get progress for this course
-            progress_records = UserProgress.query.filter_by(
-                user_id=current_user_id,
-                course_id=course.id
-            ).all()
-            
-            total_modules = len(course.modules) if course.modules else 0
-            completed_modules = len([p for p in progress_records if p.status == 'completed'])
-            completion_percentage = (completed_modules / total_modules * 100) if total_modules > 0 else 0
-            
-            course_time = sum(p.time_spent_minutes for p in progress_records)
-            
-            # Calculate average score from quiz attempts
-            quiz_attempts = QuizAttempt.query.join(Quiz)\
-                .filter(Quiz.course_id == course.id, QuizAttempt.user_id == current_user_id)\
-                .all()
-            
-            average_score = None
-            if quiz_attempts:
-                scores = [attempt.score for attempt in quiz_attempts if attempt.score is not None]
-                if scores:
-                    average_score = sum(scores) / len(scores)
-            
-            courses_progress.append({
-                'id': course.id,
-                'title': course.title,
-                'level': course.level,
-                'total_modules': total_modules,
-                'completed_modules': completed_modules,
-                'completion_percentage': completion_percentage,
-                'time_spent_minutes': course_time,
-                'average_score': average_score,
-                'enrollment_status': enrollment.status,
-                'enrolled_at': enrollment.enrolled_at.isoformat() if enrollment.enrolled_at else None
-            })
-        
-        dashboard_data = {
-            'overview': {
-                'enrolled_courses': enrolled_courses,
-                'completed_courses': completed_courses,
-                'certificates_earned': certificates_earned,
-                'total_time_minutes': total_time
-            },
-            'courses': courses_progress
-        }
+        dashboard_data = build_progress_dashboard(current_user_id)
         
         return jsonify(dashboard_data), 200
         
@@ -259,23 +193,16 @@ def complete_module(module_id):
         )
         
         # Check if course is now complete
-        course_progress = UserProgress.get_course_progress_summary(
-            current_user_id, 
-            progress.course_id
-        )
+        enrollment = CourseEnrollment.query.filter_by(
+            user_id=current_user_id,
+            course_id=progress.course_id
+        ).first()
+        course_progress = enrollment.get_progress_summary() if enrollment else None
         
-        if course_progress['completion_percentage'] >= 100:
+        if enrollment and enrollment.is_progress_complete():
             # Update enrollment status
-            enrollment = CourseEnrollment.query.filter_by(
-                user_id=current_user_id,
-                course_id=progress.course_id
-            ).first()
-            
-            if enrollment and enrollment.status != 'completed':
-                enrollment.status = 'completed'
-                enrollment.completed_at = datetime.utcnow()
-                enrollment.final_score = course_progress['average_score']
-                db.session.commit()
+            if enrollment.status != 'completed':
+                enrollment.complete_course(course_progress['average_score'])
                 
                 # Log course completion
                 LearningAnalytics.log_event(
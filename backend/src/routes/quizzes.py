@@ -4,8 +4,9 @@ from datetime import datetime
 
 from src.models.user import User, db
 from src.models.course import CourseEnrollment
-from src.models.quiz import Quiz, Question, QuizAttempt
+from src.models.quiz import Quiz, Question, QuizAttempt, QuizAnswer
 from src.models.progress import LearningAnalytics
+from src.utils.item_analysis import item_analysis_cache
 
 quizzes_bp = Blueprint('quizzes', __name__)
 
@@ -15,16 +16,8 @@ def get_all_quizzes():
     try:
         quizzes = Quiz.query.filter_by(is_active=True).all()
         
-        quizzes_data = []
-        for quiz in quizzes:
-            quiz_data = quiz.to_dict()
-            # Add some basic stats
-            quiz_data['question_count'] = len(quiz.questions)
-            quiz_data['stats'] = {
-                'total_attempts': QuizAttempt.query.filter_by(quiz_id=quiz.id).count(),
-                'average_score': quiz.get_average_score()
-            }
-            quizzes_data.append(quiz_data)
+        # Stats come from the eagerly joined quiz_stats row
+        quizzes_data = [quiz.to_dict(include_stats=True) for quiz in quizzes]
         
         return jsonify(quizzes_data), 200
         
@@ -44,14 +37,17 @@ def submit_quiz_attempt(quiz_id):
         if not quiz or not quiz.is_active:
             return jsonify({'error': 'Quiz not found'}), 404
         
-        # Check if user can attempt
-        if not quiz.can_attempt(current_user_id):
-            return jsonify({'error': 'Maximum attempts reached'}), 400
-        
         answers = data.get('answers', {})
         time_taken = data.get('time_taken', 0)
         
-        # Create and complete attempt in one go
+        if quiz.exam_mode:
+            return accept_exam_submission(current_user_id, quiz, answers, time_taken, data)
+        
+        # Cheap early rejection; the reservation in create_and_complete is authoritative
+        if not quiz.can_attempt(current_user_id):
+            return jsonify({'error': 'Maximum attempts reached'}), 400
+        
+        # Reserve an attempt slot, create and complete the attempt in one go
         attempt = QuizAttempt.create_and_complete(
             user_id=current_user_id,
             quiz_id=quiz_id,
@@ -60,7 +56,7 @@ def submit_quiz_attempt(quiz_id):
         )
         
         if not attempt:
-            return jsonify({'error': 'Failed to submit quiz'}), 500
+            return jsonify({'error': 'Maximum attempts reached'}), 400
         
         # Log quiz completion event
         LearningAnalytics.log_event(
@@ -95,12 +91,107 @@ def submit_quiz_attempt(quiz_id):
         current_app.logger.error(f"Submit quiz attempt error: {str(e)}")
         return jsonify({'error': 'Failed to submit quiz'}), 500
 
+def accept_exam_submission(user_id, quiz, answers, time_taken, data):
+    """Store an exam submission durably, queue it for grading and acknowledge it"""
+    submission_key = request.headers.get('Idempotency-Key') or data.get('submission_key')
+    if submission_key and len(submission_key) > 64:
+        return jsonify({'error': 'Submission key must be at most 64 characters'}), 400
+    
+    # A retry of an accepted submission is answered before the attempt limit, which it already counts against
+    if submission_key:
+        existing = QuizAttempt.find_submission(user_id, quiz.id, submission_key)
+        if existing:
+            return exam_submission_response(existing, created=False)
+    
+    # Cheap early rejection; the reservation in accept_submission is authoritative
+    if not quiz.can_attempt(user_id):
+        return jsonify({'error': 'Maximum attempts reached'}), 400
+    
+    attempt, created = QuizAttempt.accept_submission(
+        user_id=user_id,
+        quiz=quiz,
+        answers=answers,
+        submission_key=submission_key,
+        time_taken_seconds=time_taken
+    )
+    if not attempt:
+        return jsonify({'error': 'Maximum attempts reached'}), 400
+    
+    if created:
+        current_app.extensions['quiz_grading_queue'].submit(attempt.id)
+    
+    return exam_submission_response(attempt, created)
+
+def exam_submission_response(attempt, created):
+    """Acknowledge an accepted exam submission with its polling details"""
+    return jsonify({
+        'message': 'Quiz submission accepted' if created else 'Quiz submission already received',
+        'attempt_id': attempt.id,
+        'status': attempt.get_status(),
+        'status_url': f'/api/quizzes/attempts/{attempt.id}/status'
+    }), 202
+
+@quizzes_bp.route('/attempts/<int:attempt_id>/status', methods=['GET'])
+@jwt_required()
+def get_attempt_status(attempt_id):
+    """Poll the grading status of a submitted attempt"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        attempt = db.session.get(QuizAttempt, attempt_id)
+        if not attempt or attempt.user_id != current_user_id:
+            return jsonify({'error': 'Quiz attempt not found'}), 404
+        
+        status = attempt.get_status()
+        response = {
+            'attempt_id': attempt.id,
+            'status': status
+        }
+        if status == 'graded':
+            response.update({
+                'score': attempt.score,
+                'passed': attempt.passed,
+                'correct_answers': attempt.correct_answers,
+                'total_questions': attempt.total_questions,
+                'feedback': attempt.get_feedback()
+            })
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Get attempt status error: {str(e)}")
+        return jsonify({'error': 'Failed to get attempt status'}), 500
+
+@quizzes_bp.route('/<int:quiz_id>/item-analysis', methods=['GET'])
+@jwt_required()
+def get_item_analysis(quiz_id):
+    """Get difficulty, discrimination and distractor statistics per question (admin only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = db.session.get(User, current_user_id)
+        
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        quiz = db.session.get(Quiz, quiz_id)
+        if not quiz:
+            return jsonify({'error': 'Quiz not found'}), 404
+        
+        analysis = item_analysis_cache.get(quiz)
+        analysis['quiz_id'] = quiz.id
+        
+        return jsonify(analysis), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Get item analysis error: {str(e)}")
+        return jsonify({'error': 'Failed to get item analysis'}), 500
+
 @quizzes_bp.route('/module/<int:module_id>', methods=['GET'])
 @jwt_required()
 def get_module_quizzes(module_id):
     """Get all quizzes for a module"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         quizzes = Quiz.get_by_module(module_id)
         
@@ -161,14 +252,10 @@ def start_quiz(quiz_id):
         if not quiz or not quiz.is_active:
             return jsonify({'error': 'Quiz not found'}), 404
         
-        # Check if user can attempt
-        if not quiz.can_attempt(current_user_id):
-            return jsonify({'error': 'Maximum attempts reached'}), 400
-        
-        # Start new attempt
+        # Start new attempt (reserves a slot atomically)
         attempt = QuizAttempt.start_attempt(current_user_id, quiz_id)
         if not attempt:
-            return jsonify({'error': 'Failed to start quiz attempt'}), 500
+            return jsonify({'error': 'Maximum attempts reached'}), 400
         
         # Log quiz start event
         LearningAnalytics.log_event(
@@ -206,7 +293,7 @@ def start_quiz(quiz_id):
 def submit_quiz(attempt_id):
     """Submit quiz answers"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         data = request.get_json()
         
         attempt = QuizAttempt.query.get(attempt_id)
@@ -252,9 +339,9 @@ def submit_quiz(attempt_id):
 def get_quiz_results(attempt_id):
     """Get detailed quiz results"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
-        attempt = QuizAttempt.query.get(attempt_id)
+        attempt = db.session.get(QuizAttempt, attempt_id)
         if not attempt or attempt.user_id != current_user_id:
             return jsonify({'error': 'Quiz attempt not found'}), 404
         
@@ -269,15 +356,26 @@ def get_quiz_results(attempt_id):
             'questions_results': []
         }
         
-        user_answers = attempt.answers
+        answer_results = QuizAnswer.get_attempt_results(attempt)
+        if answer_results is None:
+            # Attempt not yet backfilled into quiz_answers: grade the stored answers
+            grade_result = quiz.grade(attempt.answers)
+            answer_results = {
+                question_result.question_id: {
+                    'user_answer': question_result.user_answer,
+                    'is_correct': question_result.is_correct,
+                    'points_earned': question_result.points_earned
+                } for question_result in grade_result.question_results
+            }
+        
         for question in quiz.questions:
-            question_result = {
+            answer = answer_results.get(question.id, {})
+            results['questions_results'].append({
                 'question': question.to_dict(include_answers=True),
-                'user_answer': user_answers.get(str(question.id)),
-                'is_correct': question.check_answer(user_answers.get(str(question.id))),
-                'points_earned': question.points if question.check_answer(user_answers.get(str(question.id))) else 0
-            }
-            results['questions_results'].append(question_result)
+                'user_answer': answer.get('user_answer'),
+                'is_correct': answer.get('is_correct', False),
+                'points_earned': answer.get('points_earned', 0)
+            })
         
         return jsonify(results), 200
         
@@ -285,6 +383,30 @@ def get_quiz_results(attempt_id):
         current_app.logger.error(f"Get quiz results error: {str(e)}")
         return jsonify({'error': 'Failed to get quiz results'}), 500
 
+@quizzes_bp.route('/<int:quiz_id>/question-stats', methods=['GET'])
+@jwt_required()
+def get_question_stats(quiz_id):
+    """Get per-question answer and pass rates for a quiz (admin only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = db.session.get(User, current_user_id)
+        
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        quiz = db.session.get(Quiz, quiz_id)
+        if not quiz:
+            return jsonify({'error': 'Quiz not found'}), 404
+        
+        return jsonify({
+            'quiz_id': quiz.id,
+            'questions': QuizAnswer.get_question_stats(quiz.id)
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Get question stats error: {str(e)}")
+        return jsonify({'error': 'Failed to get question statistics'}), 500
+
 @quizzes_bp.route('/my-attempts', methods=['GET'])
 @jwt_required()
 def get_my_attempts():
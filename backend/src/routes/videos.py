@@ -3,7 +3,7 @@ Video API Routes for Qryti Learn
 Handles video content, YouTube integration, and progress tracking
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 import re
@@ -11,6 +11,7 @@ import re
 from ..models.user import db, User
 from ..models.video import Video, VideoProgress, VideoBookmark
 from ..models.course import Course, Module
+from ..utils.watch_bitmap import valid_segments, MAX_SEGMENTS
 
 videos_bp = Blueprint('videos', __name__)
 
@@ -117,11 +118,10 @@ def get_video(video_id):
 
 @videos_bp.route('/videos/<int:video_id>/progress', methods=['POST'])
 @jwt_required()
-def update_video_progress():
+def update_video_progress(video_id):
     """Update video progress for a user"""
     try:
-        user_id = get_jwt_identity()
-        video_id = request.view_args['video_id']
+        user_id = int(get_jwt_identity())
         data = request.get_json()
         
         if not data:
@@ -129,46 +129,33 @@ def update_video_progress():
         
         video = Video.query.get_or_404(video_id)
         
-        # Get or create progress record
-        progress = VideoProgress.query.filter_by(
-            user_id=user_id,
-            video_id=video_id
-        ).first()
-        
-        if not progress:
-            progress = VideoProgress(
-                user_id=user_id,
-                video_id=video_id
-            )
-            db.session.add(progress)
-        
-        # Update progress data
-        current_position = data.get('current_position_seconds', progress.current_position_seconds)
-        watch_time_increment = data.get('watch_time_increment', 0)
-        
-        progress.update_progress(current_position, watch_time_increment)
-        
-        # Update engagement metrics
-        if 'play_count_increment' in data:
-            progress.play_count += data['play_count_increment']
-        
-        if 'pause_count_increment' in data:
-            progress.pause_count += data['pause_count_increment']
-        
-        if 'seek_count_increment' in data:
-            progress.seek_count += data['seek_count_increment']
-        
-        if 'playback_quality' in data:
-            progress.playback_quality = data['playback_quality']
-        
-        if 'average_engagement' in data:
-            progress.average_engagement = data['average_engagement']
+        segments = data.get('watched_segments')
+        if segments is not None and not valid_segments(segments):
+            return jsonify({
+                'error': f'watched_segments must be a list of at most {MAX_SEGMENTS} [start, end] number pairs'
+            }), 400
+        
+        # Heartbeats are merged in memory and written in batches by the progress buffer
+        progress_buffer = current_app.extensions['video_progress_buffer']
+        progress = progress_buffer.record(
+            video,
+            user_id,
+            position=data.get('current_position_seconds'),
+            watch_time=data.get('watch_time_increment', 0),
+            segments=segments,
+            play_count=data.get('play_count_increment', 0),
+            pause_count=data.get('pause_count_increment', 0),
+            seek_count=data.get('seek_count_increment', 0),
+            playback_quality=data.get('playback_quality'),
+            average_engagement=data.get('average_engagement')
+        )
         
-        db.session.commit()
+        if progress_buffer.synchronous:
+            progress = VideoProgress.query.filter_by(user_id=user_id, video_id=video_id).first().to_dict()
         
         return jsonify({
             'message': 'Progress updated successfully',
-            'progress': progress.to_dict()
+            'progress': progress
         })
         
     except Exception as e:
@@ -0,0 +1,105 @@
+"""
+Content-Addressed Artifact Store for Qryti Learn
+Stores generated files under their SHA-256 so identical content is kept once
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class ArtifactStore:
+    """
+    Files keyed by the hex SHA-256 of their content
+
+    A file with key k lives at <root>/<k[:2]>/<k><suffix>. Files are moved
+    into place with an atomic rename, so readers see either nothing or the
+    complete file, and the same content written twice ends up as one file.
+    """
+
+    def __init__(self, root, suffix='.pdf'):
+        self.root = root
+        self.suffix = suffix
+
+    def path_for(self, key):
+        """Absolute path of the artifact with this key"""
+        return os.path.join(self.root, key[:2], f"{key}{self.suffix}")
+
+    def relative_path(self, key):
+        """Path of the artifact relative to the store root (for X-Accel-Redirect)"""
+        return f"{key[:2]}/{key}{self.suffix}"
+
+    def key_for_path(self, path):
+        """Key of an artifact path inside this store, or None for other paths"""
+        name = os.path.basename(path)
+        if not name.endswith(self.suffix):
+            return None
+        key = name[:-len(self.suffix)]
+        return key if len(key) == 64 and self.path_for(key) == os.path.join(self.root, key[:2], name) else None
+
+    def exists(self, key):
+        return bool(key) and os.path.exists(self.path_for(key))
+
+    def temp_path(self):
+        """A fresh temporary path on the store's filesystem, for writing a new artifact"""
+        os.makedirs(self.root, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        os.close(fd)
+        return path
+
+    def put_file(self, temp_path):
+        """Move a finished temporary file into the store; returns its key"""
+        key = file_sha256(temp_path)
+        path = self.path_for(key)
+        if os.path.exists(path):
+            os.unlink(temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        return key
+
+    def import_file(self, source_path):
+        """Copy an existing file into the store, leaving the source in place; returns its key"""
+        temp_path = self.temp_path()
+        try:
+            shutil.copyfile(source_path, temp_path)
+            return self.put_file(temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class KeyedLocks:
+    """One lock per key, created on demand and dropped when unused"""
+
+    def __init__(self):
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def __call__(self, key):
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
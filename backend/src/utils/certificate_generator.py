@@ -14,8 +14,52 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.pdfgen import canvas
 from reportlab.graphics.shapes import Drawing, Rect, String
 from reportlab.graphics import renderPDF
+from reportlab.graphics.barcode.qr import QrCodeWidget
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.lib.utils import simpleSplit
+from functools import lru_cache
+import threading
 import uuid
 
+# Default directory for rendered certificate PDFs
+CERTIFICATES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'certificates')
+
+ISSUER_TEXT = 'Qryti Learn - ISO/IEC 42001 AI Management Systems'
+FOOTER_TEXT = ("This certificate verifies the successful completion of the specified course "
+               "and demonstrates competency in ISO/IEC 42001 AI Management Systems.")
+
+
+@lru_cache(maxsize=None)
+def _sample_styles():
+    """Base stylesheet, built once per process (styles are only read)"""
+    return getSampleStyleSheet()
+
+
+def verification_url(certificate_id):
+    """Public verification URL printed on a certificate"""
+    return f"https://qryti.com/verify/{certificate_id}"
+
+
+def token_verification_url(token):
+    """Offline-verifiable URL carrying a signed certificate token"""
+    return f"https://qryti.com/verify/token/{token}"
+
+
+def qr_drawing(value, size=1.1 * inch):
+    """Square QR code drawing for value"""
+    widget = QrCodeWidget(value)
+    x1, y1, x2, y2 = widget.getBounds()
+    drawing = Drawing(size, size, transform=[size / (x2 - x1), 0, 0, size / (y2 - y1), 0, 0])
+    drawing.add(widget)
+    return drawing
+
+
+def format_completion_date(completion_date):
+    """Completion line for a certificate"""
+    if isinstance(completion_date, str):
+        return f"Completed on {completion_date}"
+    return f"Completed on {completion_date.strftime('%B %d, %Y')}"
+
 class CertificateGenerator:
     def __init__(self):
         self.page_width, self.page_height = A4
@@ -27,7 +71,7 @@ class CertificateGenerator:
         self.text_color = Color(0.2, 0.2, 0.2)  # Dark gray
         
         # Fonts and styles
-        self.styles = getSampleStyleSheet()
+        self.styles = _sample_styles()
         self._create_custom_styles()
     
     def _create_custom_styles(self):
@@ -111,6 +155,7 @@ class CertificateGenerator:
         doc = SimpleDocTemplate(
             output_path,
             pagesize=A4,
+            invariant=1,  # Reproducible output for the content-addressed store
             rightMargin=self.margin,
             leftMargin=self.margin,
             topMargin=self.margin,
@@ -176,11 +221,7 @@ class CertificateGenerator:
             story.append(score_para)
         
         # Completion date
-        completion_date = certificate_data.get('completion_date', datetime.now())
-        if isinstance(completion_date, str):
-            date_text = f"Completed on {completion_date}"
-        else:
-            date_text = f"Completed on {completion_date.strftime('%B %d, %Y')}"
+        date_text = format_completion_date(certificate_data.get('completion_date') or datetime.now())
         
         date_para = Paragraph(date_text, self.body_style)
         story.append(date_para)
@@ -191,8 +232,8 @@ class CertificateGenerator:
         # Certificate details table
         cert_details = [
             ['Certificate ID:', certificate_data['certificate_id']],
-            ['Issued by:', 'Qryti Learn - ISO/IEC 42001 AI Management Systems'],
-            ['Verification URL:', f"https://qryti.com/verify/{certificate_data['certificate_id']}"]
+            ['Issued by:', ISSUER_TEXT],
+            ['Verification URL:', verification_url(certificate_data['certificate_id'])]
         ]
         
         details_table = Table(cert_details, colWidths=[2*inch, 4*inch])
@@ -208,12 +249,18 @@ class CertificateGenerator:
         
         story.append(details_table)
         
+        # Signed token QR code for offline verification
+        if certificate_data.get('verification_token'):
+            story.append(Spacer(1, 0.2 * inch))
+            qr_table = Table([[qr_drawing(token_verification_url(certificate_data['verification_token']))]])
+            qr_table.setStyle(TableStyle([('ALIGN', (0, 0), (-1, -1), 'CENTER')]))
+            story.append(qr_table)
+        
         # Footer spacer
         story.append(Spacer(1, 0.3 * inch))
         
         # Footer text
-        footer_text = "This certificate verifies the successful completion of the specified course and demonstrates competency in ISO/IEC 42001 AI Management Systems."
-        footer_para = Paragraph(footer_text, self.footer_style)
+        footer_para = Paragraph(FOOTER_TEXT, self.footer_style)
         story.append(footer_para)
         
         # Build the PDF with border
@@ -235,7 +282,7 @@ class CertificateGenerator:
         
         # Prepare certificate data
         certificate_data = {
-            'recipient_name': user.full_name or f"{user.first_name} {user.last_name}",
+            'recipient_name': user.get_full_name(),
             'course_name': course.title,
             'certificate_id': certificate_id,
             'final_score': final_score,
@@ -244,7 +291,7 @@ class CertificateGenerator:
         }
         
         # Create certificates directory if it doesn't exist
-        certificates_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'certificates')
+        certificates_dir = CERTIFICATES_DIR
         os.makedirs(certificates_dir, exist_ok=True)
         
         # Generate filename
@@ -264,3 +311,166 @@ def create_certificate(user, course, certificate_id, final_score=None, completio
         user, course, certificate_id, final_score, completion_date
     )
 
+class CertificateTemplate:
+    """
+    Pre-laid-out certificate page for rendering many certificates quickly
+    
+    Styles, text measurements and element positions are worked out once.
+    Each PDF draws the static artwork (borders, headings, issuer details,
+    footer) from those positions as a form XObject and only places the
+    per-certificate fields over it, skipping platypus layout entirely.
+    """
+    
+    FORM_NAME = 'CertificateStatic'
+    
+    def __init__(self, generator=None):
+        self.generator = generator or CertificateGenerator()
+        self.static_text = []  # (font, size, color, x, y, centred, text)
+        self.fields = {}  # name -> (font, size, color, x, y, centred, max_width)
+        self._layout()
+    
+    def _layout(self):
+        """Place every element once, following the platypus story's flow"""
+        g = self.generator
+        center_x = g.page_width / 2
+        content_width = g.page_width - 2 * g.margin
+        top = g.page_height - g.margin - 0.5 * inch
+        
+        def place(style, text=None, field=None):
+            nonlocal top
+            baseline = top - style.fontSize
+            entry = (style.fontName, style.fontSize, style.textColor, center_x, baseline, True)
+            if field:
+                self.fields[field] = entry + (content_width,)
+            else:
+                self.static_text.append(entry + (text,))
+            top = baseline - 0.2 * style.fontSize - style.spaceAfter
+        
+        place(g.title_style, "CERTIFICATE OF COMPLETION")
+        place(g.subtitle_style, "This is to certify that")
+        place(g.name_style, field='recipient_name')
+        place(g.body_style, "has successfully completed the course")
+        place(g.course_style, field='course_name')
+        place(g.body_style, field='score')
+        place(g.body_style, field='date')
+        top -= 0.5 * inch
+        
+        # Details table: labels and issuer are static, the ID and URL vary
+        label_x = center_x - 3 * inch
+        value_x = label_x + 2 * inch
+        rows = (('Certificate ID:', None, 'certificate_id'),
+                ('Issued by:', ISSUER_TEXT, None),
+                ('Verification URL:', None, 'verification_url'))
+        for label, value, field in rows:
+            baseline = top - 14
+            self.static_text.append(('Helvetica', 10, g.text_color, label_x, baseline, False, label))
+            if field:
+                self.fields[field] = ('Helvetica', 10, g.primary_color, value_x, baseline, False, 4 * inch)
+            else:
+                self.static_text.append(('Helvetica', 10, g.primary_color, value_x, baseline, False, value))
+            top -= 26
+        top -= 0.3 * inch
+        
+        style = g.footer_style
+        leading = 1.2 * style.fontSize
+        for text in simpleSplit(FOOTER_TEXT, style.fontName, style.fontSize, content_width):
+            top -= leading
+            self.static_text.append((style.fontName, style.fontSize, style.textColor, center_x, top, True, text))
+    
+    def _draw_static(self, c):
+        """Borders and fixed text, identical on every certificate"""
+        g = self.generator
+        c.setStrokeColor(g.primary_color)
+        c.setLineWidth(3)
+        c.rect(g.margin/2, g.margin/2, g.page_width - g.margin, g.page_height - g.margin)
+        c.setStrokeColor(g.secondary_color)
+        c.setLineWidth(1)
+        c.rect(g.margin/2 + 10, g.margin/2 + 10, g.page_width - g.margin - 20, g.page_height - g.margin - 20)
+        for font, size, color, x, y, centred, text in self.static_text:
+            self._draw_text(c, font, size, color, x, y, centred, text)
+    
+    @staticmethod
+    def _draw_text(c, font, size, color, x, y, centred, text):
+        c.setFont(font, size)
+        c.setFillColor(color)
+        if centred:
+            c.drawCentredString(x, y, text)
+        else:
+            c.drawString(x, y, text)
+    
+    def render(self, certificate_data, output_path):
+        """Render one certificate PDF over the static template"""
+        values = {
+            'recipient_name': certificate_data['recipient_name'],
+            'course_name': certificate_data['course_name'],
+            'score': (f"with a final score of {certificate_data['final_score']}%"
+                      if certificate_data.get('final_score') else ''),
+            'date': format_completion_date(certificate_data.get('completion_date') or datetime.now()),
+            'certificate_id': str(certificate_data['certificate_id']),
+            'verification_url': verification_url(certificate_data['certificate_id'])
+        }
+        
+        c = canvas.Canvas(output_path, pagesize=A4, invariant=1)
+        c.beginForm(self.FORM_NAME)
+        self._draw_static(c)
+        c.endForm()
+        c.doForm(self.FORM_NAME)
+        
+        for name, (font, size, color, x, y, centred, max_width) in self.fields.items():
+            text = values[name]
+            if not text:
+                continue
+            # Shrink long names and titles to fit on their line
+            width = stringWidth(text, font, size)
+            if width > max_width:
+                size = size * max_width / width
+            self._draw_text(c, font, size, color, x, y, centred, text)
+        
+        # Signed token QR code for offline verification, inside the bottom-right border
+        if certificate_data.get('verification_token'):
+            g = self.generator
+            drawing = qr_drawing(token_verification_url(certificate_data['verification_token']))
+            renderPDF.draw(drawing, c, g.page_width - g.margin - drawing.width, g.margin)
+        
+        c.showPage()
+        c.save()
+        return output_path
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_certificate_template():
+    """Shared certificate template, laid out on first use in this process"""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = CertificateTemplate()
+    return _template
+
+def render_certificate_pdf(certificate_data, output_dir=CERTIFICATES_DIR, use_template=True):
+    """
+    Render a certificate PDF from plain data into the artifact store and return its path
+    
+    Only takes picklable arguments and touches no database state, so it can
+    run in a worker process. use_template selects the pre-laid-out
+    CertificateTemplate over the full platypus layout. Output is
+    byte-for-byte reproducible, and the file is stored under the SHA-256 of
+    its content, so rendering the same certificate twice yields one file.
+    """
+    from src.utils.artifact_store import ArtifactStore
+
+    store = ArtifactStore(output_dir)
+    temp_path = store.temp_path()
+    try:
+        if use_template:
+            get_certificate_template().render(certificate_data, temp_path)
+        else:
+            CertificateGenerator().generate_certificate(certificate_data, temp_path)
+        key = store.put_file(temp_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    return store.path_for(key)
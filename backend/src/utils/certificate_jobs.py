@@ -0,0 +1,260 @@
+"""
+Background Certificate Rendering for Qryti Learn
+Renders certificate PDFs on a process pool and tracks them as render jobs
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from functools import partial
+
+from flask import has_app_context
+
+from src.utils.artifact_store import ArtifactStore, KeyedLocks
+from src.utils.certificate_generator import CERTIFICATES_DIR, render_certificate_pdf
+
+logger = logging.getLogger(__name__)
+
+
+class CertificateRenderQueue:
+    """
+    Process pool in front of certificate render jobs
+
+    Each request to render a certificate becomes a CertificateRenderJob row
+    before any work is handed to the pool, so job status survives the worker
+    and can be polled by clients. PDF rendering is CPU bound, so it runs in
+    separate processes; results are written back from the pool's callback
+    thread in its own app context. Failed renders are retried until the
+    job's max_attempts is reached. In synchronous mode the PDF is rendered
+    on the caller's thread.
+    """
+
+    def __init__(self, app=None, workers=2, max_attempts=3, output_dir=CERTIFICATES_DIR,
+                 stale_after_seconds=300, start_method='spawn', synchronous=False):
+        self.app = None
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.output_dir = output_dir
+        self.stale_after_seconds = stale_after_seconds
+        self.start_method = start_method
+        self.synchronous = synchronous
+
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._render_locks = KeyedLocks()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the queue from app config and register it on the app"""
+        self.app = app
+        self.synchronous = app.config.get('CERTIFICATE_RENDER_MODE', 'process') == 'sync'
+        self.workers = app.config.get('CERTIFICATE_RENDER_WORKERS', self.workers)
+        self.max_attempts = app.config.get('CERTIFICATE_RENDER_MAX_ATTEMPTS', self.max_attempts)
+        self.output_dir = app.config.get('CERTIFICATE_OUTPUT_DIR', self.output_dir)
+        self.stale_after_seconds = app.config.get('CERTIFICATE_RENDER_STALE_SECONDS', self.stale_after_seconds)
+        self.start_method = app.config.get('CERTIFICATE_RENDER_START_METHOD', self.start_method)
+
+        app.extensions['certificate_render_queue'] = self
+        atexit.register(self.shutdown)
+
+    def enqueue(self, certificate):
+        """Create a render job for a certificate and hand it to the pool"""
+        from src.models.user import db
+        from src.models.progress import CertificateRenderJob
+
+        job = CertificateRenderJob(certificate=certificate, max_attempts=self.max_attempts)
+        db.session.add(job)
+        db.session.commit()
+
+        self._dispatch(job.id, certificate.get_render_data())
+        return job
+
+    @property
+    def store(self):
+        """Content-addressed store the PDFs are rendered into"""
+        return ArtifactStore(self.output_dir)
+
+    def ensure_rendered(self, certificate):
+        """
+        Return the certificate's active render job, starting one if needed
+
+        Returns None when the PDF is already in the artifact store. Concurrent
+        callers for the same certificate are serialised, so a missing PDF is
+        only queued for rendering once. A job stuck in queued or rendering
+        beyond stale_after_seconds (e.g. its process died) is treated as lost
+        and replaced.
+        """
+        from src.models.user import db
+        from src.models.progress import CertificateRenderJob
+
+        with self._render_locks(certificate.id):
+            db.session.refresh(certificate)
+            store = self.store
+            if store.exists(certificate.pdf_sha256):
+                return None
+            if not certificate.pdf_sha256 and certificate.has_pdf():
+                # PDF rendered before the artifact store existed: adopt it
+                certificate.pdf_sha256 = store.import_file(certificate.pdf_path)
+                certificate.pdf_path = store.path_for(certificate.pdf_sha256)
+                db.session.commit()
+                return None
+
+            job = CertificateRenderJob.get_latest(certificate.id)
+            if job is not None and job.is_active(self.stale_after_seconds):
+                return job
+            return self.enqueue(certificate)
+
+    def shutdown(self, wait=True):
+        """Stop the process pool after running renders finish"""
+        if self._pool is None or self._pid != os.getpid():
+            return
+        self._pool.shutdown(wait=wait)
+        self._pool = None
+
+    def _get_pool(self):
+        """Create the process pool on first use in this process"""
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                # A forked web worker must not share its parent's pool
+                self._pid = os.getpid()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method)
+                )
+            return self._pool
+
+    def _discard_pool(self, pool):
+        """Forget a pool whose worker died so the next dispatch starts a fresh one"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+
+    def dispatch_jobs(self, job_ids, chunk_size=500):
+        """
+        Fan many queued render jobs out over the pool
+
+        Render data is loaded with one joined query and the jobs are claimed
+        with one update per chunk, instead of a lookup and commit per job.
+        Returns the number of jobs dispatched.
+        """
+        from src.models.user import db
+        from src.models.progress import CertificateRenderJob
+
+        dispatched = 0
+        job_ids = list(job_ids)
+        for start in range(0, len(job_ids), chunk_size):
+            chunk = job_ids[start:start + chunk_size]
+            rows = CertificateRenderJob.load_render_data(chunk)
+            CertificateRenderJob.start_attempts([job_id for job_id, _ in rows])
+            db.session.commit()
+            for job_id, render_data in rows:
+                self._run_attempt(job_id, render_data)
+            dispatched += len(rows)
+        return dispatched
+
+    def _dispatch(self, job_id, render_data):
+        """Mark a job as rendering and run one attempt"""
+        if self._start_attempt(job_id):
+            self._run_attempt(job_id, render_data)
+
+    def _run_attempt(self, job_id, render_data):
+        """Render inline or hand the job to the process pool"""
+        if self.synchronous:
+            try:
+                pdf_path = render_certificate_pdf(render_data, self.output_dir)
+            except Exception as e:
+                self._finish_attempt(job_id, render_data, error=e)
+            else:
+                self._finish_attempt(job_id, render_data, pdf_path=pdf_path)
+            return
+
+        pool = self._get_pool()
+        try:
+            future = pool.submit(render_certificate_pdf, render_data, self.output_dir)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._discard_pool(pool)
+            self._finish_attempt(job_id, render_data, error=e)
+            return
+        future.add_done_callback(partial(self._on_done, job_id, render_data, pool))
+
+    def _on_done(self, job_id, render_data, pool, future):
+        """Pool callback: record the outcome of a render attempt"""
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._discard_pool(pool)
+        if error is not None:
+            self._finish_attempt(job_id, render_data, error=error)
+        else:
+            self._finish_attempt(job_id, render_data, pdf_path=future.result())
+
+    def _start_attempt(self, job_id):
+        """Move a job to rendering and count the attempt"""
+        return self._in_context(self._start_attempt_in_context, job_id)
+
+    def _finish_attempt(self, job_id, render_data, pdf_path=None, error=None):
+        """Record a render outcome, retrying failed jobs with attempts left"""
+        retry = self._in_context(self._finish_attempt_in_context, job_id, pdf_path, error)
+        if retry:
+            self._dispatch(job_id, render_data)
+
+    def _in_context(self, func, *args):
+        """Run func on the current session, or in a fresh app context from pool threads"""
+        if has_app_context():
+            return func(*args)
+        with self.app.app_context():
+            return func(*args)
+
+    def _start_attempt_in_context(self, job_id):
+        from src.models.user import db
+        from src.models.progress import CertificateRenderJob
+
+        job = db.session.get(CertificateRenderJob, job_id)
+        if job is None or job.status in ('completed', 'failed'):
+            return False
+        job.status = 'rendering'
+        job.attempts += 1
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+        return True
+
+    def _finish_attempt_in_context(self, job_id, pdf_path, error):
+        from src.models.user import db
+        from src.models.progress import CertificateRenderJob
+
+        try:
+            job = db.session.get(CertificateRenderJob, job_id)
+            if job is None:
+                return False
+
+            if error is None:
+                job.status = 'completed'
+                job.error = None
+                job.finished_at = datetime.utcnow()
+                job.certificate.pdf_path = pdf_path
+                job.certificate.pdf_sha256 = self.store.key_for_path(pdf_path)
+                db.session.commit()
+                return False
+
+            logger.error(f"Certificate render error (job {job.job_id}, attempt {job.attempts}): {str(error)}")
+            job.error = str(error)
+            if job.attempts < job.max_attempts:
+                job.status = 'queued'
+                db.session.commit()
+                return True
+
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            return False
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Certificate render bookkeeping error (job {job_id}): {str(e)}")
+            return False
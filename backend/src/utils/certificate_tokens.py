@@ -0,0 +1,313 @@
+"""
+Signed Certificate Tokens for Qryti Learn
+Compact Ed25519 signed certificate claims that anyone can verify offline with the published public key
+"""
+
+import base64
+import calendar
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+logger = logging.getLogger(__name__)
+
+# Version 1 tokens were HMAC signed and are no longer accepted
+TOKEN_VERSION = 2
+
+
+class InvalidToken(ValueError):
+    """Token is malformed, signed with an unknown key, or of an unknown version"""
+
+
+class TokensDisabled(RuntimeError):
+    """No dedicated certificate signing key is configured"""
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _canonical(payload):
+    """Stable JSON encoding used for signing"""
+    return json.dumps(payload, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+def _timestamp(value):
+    """Epoch seconds for a naive UTC datetime"""
+    return calendar.timegm(value.utctimetuple()) if value is not None else None
+
+
+def _raw_public_key(public_key):
+    return public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+
+
+def load_private_key(key):
+    """
+    Ed25519 private key from CERTIFICATE_SIGNING_KEY
+
+    Takes a PEM encoded Ed25519 key, or any other secret string (such as
+    the output of `openssl rand -hex 32`), whose SHA-256 seeds the key.
+    """
+    if isinstance(key, Ed25519PrivateKey):
+        return key
+    text = key.decode('utf-8') if isinstance(key, bytes) else key
+    if text.lstrip().startswith('-----BEGIN'):
+        private_key = serialization.load_pem_private_key(text.encode('utf-8'), password=None)
+        if not isinstance(private_key, Ed25519PrivateKey):
+            raise ValueError('CERTIFICATE_SIGNING_KEY must be an Ed25519 key')
+        return private_key
+    return Ed25519PrivateKey.from_private_bytes(hashlib.sha256(text.encode('utf-8')).digest())
+
+
+def load_public_key(key):
+    """Ed25519 public key from a key object, a PEM block, or its raw bytes in URL-safe base64"""
+    if isinstance(key, Ed25519PublicKey):
+        return key
+    text = key.decode('utf-8') if isinstance(key, bytes) else key.strip()
+    if text.startswith('-----BEGIN'):
+        public_key = serialization.load_pem_public_key(text.encode('utf-8'))
+        if not isinstance(public_key, Ed25519PublicKey):
+            raise ValueError('Certificate verification keys must be Ed25519 keys')
+        return public_key
+    return Ed25519PublicKey.from_public_bytes(_b64decode(text))
+
+
+def key_id(public_key):
+    """Short, public identifier of a verification key"""
+    return hashlib.sha256(_raw_public_key(public_key)).hexdigest()[:8]
+
+
+class CertificateVerifier:
+    """
+    Verifies tokens and signed documents with published Ed25519 public keys
+
+    Needs no secret, so third parties can build one from the published key
+    set (see to_jwks) and verify entirely offline. Each token and document
+    names its key with kid, so retired keys keep verifying what they signed.
+    """
+
+    def __init__(self, public_keys):
+        self.public_keys = {}
+        for public_key in public_keys:
+            public_key = load_public_key(public_key)
+            self.public_keys[key_id(public_key)] = public_key
+
+    @classmethod
+    def from_jwks(cls, document):
+        """Verifier for a key set published by to_jwks"""
+        return cls(entry['x'] for entry in document.get('keys', ())
+                   if entry.get('kty') == 'OKP' and entry.get('crv') == 'Ed25519')
+
+    def to_jwks(self):
+        """Public key set in JWK Set form"""
+        return {'keys': [
+            {'kty': 'OKP', 'crv': 'Ed25519', 'use': 'sig', 'kid': kid, 'x': _b64encode(_raw_public_key(public_key))}
+            for kid, public_key in self.public_keys.items()
+        ]}
+
+    def verify(self, token):
+        """Return the payload of a token signed with one of the keys, or raise InvalidToken"""
+        try:
+            body, signature = token.split('.')
+            payload = json.loads(_b64decode(body))
+            signature = _b64decode(signature)
+            public_key = self.public_keys.get(payload.get('kid'))
+        except (AttributeError, TypeError, ValueError):
+            # Not a string, wrong number of parts, bad base64 or JSON, or not a JSON object
+            raise InvalidToken('Malformed token')
+        if public_key is None:
+            raise InvalidToken('Unknown signing key')
+        try:
+            public_key.verify(signature, body.encode('ascii'))
+        except InvalidSignature:
+            raise InvalidToken('Bad signature')
+        if payload.get('v') != TOKEN_VERSION:
+            raise InvalidToken('Unsupported token version')
+        return payload
+
+    def verify_document(self, signed):
+        """Check a document produced by CertificateSigner.sign_document"""
+        document = {key: value for key, value in signed.items() if key != 'signature'}
+        public_key = self.public_keys.get(document.get('kid'))
+        if public_key is None:
+            return False
+        try:
+            public_key.verify(_b64decode(signed.get('signature', '')), _canonical(document))
+        except (InvalidSignature, TypeError, ValueError):
+            return False
+        return True
+
+
+class CertificateSigner(CertificateVerifier):
+    """Signs token payloads and documents with one Ed25519 private key"""
+
+    def __init__(self, key, retired_public_keys=()):
+        self.private_key = load_private_key(key)
+        self.key_id = key_id(self.private_key.public_key())
+        super().__init__([self.private_key.public_key(), *retired_public_keys])
+
+    def sign(self, payload):
+        """Return the compact token '<payload>.<signature>' for a dict payload"""
+        body = _b64encode(_canonical(dict(payload, kid=self.key_id)))
+        return f"{body}.{_b64encode(self.private_key.sign(body.encode('ascii')))}"
+
+    def sign_document(self, document):
+        """Attach a kid and signature to a JSON document (e.g. a revocation list)"""
+        document = dict(document, kid=self.key_id)
+        return dict(document, signature=_b64encode(self.private_key.sign(_canonical(document))))
+
+
+class CertificateTokens:
+    """
+    Token issuing and DB-free token verification for certificates
+
+    Verification checks the signature and expiry from the token itself and
+    consults an in-memory set of revoked certificate IDs. The set is loaded
+    from the database on first use, refreshed in the background every
+    refresh_interval seconds, and updated immediately when a certificate is
+    revoked in this process.
+
+    Tokens and the revocation list are signed with the Ed25519 key derived
+    from CERTIFICATE_SIGNING_KEY; verifiers only need the public keys from
+    public_keys(), which also lists CERTIFICATE_RETIRED_PUBLIC_KEYS so
+    tokens signed before a key rotation keep verifying. The signing key
+    must never be the Flask or JWT secret; without a dedicated key the
+    feature stays off, certificates are issued without tokens and
+    verification raises TokensDisabled.
+    """
+
+    def __init__(self, app=None, key=None, refresh_interval=60.0):
+        self.app = None
+        self.signer = CertificateSigner(key) if key else None
+        self.refresh_interval = refresh_interval
+
+        self._revoked = frozenset()
+        self._revocations_loaded_at = None
+        self._loaded = False
+        self._refresher = None
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the signing key and refresh interval and register on the app"""
+        self.app = app
+        key = app.config.get('CERTIFICATE_SIGNING_KEY')
+        if not key:
+            logger.warning("CERTIFICATE_SIGNING_KEY is not set; signed certificate tokens are disabled")
+        elif key in (app.config.get('SECRET_KEY'), app.config.get('JWT_SECRET_KEY')):
+            logger.error("CERTIFICATE_SIGNING_KEY reuses an application secret; signed certificate tokens are disabled")
+            key = None
+        self.signer = None
+        if key:
+            try:
+                self.signer = CertificateSigner(key, app.config.get('CERTIFICATE_RETIRED_PUBLIC_KEYS', ()))
+            except ValueError as e:
+                logger.error(f"Invalid certificate signing keys; signed certificate tokens are disabled: {str(e)}")
+        self.refresh_interval = app.config.get('CERTIFICATE_REVOCATION_REFRESH_INTERVAL', self.refresh_interval)
+        app.extensions['certificate_tokens'] = self
+
+    @property
+    def enabled(self):
+        """Whether a dedicated signing key is configured"""
+        return self.signer is not None
+
+    def issue(self, certificate_id, holder_name, course_title, final_score, issued_at, expires_at=None):
+        """Signed token for a certificate's public claims, or None while tokens are disabled"""
+        if not self.enabled:
+            return None
+        return self.signer.sign({
+            'v': TOKEN_VERSION,
+            'cid': certificate_id,
+            'name': holder_name,
+            'course': course_title,
+            'score': final_score,
+            'iat': _timestamp(issued_at),
+            'exp': _timestamp(expires_at)
+        })
+
+    def verify(self, token, now=None):
+        """
+        Verify a token without touching the database
+
+        Returns (status, claims) where status is valid, revoked or expired;
+        raises InvalidToken for tokens that were not issued by us.
+        """
+        if not self.enabled:
+            raise TokensDisabled('Certificate tokens are not configured')
+        claims = self.signer.verify(token)
+        self._ensure_loaded()
+        if claims['cid'] in self._revoked:
+            return 'revoked', claims
+        if claims.get('exp') is not None and (now or time.time()) > claims['exp']:
+            return 'expired', claims
+        return 'valid', claims
+
+    def public_keys(self):
+        """Published verification keys (current and retired) as a JWK Set"""
+        if not self.enabled:
+            raise TokensDisabled('Certificate tokens are not configured')
+        return self.signer.to_jwks()
+
+    def revoke(self, certificate_id):
+        """Add a certificate to this process's revocation set"""
+        with self._lock:
+            self._revoked = self._revoked | {certificate_id}
+
+    def refresh_revocations(self):
+        """Reload the revocation set from the database (needs an app context)"""
+        from src.models.user import db
+        from src.models.progress import Certificate
+
+        revoked = frozenset(db.session.scalars(
+            db.select(Certificate.certificate_id).where(Certificate.is_valid == False)
+        ))
+        with self._lock:
+            self._revoked = revoked
+            self._revocations_loaded_at = datetime.utcnow()
+            self._loaded = True
+        return len(revoked)
+
+    def export_revocation_list(self):
+        """Signed list of revoked certificate IDs for offline verifiers"""
+        if not self.enabled:
+            raise TokensDisabled('Certificate tokens are not configured')
+        self._ensure_loaded()
+        return self.signer.sign_document({
+            'version': TOKEN_VERSION,
+            'issued_at': datetime.utcnow().isoformat(),
+            'revocations_loaded_at': self._revocations_loaded_at.isoformat() if self._revocations_loaded_at else None,
+            'revoked': sorted(self._revoked)
+        })
+
+    def _ensure_loaded(self):
+        """Load the revocation set once and start the background refresh"""
+        if self._loaded:
+            return
+        with self.app.app_context():
+            self.refresh_revocations()
+        if self.refresh_interval and self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, name='certificate-revocations',
+                                               daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                with self.app.app_context():
+                    self.refresh_revocations()
+            except Exception as e:
+                logger.error(f"Certificate revocation refresh error: {str(e)}")
@@ -0,0 +1,140 @@
+"""
+Certificate Verification Cache for Qryti Learn
+Slim, time-limited read model behind the public verification endpoints
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+
+_VerificationFields = namedtuple('_VerificationFields', [
+    'certificate_id', 'verification_code', 'user_name', 'organization', 'course_title',
+    'course_level', 'final_score', 'issued_at', 'expires_at', 'is_valid'
+])
+
+
+class CertificateVerification(_VerificationFields):
+    """Just the certificate fields a verifier sees, without ORM objects"""
+    __slots__ = ()
+
+    def is_current(self, now=None):
+        """Valid and not expired"""
+        return self.get_status(now) == 'valid'
+
+    def get_status(self, now=None):
+        """valid, revoked or expired"""
+        if not self.is_valid:
+            return 'revoked'
+        if self.expires_at is not None and (now or datetime.utcnow()) > self.expires_at:
+            return 'expired'
+        return 'valid'
+
+    def to_status_dict(self, now=None):
+        """Compact status entry for bulk verification"""
+        return {
+            'status': self.get_status(now),
+            'certificate_id': self.certificate_id,
+            'user_name': self.user_name,
+            'course_title': self.course_title,
+            'issued_at': self.issued_at.isoformat(),
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+
+    def to_dict(self):
+        """Public verification payload"""
+        return {
+            'certificate_id': self.certificate_id,
+            'user_name': self.user_name,
+            'course_title': self.course_title,
+            'course_level': self.course_level,
+            'final_score': self.final_score,
+            'issued_at': self.issued_at.isoformat(),
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'organization': self.organization
+        }
+
+
+class CertificateVerificationCache:
+    """
+    Thread-safe LRU of verification projections with a time-to-live
+
+    Lookups are keyed by certificate ID and by verification code. Unknown
+    keys are cached too, for a shorter time, so scraping random IDs does not
+    reach the database on every request. Entries are dropped explicitly when
+    a certificate is issued or revoked in this process. A valid certificate
+    is only served from the cache while the shared revocation version it was
+    loaded under is still current, so a revocation anywhere (or one that
+    raced the load) is seen on the next lookup; the TTL bounds how long an
+    unknown key stays unknown.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300.0, negative_ttl=30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, version=None):
+        """
+        Return the cached projection for key, calling loader() on a miss or expiry
+
+        version, if given, returns the current revocation version; a valid
+        certificate cached under an older one is loaded again.
+        """
+        now = time.monotonic()
+        current = None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            value = entry[1]
+            if value is None or not value.is_valid or version is None:
+                return self._touch(key, value)
+            current = version()
+            if entry[2] == current:
+                return self._touch(key, value)
+
+        # Read the version before loading, so a revocation committed meanwhile invalidates this entry
+        if current is None and version is not None:
+            current = version()
+        value = loader()
+        self._store(key, value, now, current)
+        if value is not None:
+            # Prime the other lookup for the same certificate
+            other = ('code', value.verification_code) if key[0] == 'id' else ('id', value.certificate_id)
+            self._store(other, value, now, current)
+        return value
+
+    def invalidate(self, certificate_id=None, verification_code=None):
+        """Drop a certificate's entries (positive or negative)"""
+        with self._lock:
+            if certificate_id is not None:
+                self._entries.pop(('id', certificate_id), None)
+            if verification_code is not None:
+                self._entries.pop(('code', verification_code), None)
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def _touch(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key, value, now, version=None):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        with self._lock:
+            self._entries[key] = (now + ttl, value, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+certificate_verification_cache = CertificateVerificationCache()
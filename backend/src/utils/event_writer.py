@@ -0,0 +1,183 @@
+"""
+Buffered Analytics Event Writer for Qryti Learn
+Queues LearningAnalytics events in-process and bulk-inserts them from a background thread
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from flask import has_app_context
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AnalyticsEventWriter:
+    """
+    Bounded in-process queue with a background flusher
+
+    Events are flushed in batches of ``batch_size`` or every ``flush_interval``
+    seconds, whichever comes first. When the queue is full, ``enqueue`` blocks
+    for up to ``enqueue_timeout`` seconds and then writes the event on the
+    caller's thread, so producers slow down instead of dropping events.
+    In synchronous mode every event is written and committed immediately.
+    """
+
+    def __init__(self, app=None, batch_size=200, flush_interval=1.0, max_queue_size=10000,
+                 enqueue_timeout=0.5, synchronous=False):
+        self.app = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.enqueue_timeout = enqueue_timeout
+        self.synchronous = synchronous
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the writer from app config and register it on the app"""
+        self.app = app
+        self.synchronous = app.config.get('ANALYTICS_EVENT_WRITER', 'buffered') == 'sync'
+        self.batch_size = app.config.get('ANALYTICS_EVENT_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('ANALYTICS_EVENT_FLUSH_INTERVAL', self.flush_interval)
+        self.max_queue_size = app.config.get('ANALYTICS_EVENT_QUEUE_SIZE', self.max_queue_size)
+        self.enqueue_timeout = app.config.get('ANALYTICS_EVENT_ENQUEUE_TIMEOUT', self.enqueue_timeout)
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+
+        app.extensions['analytics_event_writer'] = self
+        atexit.register(self.shutdown)
+
+    def enqueue(self, row):
+        """Queue an event row (a dict of LearningAnalytics column values)"""
+        if self.synchronous:
+            self._write_on_caller([row])
+            return
+
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            logger.warning("Analytics event queue full, writing event on caller thread")
+            self._write_on_caller([row])
+
+    def flush(self):
+        """Write every queued event now"""
+        with self._flush_lock:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    return
+                self._write(batch)
+
+    def shutdown(self, timeout=5.0):
+        """Stop the flusher thread and write whatever is still queued"""
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+    def pending(self):
+        """Approximate number of queued events"""
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        """Start the flusher thread on first use in this process"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # A forked worker inherits the queue object but not the thread
+            if self._pid is not None and self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='analytics-event-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _drain(self, limit):
+        """Take up to limit events from the queue without blocking"""
+        batch = []
+        while len(batch) < limit:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is _STOP:
+                continue
+            batch.append(row)
+        return batch
+
+    def _run(self):
+        """Flusher loop: collect a batch by size or time and write it"""
+        while True:
+            try:
+                row = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if row is _STOP:
+                return
+
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stop = True
+                    break
+                batch.append(row)
+
+            with self._flush_lock:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write_on_caller(self, rows):
+        """Write rows using the caller's session when one is active"""
+        from src.models.user import db
+        from src.models.progress import LearningAnalytics
+
+        if has_app_context():
+            LearningAnalytics.write_events(rows)
+            db.session.commit()
+        else:
+            self._write(rows)
+
+    def _write(self, rows):
+        """Bulk insert rows in one transaction on a fresh app context"""
+        with self.app.app_context():
+            self._commit_rows(rows)
+
+    def _commit_rows(self, rows):
+        """Bulk insert rows and commit the current session"""
+        from src.models.user import db
+        from src.models.progress import LearningAnalytics
+
+        try:
+            LearningAnalytics.write_events(rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Analytics event flush error ({len(rows)} events): {str(e)}")
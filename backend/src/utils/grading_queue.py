@@ -0,0 +1,222 @@
+"""
+Background Quiz Grading Queue for Qryti Learn
+Grades durably accepted exam submissions on a pool of worker threads
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+
+from flask import has_app_context
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class GradingQueue:
+    """
+    In-process dispatch queue in front of pending quiz attempts
+
+    Submissions are made durable by the caller (a pending QuizAttempt row)
+    before their id is queued here, so the queue itself may be lost at any
+    time. Workers claim an attempt with a conditional update before grading
+    it, and a periodic sweep, running from app start, re-queues pending
+    attempts left behind by a crashed or restarted process. An attempt hit by
+    a transient database error stays pending for the sweep; only errors that
+    would repeat, or max_retries transient ones, mark it failed. In
+    synchronous mode attempts are graded on the caller's thread as soon as
+    they are submitted.
+    """
+
+    def __init__(self, app=None, workers=4, sweep_interval=30.0, max_retries=5, synchronous=False):
+        self.app = None
+        self.workers = workers
+        self.sweep_interval = sweep_interval
+        self.max_retries = max_retries
+        self.synchronous = synchronous
+
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._retries = {}
+        self._threads = []
+        self._sweeper = None
+        self._sweeper_pid = None
+        self._stopping = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the queue from app config and register it on the app"""
+        self.app = app
+        self.synchronous = app.config.get('QUIZ_GRADING_MODE', 'async') == 'sync'
+        self.workers = app.config.get('QUIZ_GRADING_WORKERS', self.workers)
+        self.sweep_interval = app.config.get('QUIZ_GRADING_SWEEP_INTERVAL', self.sweep_interval)
+        self.max_retries = app.config.get('QUIZ_GRADING_MAX_RETRIES', self.max_retries)
+
+        app.extensions['quiz_grading_queue'] = self
+        atexit.register(self.shutdown)
+
+        # Attempts left pending by a previous process are picked up without waiting for a new submission
+        if not self.synchronous:
+            with self._lock:
+                self._ensure_sweeping()
+
+    def submit(self, attempt_id):
+        """Queue a pending attempt for grading; returns False if it is already queued"""
+        if self.synchronous:
+            if has_app_context():
+                self._grade_in_context(attempt_id)
+            else:
+                self._grade(attempt_id)
+            return True
+
+        self._ensure_started()
+        with self._lock:
+            if attempt_id in self._queued:
+                return False
+            self._queued.add(attempt_id)
+        self._queue.put(attempt_id)
+        return True
+
+    def sweep(self):
+        """Re-queue pending attempts not already waiting in this process; returns how many were queued"""
+        with self.app.app_context():
+            from src.models.quiz import QuizAttempt
+            attempt_ids = QuizAttempt.get_pending_attempt_ids()
+
+        return sum(1 for attempt_id in attempt_ids if self.submit(attempt_id))
+
+    def join(self):
+        """Block until every queued attempt has been processed"""
+        self._queue.join()
+
+    def shutdown(self, timeout=5.0):
+        """Stop the sweeper, and the workers after the queued attempts are graded"""
+        self._stopping.set()
+        self._sweeper = None
+        if self._pid != os.getpid():
+            return
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def pending(self):
+        """Approximate number of queued attempts"""
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        """Start the worker pool on first use in this process, replacing dead workers and a sweeper a fork left behind"""
+        if self._pid == os.getpid() and len(self._threads) == self.workers \
+                and all(thread.is_alive() for thread in self._threads):
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker inherits the queue object but not the threads
+                self._queue = queue.Queue()
+                self._queued = set()
+                self._retries = {}
+                self._stopping.clear()
+                self._pid = os.getpid()
+                self._threads = []
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f'quiz-grader-{len(self._threads)}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._ensure_sweeping()
+
+    def _ensure_sweeping(self):
+        """Start the sweeper in this process unless it already runs; call with the lock held"""
+        if not self.sweep_interval or (self._sweeper is not None and self._sweeper_pid == os.getpid()):
+            return
+        self._stopping.clear()
+        self._sweeper_pid = os.getpid()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name='quiz-grader-sweep', daemon=True)
+        self._sweeper.start()
+
+    def _run(self):
+        """Worker loop: grade attempts until told to stop"""
+        while True:
+            attempt_id = self._queue.get()
+            try:
+                if attempt_id is _STOP:
+                    return
+                self._grade(attempt_id)
+            except Exception:
+                # Keep the worker alive; the attempt stays pending for the sweep
+                logger.exception(f"Quiz grading worker error (attempt {attempt_id})")
+            finally:
+                with self._lock:
+                    self._queued.discard(attempt_id)
+                self._queue.task_done()
+
+    def _sweep_loop(self):
+        """Periodically pick up pending attempts this process never saw"""
+        while not self._stopping.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Quiz grading sweep error: {str(e)}")
+
+    def _grade(self, attempt_id):
+        """Grade one attempt in its own app context"""
+        with self.app.app_context():
+            self._grade_in_context(attempt_id)
+
+    def _grade_in_context(self, attempt_id):
+        """Grade one attempt on the current session and log its completion"""
+        from src.models.user import db
+        from src.models.quiz import QuizAttempt
+        from src.models.progress import LearningAnalytics
+
+        try:
+            attempt = QuizAttempt.grade_pending(attempt_id)
+        except Exception as e:
+            db.session.rollback()
+            if _is_transient(e) and self._retry(attempt_id):
+                logger.warning(f"Quiz grading deferred (attempt {attempt_id}): {str(e)}")
+                return
+            logger.error(f"Quiz grading error (attempt {attempt_id}): {str(e)}")
+            QuizAttempt.mark_grading_failed(attempt_id)
+            with self._lock:
+                self._retries.pop(attempt_id, None)
+            return
+
+        with self._lock:
+            self._retries.pop(attempt_id, None)
+        if attempt is None:
+            # Already graded by another worker or process
+            return
+
+        LearningAnalytics.log_event(
+            user_id=attempt.user_id,
+            event_type='quiz_completed',
+            event_data={
+                'quiz_id': attempt.quiz_id,
+                'attempt_id': attempt.id,
+                'score': attempt.score,
+                'passed': attempt.passed,
+                'time_taken_minutes': attempt.time_taken_minutes
+            }
+        )
+
+    def _retry(self, attempt_id):
+        """Count a transient failure; True while the attempt may stay pending for another try"""
+        with self._lock:
+            tries = self._retries.get(attempt_id, 0) + 1
+            self._retries[attempt_id] = tries
+        return tries < self.max_retries
+
+
+def _is_transient(error):
+    """Whether a grading error is a database hiccup (locked, disconnected) rather than one that would repeat"""
+    return isinstance(error, OperationalError) or (isinstance(error, DBAPIError) and error.connection_invalidated)
@@ -0,0 +1,278 @@
+"""
+Quiz Item Analysis for Qryti Learn
+Streams completed attempts into NumPy response matrices and keeps per-quiz
+sufficient statistics for difficulty, discrimination and distractor analysis
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from itertools import repeat
+
+import numpy as np
+from sqlalchemy import or_
+
+from src.models.user import db
+from src.models.quiz import QuizAttempt
+from src.utils.quiz_cache import compiled_quiz_cache
+
+MISSING = -1
+_ABSENT = object()
+
+
+class QuestionEncoder:
+    """Maps raw answers for one question to choice codes"""
+
+    def __init__(self, question):
+        self.question = question
+        self.multiple = question.question_type == 'multiple_select'
+
+        # Choices are the options plus any correct answer not listed as an option,
+        # with one trailing "other" slot for unrecognised answers
+        choices = list(question.options)
+        choices.extend(answer for answer in question.answer_key if answer not in choices)
+        self.choices = choices
+        self.other = len(choices)
+        self.codes = {}
+        for index, choice in enumerate(choices):
+            try:
+                self.codes.setdefault(choice, index)
+            except TypeError:
+                continue
+
+        self.lookup = dict(self.codes)
+        self.lookup[_ABSENT] = MISSING
+
+        correct_codes = [self.codes[answer] for answer in question.answer_key]
+        self.correct_code_set = frozenset(correct_codes)
+        self.correct_codes = np.array(correct_codes, dtype=np.int64)
+        self.correct_mask = sum(1 << code for code in correct_codes)
+
+    def encode_column(self, column):
+        """Codes for a column of single-answer responses (_ABSENT where unanswered)"""
+        try:
+            return np.fromiter(map(self.lookup.get, column, repeat(self.other)), dtype=np.int64, count=len(column))
+        except TypeError:
+            # An unhashable answer somewhere in the chunk: fall back to one value at a time
+            return np.fromiter((self.encode(answer) for answer in column), dtype=np.int64, count=len(column))
+
+    def encode(self, answer):
+        """Code for a single-answer response"""
+        try:
+            return self.lookup.get(answer, self.other)
+        except TypeError:
+            return self.other
+
+    def encode_selection(self, answer):
+        """Bitmask of selected choices for a multiple-select response (-2 if unrecognised)"""
+        if not isinstance(answer, list):
+            return -2
+        mask = 0
+        for value in answer:
+            try:
+                code = self.codes.get(value)
+            except TypeError:
+                code = None
+            if code is None:
+                return -2
+            mask |= 1 << code
+        return mask
+
+
+class ItemStatistics:
+    """Sufficient statistics for one quiz version, updated chunk by chunk"""
+
+    def __init__(self, compiled):
+        self.version = compiled.version
+        self.encoders = [QuestionEncoder(question) for question in compiled.questions]
+        self.points = np.array([question.points for question in compiled.questions], dtype=np.float64)
+        question_count = len(self.encoders)
+        width = max([encoder.other + 1 for encoder in self.encoders] or [1])
+
+        self.attempt_count = 0
+        self.sum_total = 0.0
+        self.sum_total_sq = 0.0
+        self.sum_correct = np.zeros(question_count)
+        self.sum_correct_total = np.zeros(question_count)
+        self.answered = np.zeros(question_count)
+        self.option_counts = np.zeros((question_count, width))
+        self.option_total_sums = np.zeros((question_count, width))
+
+        # Newest completed_at folded in, and the attempts folded in within the overlap window before it
+        self.high_water = None
+        self.recent = {}
+        self.lock = threading.Lock()
+
+    def add_chunk(self, answer_rows):
+        """Fold a chunk of answers_json blobs into the statistics"""
+        parsed = [json.loads(row) if row else {} for row in answer_rows]
+        rows = len(parsed)
+        if not rows:
+            return
+
+        correct = np.zeros((rows, len(self.encoders)), dtype=np.float64)
+        choices = []
+        for j, encoder in enumerate(self.encoders):
+            key = encoder.question.key
+            if encoder.multiple:
+                codes = np.fromiter(
+                    (encoder.encode_selection(answers[key]) if key in answers else MISSING for answers in parsed),
+                    dtype=np.int64, count=rows
+                )
+                correct[:, j] = codes == encoder.correct_mask
+            else:
+                codes = encoder.encode_column([answers.get(key, _ABSENT) for answers in parsed])
+                correct[:, j] = np.isin(codes, encoder.correct_codes)
+            choices.append(codes)
+
+        totals = correct @ self.points
+
+        self.attempt_count += rows
+        self.sum_total += totals.sum()
+        self.sum_total_sq += totals @ totals
+        self.sum_correct += correct.sum(axis=0)
+        self.sum_correct_total += correct.T @ totals
+
+        width = self.option_counts.shape[1]
+        for j, (encoder, codes) in enumerate(zip(self.encoders, choices)):
+            self.answered[j] += np.count_nonzero(codes != MISSING)
+            if encoder.multiple:
+                unrecognised = codes == -2
+                self.option_counts[j, encoder.other] += np.count_nonzero(unrecognised)
+                self.option_total_sums[j, encoder.other] += totals[unrecognised].sum()
+                selections = np.where(codes >= 0, codes, 0)
+                for code in range(encoder.other):
+                    chosen = ((selections >> code) & 1).astype(bool)
+                    self.option_counts[j, code] += np.count_nonzero(chosen)
+                    self.option_total_sums[j, code] += totals[chosen].sum()
+            else:
+                answered = codes >= 0
+                self.option_counts[j] += np.bincount(codes[answered], minlength=width)
+                self.option_total_sums[j] += np.bincount(codes[answered], weights=totals[answered], minlength=width)
+
+    def to_dict(self):
+        """Difficulty, item-rest point-biserial and distractor statistics per question"""
+        n = self.attempt_count
+        results = {
+            'attempt_count': n,
+            'mean_total_points': float(self.sum_total / n) if n else None,
+            'questions': []
+        }
+        if not n:
+            return results
+
+        w = self.points
+        p = self.sum_correct / n
+        # Correlate each item with the rest score (total minus the item itself)
+        mean_rest = (self.sum_total - w * self.sum_correct) / n
+        mean_correct_rest = (self.sum_correct_total - w * self.sum_correct) / n
+        mean_rest_sq = (self.sum_total_sq - 2 * w * self.sum_correct_total + w * w * self.sum_correct) / n
+        covariance = mean_correct_rest - p * mean_rest
+        variance = p * (1 - p) * (mean_rest_sq - mean_rest ** 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            discrimination = np.where(variance > 1e-12, covariance / np.sqrt(variance), np.nan)
+
+        for j, encoder in enumerate(self.encoders):
+            options = []
+            for code in range(encoder.other + 1):
+                count = self.option_counts[j, code]
+                if code == encoder.other and not count:
+                    continue
+                options.append({
+                    'option': encoder.choices[code] if code < encoder.other else None,
+                    'is_correct': code in encoder.correct_code_set,
+                    'count': int(count),
+                    'proportion': float(count / n),
+                    'mean_total_points': float(self.option_total_sums[j, code] / count) if count else None
+                })
+            results['questions'].append({
+                'question_id': encoder.question.id,
+                'difficulty': float(p[j]),
+                'discrimination': None if np.isnan(discrimination[j]) else float(discrimination[j]),
+                'answered': int(self.answered[j]),
+                'options': options
+            })
+        return results
+
+
+class ItemAnalysisCache:
+    """
+    Thread-safe LRU of per-quiz item statistics, brought up to date incrementally on read
+
+    completed_at is set before an attempt commits, and attempts graded in
+    parallel commit out of that order, so a plain keyset past the newest
+    completed_at read would skip an attempt that commits late. Each read
+    re-scans the last overlap_seconds of completed attempts and folds in
+    only the ids it has not counted yet.
+    """
+
+    def __init__(self, chunk_size=5000, overlap_seconds=300, max_entries=256):
+        self.chunk_size = chunk_size
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, quiz):
+        """Fold in attempts completed since the last call and return the analysis"""
+        compiled = compiled_quiz_cache.get(quiz)
+        with self._lock:
+            stats = self._entries.get(quiz.id)
+            if stats is None or stats.version != compiled.version:
+                # Questions changed: earlier answers must be re-encoded from scratch
+                stats = ItemStatistics(compiled)
+                self._entries[quiz.id] = stats
+            self._entries.move_to_end(quiz.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        with stats.lock:
+            self._catch_up(quiz.id, stats)
+            return stats.to_dict()
+
+    def invalidate(self, quiz_id):
+        """Drop a quiz's statistics"""
+        with self._lock:
+            self._entries.pop(quiz_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _catch_up(self, quiz_id, stats):
+        """Page through completed attempts from the overlap window on, folding in unseen ones"""
+        last_completed_at = last_id = None
+        if stats.high_water is not None:
+            last_completed_at, last_id = stats.high_water - self.overlap, 0
+        while True:
+            query = db.session.query(QuizAttempt.id, QuizAttempt.completed_at)\
+                .filter(QuizAttempt.quiz_id == quiz_id, QuizAttempt.completed_at.isnot(None))
+            if last_completed_at is not None:
+                # The plain range keeps the (quiz_id, completed_at, id) index seekable
+                query = query.filter(
+                    QuizAttempt.completed_at >= last_completed_at,
+                    or_(QuizAttempt.completed_at > last_completed_at, QuizAttempt.id > last_id)
+                )
+            page = query.order_by(QuizAttempt.completed_at, QuizAttempt.id).limit(self.chunk_size).all()
+            if not page:
+                return
+            last_completed_at, last_id = page[-1].completed_at, page[-1].id
+
+            unseen = [row for row in page if row.id not in stats.recent]
+            if unseen:
+                rows = db.session.query(QuizAttempt.answers_json)\
+                    .filter(QuizAttempt.id.in_([row.id for row in unseen])).all()
+                stats.add_chunk([row.answers_json for row in rows])
+                stats.recent.update((row.id, row.completed_at) for row in unseen)
+                if stats.high_water is None or last_completed_at > stats.high_water:
+                    stats.high_water = last_completed_at
+                horizon = stats.high_water - self.overlap
+                stats.recent = {
+                    attempt_id: completed_at for attempt_id, completed_at in stats.recent.items()
+                    if completed_at >= horizon
+                }
+            if len(page) < self.chunk_size:
+                return
+
+
+item_analysis_cache = ItemAnalysisCache()
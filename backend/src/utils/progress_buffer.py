@@ -0,0 +1,263 @@
+"""
+Write-Behind Video Progress Buffer for Qryti Learn
+Coalesces player heartbeats per (user, video) in memory and flushes them as batched upserts
+"""
+
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+
+from flask import has_app_context
+
+from src.utils.watch_bitmap import segment_mask, segments_mask
+
+logger = logging.getLogger(__name__)
+
+# Position share that wakes the flusher early, so completion is not held back by the interval
+NEAR_END_PERCENTAGE = 90.0
+
+
+class PendingProgress:
+    """Heartbeats for one (user, video) merged since the last flush"""
+
+    __slots__ = ('user_id', 'video_id', 'course_id', 'module_id', 'duration_seconds', 'position',
+                 'watched', 'watch_time', 'play_count', 'pause_count', 'seek_count', 'playback_quality',
+                 'average_engagement', 'last_watched_at')
+
+    def __init__(self, user_id, video_id, course_id=None, module_id=None, duration_seconds=0):
+        self.user_id = user_id
+        self.video_id = video_id
+        self.course_id = course_id
+        self.module_id = module_id
+        self.duration_seconds = duration_seconds or 0
+        self.position = None
+        self.watched = 0  # Watched-second bitmask, see utils.watch_bitmap
+        self.watch_time = 0
+        self.play_count = 0
+        self.pause_count = 0
+        self.seek_count = 0
+        self.playback_quality = None
+        self.average_engagement = None
+        self.last_watched_at = None
+
+    def merge(self, position=None, watch_time=0, segments=None, play_count=0, pause_count=0, seek_count=0,
+              playback_quality=None, average_engagement=None):
+        """
+        Fold one heartbeat in: latest position and settings win, increments add up
+
+        Watched seconds come from explicit [start, end] segments or, without
+        them, from the watch_time seconds leading up to position. They are
+        not tracked for videos without a known duration.
+        """
+        if self.duration_seconds:
+            if segments is not None:
+                self.watched |= segments_mask(segments, self.duration_seconds)
+            elif position is not None and watch_time:
+                self.watched |= segment_mask(position - watch_time, position, self.duration_seconds)
+        if position is not None:
+            self.position = position
+        self.watch_time += watch_time or 0
+        self.play_count += play_count or 0
+        self.pause_count += pause_count or 0
+        self.seek_count += seek_count or 0
+        if playback_quality is not None:
+            self.playback_quality = playback_quality
+        if average_engagement is not None:
+            self.average_engagement = average_engagement
+        self.last_watched_at = datetime.utcnow()
+
+    def absorb(self, later):
+        """Fold in an entry for the same (user, video) merged after this one"""
+        self.watched |= later.watched
+        if later.position is not None:
+            self.position = later.position
+        self.watch_time += later.watch_time
+        self.play_count += later.play_count
+        self.pause_count += later.pause_count
+        self.seek_count += later.seek_count
+        if later.playback_quality is not None:
+            self.playback_quality = later.playback_quality
+        if later.average_engagement is not None:
+            self.average_engagement = later.average_engagement
+        if later.last_watched_at is not None:
+            self.last_watched_at = later.last_watched_at
+
+    @property
+    def near_end(self):
+        """Whether the latest position is close enough to the end that the video may now be complete"""
+        if self.position is None or not self.duration_seconds:
+            return False
+        return self.position / self.duration_seconds * 100 >= NEAR_END_PERCENTAGE
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'video_id': self.video_id,
+            'current_position_seconds': self.position,
+            'pending_watch_time_seconds': self.watch_time,
+            'pending_watched_seconds': self.watched.bit_count()
+        }
+
+
+class VideoProgressBuffer:
+    """
+    Write-behind buffer for video progress heartbeats
+
+    Heartbeats are merged per (user, video) and written every
+    ``flush_interval`` seconds by a background thread, so a viewer costs one
+    upsert per interval instead of one transaction per heartbeat. A heartbeat
+    near the end of a video, or a buffer holding ``max_pending`` entries,
+    wakes the flusher early. Entries whose write fails go back into the
+    buffer and are retried on the next interval. At most ``flush_interval``
+    seconds of progress can be lost if the process dies; a normal exit
+    flushes what is left. In synchronous mode every heartbeat is written on
+    the caller's session.
+    """
+
+    def __init__(self, app=None, flush_interval=5.0, max_pending=50000, synchronous=False):
+        self.app = None
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.synchronous = synchronous
+
+        self._pending = {}
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the buffer from app config and register it on the app"""
+        self.app = app
+        self.synchronous = app.config.get('VIDEO_PROGRESS_WRITER', 'buffered') == 'sync'
+        self.flush_interval = app.config.get('VIDEO_PROGRESS_FLUSH_INTERVAL', self.flush_interval)
+        self.max_pending = app.config.get('VIDEO_PROGRESS_MAX_PENDING', self.max_pending)
+
+        app.extensions['video_progress_buffer'] = self
+        atexit.register(self.shutdown)
+
+    def record(self, video, user_id, **heartbeat):
+        """
+        Merge one heartbeat for a user watching a Video
+
+        heartbeat takes the keyword arguments of PendingProgress.merge.
+        Returns the merged, not yet written state of this (user, video).
+        """
+        if self.synchronous:
+            entry = self._new_entry(video, user_id)
+            entry.merge(**heartbeat)
+            self._write_on_caller([entry])
+            return entry.to_dict()
+
+        self._ensure_started()
+        key = (user_id, video.id)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = self._new_entry(video, user_id)
+            entry.merge(**heartbeat)
+            snapshot = entry.to_dict()
+            wake = entry.near_end or len(self._pending) >= self.max_pending
+        if wake:
+            self._wakeup.set()
+        return snapshot
+
+    def flush(self):
+        """Write every pending entry now"""
+        with self._flush_lock:
+            entries = self._take()
+            if entries and not self._write(entries):
+                self._restore(entries)
+
+    def shutdown(self, timeout=5.0):
+        """Stop the flusher thread and write whatever is still pending"""
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            self._stopping = True
+            self._wakeup.set()
+            thread.join(timeout)
+        self._thread = None
+        self._stopping = False
+        self.flush()
+
+    def pending(self):
+        """Number of (user, video) entries waiting to be written"""
+        return len(self._pending)
+
+    def _new_entry(self, video, user_id):
+        return PendingProgress(user_id, video.id, course_id=video.course_id, module_id=video.module_id,
+                               duration_seconds=video.duration_seconds)
+
+    def _take(self):
+        """Swap out the pending entries"""
+        with self._lock:
+            entries, self._pending = list(self._pending.values()), {}
+        return entries
+
+    def _restore(self, entries):
+        """Put back entries whose write failed, ahead of heartbeats merged since they were taken"""
+        with self._lock:
+            for entry in entries:
+                key = (entry.user_id, entry.video_id)
+                later = self._pending.get(key)
+                if later is not None:
+                    entry.absorb(later)
+                self._pending[key] = entry
+
+    def _ensure_started(self):
+        """Start the flusher thread on first use in this process"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # A forked worker inherits the parent's entries, which the parent will write
+            if self._pid is not None and self._pid != os.getpid():
+                self._pending = {}
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='video-progress-buffer', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        """Flusher loop: write on every interval, or earlier when woken"""
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            self.flush()
+
+    def _write_on_caller(self, entries):
+        """Write entries using the caller's session when one is active"""
+        from src.models.user import db
+        from src.models.video import VideoProgress
+
+        if has_app_context():
+            VideoProgress.apply_heartbeats(entries)
+            db.session.commit()
+        else:
+            self._write(entries)
+
+    def _write(self, entries):
+        """Upsert entries in one transaction on a fresh app context; returns whether it committed"""
+        from src.models.user import db
+        from src.models.video import VideoProgress
+
+        with self.app.app_context():
+            try:
+                VideoProgress.apply_heartbeats(entries)
+                db.session.commit()
+                return True
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Video progress flush error ({len(entries)} entries, kept for retry): {str(e)}")
+                return False
@@ -0,0 +1,87 @@
+"""
+Progress Dashboard Aggregation for Qryti Learn
+Builds the learner dashboard payload from a fixed number of grouped queries
+"""
+
+from sqlalchemy import func
+
+from src.models.user import db
+from src.models.course import Course, Module, CourseEnrollment
+from src.models.quiz import Quiz, QuizAttempt
+from src.models.progress import Certificate
+
+
+def _course_progress_query(user_id):
+    """Build one query returning per-course progress rows for a user's enrollments"""
+    quiz_scores = db.session.query(
+        Module.course_id.label('course_id'),
+        func.avg(QuizAttempt.score).label('average_score')
+    ).join(Quiz, Quiz.id == QuizAttempt.quiz_id)\
+     .join(Module, Module.id == Quiz.module_id)\
+     .filter(QuizAttempt.user_id == user_id, QuizAttempt.score.isnot(None))\
+     .group_by(Module.course_id).subquery()
+
+    return db.session.query(
+        Course.id,
+        Course.title,
+        Course.level,
+        CourseEnrollment.status,
+        CourseEnrollment.enrolled_at,
+        CourseEnrollment.total_module_count.label('total_modules'),
+        CourseEnrollment.completed_module_count.label('completed_modules'),
+        CourseEnrollment.time_spent_minutes,
+        quiz_scores.c.average_score
+    ).join(Course, Course.id == CourseEnrollment.course_id)\
+     .outerjoin(quiz_scores, quiz_scores.c.course_id == Course.id)\
+     .filter(CourseEnrollment.user_id == user_id)\
+     .order_by(CourseEnrollment.enrolled_at)
+
+
+def build_progress_dashboard(user_id):
+    """
+    Build the progress dashboard payload for a user
+
+    Issues two queries regardless of the number of enrollments: one for the
+    per-course rows (enrollment progress counters with average quiz scores
+    joined in as a grouped subquery) and one for the certificate count.
+    """
+    rows = _course_progress_query(user_id).all()
+
+    certificates_earned = db.session.query(func.count(Certificate.id))\
+        .filter(Certificate.user_id == user_id, Certificate.is_valid == True).scalar() or 0
+
+    courses_progress = []
+    completed_courses = 0
+    total_time = 0
+
+    for row in rows:
+        total_modules = row.total_modules or 0
+        completed_modules = row.completed_modules or 0
+        time_spent = row.time_spent_minutes or 0
+
+        if row.status == 'completed':
+            completed_courses += 1
+        total_time += time_spent
+
+        courses_progress.append({
+            'id': row.id,
+            'title': row.title,
+            'level': row.level,
+            'total_modules': total_modules,
+            'completed_modules': completed_modules,
+            'completion_percentage': (completed_modules / total_modules * 100) if total_modules > 0 else 0,
+            'time_spent_minutes': time_spent,
+            'average_score': float(row.average_score) if row.average_score is not None else None,
+            'enrollment_status': row.status,
+            'enrolled_at': row.enrolled_at.isoformat() if row.enrolled_at else None
+        })
+
+    return {
+        'overview': {
+            'enrolled_courses': len(rows),
+            'completed_courses': completed_courses,
+            'certificates_earned': certificates_earned,
+            'total_time_minutes': total_time
+        },
+        'courses': courses_progress
+    }
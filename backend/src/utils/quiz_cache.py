@@ -0,0 +1,166 @@
+"""
+Compiled Quiz Cache for Qryti Learn
+Keeps pre-parsed, immutable answer keys per quiz version so grading is a single pass
+"""
+
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+CompiledQuestion = namedtuple('CompiledQuestion', [
+    'id', 'key', 'question_type', 'options', 'option_indexes', 'answer_key', 'points'
+])
+CompiledQuiz = namedtuple('CompiledQuiz', ['id', 'version', 'passing_score', 'questions', 'total_points'])
+QuestionResult = namedtuple('QuestionResult', [
+    'question_id', 'user_answer', 'selected_mask', 'is_correct', 'points_earned'
+])
+GradeResult = namedtuple('GradeResult', [
+    'score', 'passed', 'earned_points', 'total_points', 'correct_count', 'total_questions', 'question_results'
+])
+
+SINGLE_ANSWER_TYPES = ('mcq', 'true_false', 'case_study')
+
+
+def answer_matches(question_type, answer_key, user_answer):
+    """Check a user answer against a frozenset answer key"""
+    try:
+        if question_type in SINGLE_ANSWER_TYPES:
+            return user_answer in answer_key
+        if question_type == 'multiple_select':
+            # User must select all correct answers and no incorrect ones
+            return isinstance(user_answer, list) and frozenset(user_answer) == answer_key
+    except TypeError:
+        # Unhashable answers (e.g. a list for an mcq) can never match
+        return False
+    return False
+
+
+def selected_mask(question, user_answer):
+    """Bitmask of the option indexes chosen in an answer, or None if it names no known option"""
+    values = user_answer if question.question_type == 'multiple_select' else [user_answer]
+    if not isinstance(values, list):
+        return None
+    mask = 0
+    for value in values:
+        try:
+            index = question.option_indexes.get(value)
+        except TypeError:
+            index = None
+        if index is None:
+            return None
+        mask |= 1 << index
+    return mask
+
+
+def compile_question(question):
+    """Build an immutable record from a Question row"""
+    correct = json.loads(question.correct_answers_json) if question.correct_answers_json else []
+    options = json.loads(question.options_json) if question.options_json else []
+    return CompiledQuestion(
+        id=question.id,
+        key=str(question.id),
+        question_type=question.question_type,
+        options=tuple(options),
+        option_indexes=_index_options(options),
+        answer_key=frozenset(correct),
+        points=question.points
+    )
+
+
+def _index_options(options):
+    """Map each hashable option to its first index"""
+    indexes = {}
+    for index, option in enumerate(options):
+        try:
+            indexes.setdefault(option, index)
+        except TypeError:
+            continue
+    return indexes
+
+
+def compile_quiz(quiz):
+    """Build an immutable record from a Quiz row and its questions"""
+    questions = tuple(compile_question(question) for question in quiz.questions)
+    return CompiledQuiz(
+        id=quiz.id,
+        version=quiz.updated_at,
+        passing_score=quiz.passing_score,
+        questions=questions,
+        total_points=sum(question.points for question in questions)
+    )
+
+
+def grade(compiled, answers):
+    """Grade answers against a compiled quiz in one pass"""
+    answers = answers or {}
+    earned_points = 0
+    correct_count = 0
+    question_results = []
+
+    for question in compiled.questions:
+        answered = question.key in answers
+        user_answer = answers.get(question.key)
+        is_correct = answered and answer_matches(question.question_type, question.answer_key, user_answer)
+        points_earned = question.points if is_correct else 0
+        earned_points += points_earned
+        correct_count += is_correct
+        question_results.append(QuestionResult(
+            question.id,
+            user_answer,
+            selected_mask(question, user_answer) if answered else None,
+            is_correct,
+            points_earned
+        ))
+
+    total_points = compiled.total_points
+    score = (earned_points / total_points * 100) if total_points > 0 else 0
+    return GradeResult(
+        score=score,
+        passed=score >= compiled.passing_score,
+        earned_points=earned_points,
+        total_points=total_points,
+        correct_count=correct_count,
+        total_questions=len(compiled.questions),
+        question_results=tuple(question_results)
+    )
+
+
+class CompiledQuizCache:
+    """Thread-safe LRU of compiled quizzes keyed by quiz id and updated_at"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, quiz):
+        """Return the compiled form of quiz, compiling it if missing or stale"""
+        with self._lock:
+            compiled = self._entries.get(quiz.id)
+            if compiled is not None and compiled.version == quiz.updated_at:
+                self._entries.move_to_end(quiz.id)
+                return compiled
+
+        compiled = compile_quiz(quiz)
+        with self._lock:
+            self._entries[quiz.id] = compiled
+            self._entries.move_to_end(quiz.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def invalidate(self, quiz_id):
+        """Drop a quiz from the cache"""
+        with self._lock:
+            self._entries.pop(quiz_id, None)
+
+    def clear(self):
+        """Drop every cached quiz"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+compiled_quiz_cache = CompiledQuizCache()
@@ -0,0 +1,77 @@
+"""
+Watched-Segment Bitmaps for Qryti Learn
+One bit per second of a video, stored little-endian as bytes and merged as Python ints
+"""
+
+import math
+from itertools import islice
+from numbers import Real
+
+# Bounds on what a single heartbeat can make the server build: a day of seconds, a few hundred segments
+MAX_TRACKED_SECONDS = 24 * 60 * 60
+MAX_SEGMENTS = 256
+
+
+def segment_mask(start, end, duration_seconds=None):
+    """
+    Bitmask with bits [floor(start), floor(end)) set, clipped to the video length
+
+    Never reaches past MAX_TRACKED_SECONDS, with or without a duration.
+    Returns 0 for empty or invalid segments.
+    """
+    try:
+        first = max(0, math.floor(start))
+        last = math.floor(end)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+    last = min(last, duration_seconds or MAX_TRACKED_SECONDS, MAX_TRACKED_SECONDS)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def segments_mask(segments, duration_seconds=None):
+    """OR of the masks of the first MAX_SEGMENTS [start, end] pairs"""
+    mask = 0
+    for segment in islice(segments or (), MAX_SEGMENTS):
+        try:
+            start, end = segment
+        except (TypeError, ValueError):
+            continue
+        mask |= segment_mask(start, end, duration_seconds)
+    return mask
+
+
+def valid_segments(segments):
+    """Whether client-supplied segments are a list of at most MAX_SEGMENTS finite [start, end] pairs"""
+    if not isinstance(segments, list) or len(segments) > MAX_SEGMENTS:
+        return False
+    return all(
+        isinstance(segment, list) and len(segment) == 2 and all(
+            isinstance(value, Real) and not isinstance(value, bool) and math.isfinite(value) for value in segment
+        )
+        for segment in segments
+    )
+
+
+def to_mask(bitmap):
+    """Stored bytes to an int mask (None is an empty bitmap)"""
+    return int.from_bytes(bitmap, 'little') if bitmap else 0
+
+
+def to_bitmap(mask):
+    """Int mask to the shortest little-endian bytes holding it"""
+    return mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+
+
+def merge(bitmap, mask):
+    """OR a mask into stored bytes; returns (new bytes, watched seconds)"""
+    merged = to_mask(bitmap) | mask
+    return to_bitmap(merged), merged.bit_count()
+
+
+def watched_percentage(watched_seconds, duration_seconds):
+    """Share of the video covered by the bitmap, or None without a duration"""
+    if not duration_seconds:
+        return None
+    return min(100.0, watched_seconds / duration_seconds * 100)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the Qryti Learn analytics event writer
+Compares throughput and p99 latency of event-logging endpoints in sync and buffered mode
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    index = max(0, int(round(pct / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+def run_benchmark(mode, requests_count=2000):
+    """Run log-event and module-complete requests against a file-backed database"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    os.environ['ANALYTICS_EVENT_WRITER'] = mode
+
+    from flask_jwt_extended import create_access_token
+    from src.main import create_app
+    from src.models.user import db, User
+    from src.models.course import Course, Module, CourseEnrollment
+    from src.models.progress import UserProgress, LearningAnalytics
+
+    app = create_app('testing')
+    client = app.test_client()
+
+    with app.app_context():
+        user = User.create_user(email='bench@qryti.com', password='bench123',
+                                first_name='Bench', last_name='Mark')
+        course = Course(title='Benchmark Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        module = Module(course_id=course.id, title='Benchmark Module', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        db.session.add(CourseEnrollment(user_id=user.id, course_id=course.id))
+        db.session.add(UserProgress(user_id=user.id, course_id=course.id, module_id=module.id))
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+        module_id = module.id
+
+    results = {}
+    endpoints = {
+        'log-event': lambda i: client.post('/api/analytics/log-event', headers=headers,
+                                           json={'event_type': 'video_play', 'event_data': {'i': i}}),
+        'module-complete': lambda i: client.post(f'/api/progress/module/{module_id}/complete',
+                                                 headers=headers, json={'score': 90})
+    }
+
+    for name, call in endpoints.items():
+        latencies = []
+        start = time.perf_counter()
+        for i in range(requests_count):
+            request_start = time.perf_counter()
+            call(i)
+            latencies.append((time.perf_counter() - request_start) * 1000)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            'throughput_rps': requests_count / elapsed,
+            'p50_ms': percentile(latencies, 50),
+            'p99_ms': percentile(latencies, 99)
+        }
+
+    writer = app.extensions['analytics_event_writer']
+    writer.shutdown()
+    with app.app_context():
+        stored = LearningAnalytics.query.count()
+        db.session.remove()
+        db.engine.dispose()
+    os.unlink(db_file.name)
+
+    return results, stored
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print("📊 Analytics event writer benchmark")
+    print("=" * 60)
+    for mode in ('sync', 'buffered'):
+        results, stored = run_benchmark(mode, count)
+        print(f"\nMode: {mode} ({stored} events stored)")
+        for endpoint, metrics in results.items():
+            print(f"  {endpoint:16s} {metrics['throughput_rps']:8.1f} req/s   "
+                  f"p50 {metrics['p50_ms']:6.2f} ms   p99 {metrics['p99_ms']:6.2f} ms")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Qryti Learn certificate rendering
+Compares certificates/second for the platypus layout and the cached template
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend', 'src'))
+
+from utils.certificate_generator import CertificateGenerator, get_certificate_template
+
+
+def certificate_data(index):
+    """Sample certificate fields"""
+    return {
+        'recipient_name': f'Learner Number {index}',
+        'course_name': 'ISO/IEC 42001 Foundations',
+        'certificate_id': f'QRYTI-BENCH-{index:06d}',
+        'final_score': 80 + index % 20,
+        'completion_date': datetime(2026, 1, 1 + index % 28)
+    }
+
+
+def run_benchmark(count=500):
+    """Render count certificates through each path; returns certificates/second per path"""
+    output_dir = tempfile.mkdtemp()
+    try:
+        def legacy(data, path):
+            # The current per-call path: new generator and full platypus layout
+            CertificateGenerator().generate_certificate(data, path)
+
+        template = get_certificate_template()
+        results = {}
+        for name, render in (('platypus', legacy), ('template', template.render)):
+            started = time.perf_counter()
+            for index in range(count):
+                render(certificate_data(index), os.path.join(output_dir, f'{name}_{index}.pdf'))
+            elapsed = time.perf_counter() - started
+            results[name] = count / elapsed
+        return results
+    finally:
+        shutil.rmtree(output_dir)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print("📊 Certificate rendering benchmark")
+    print("=" * 60)
+    results = run_benchmark(count)
+    for name, rate in results.items():
+        print(f"  {name:<10} {rate:8.1f} certificates/s")
+    print(f"  speedup    {results['template'] / results['platypus']:8.1f}x")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Qryti Learn quiz item analysis
+Times a cold analysis over many attempts and an incremental refresh after new ones
+"""
+
+import sys
+import os
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+
+def run_benchmark(attempt_count=500000, question_count=20, chunk_size=5000):
+    """Load attempts into a file-backed database and analyse them"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+
+    from sqlalchemy import insert
+    from src.main import create_app
+    from src.models.user import db, User
+    from src.models.course import Course, Module
+    from src.models.quiz import Quiz, Question, QuizAttempt
+    from src.utils.item_analysis import ItemAnalysisCache
+
+    app = create_app('testing')
+    rng = random.Random(1)
+    options = ['A', 'B', 'C', 'D']
+
+    with app.app_context():
+        user = User(email='items@qryti.com', password_hash='x', first_name='Item', last_name='Bench')
+        course = Course(title='Item Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        module = Module(course_id=course.id, title='Item Module', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        quiz = Quiz(module_id=module.id, title='Item Quiz')
+        db.session.add(quiz)
+        db.session.flush()
+        questions = [Question.create_mcq(quiz.id, f'Q{i}', options, 'A', order_index=i)
+                     for i in range(question_count)]
+        db.session.add_all(questions)
+        db.session.commit()
+        keys = [str(q.id) for q in questions]
+        quiz_id, user_id = quiz.id, user.id
+
+        def insert_attempts(count, start):
+            for offset in range(0, count, 20000):
+                rows = []
+                for i in range(offset, min(count, offset + 20000)):
+                    answers = {key: rng.choice(options) for key in keys}
+                    rows.append({'user_id': user_id, 'quiz_id': quiz_id, 'total_questions': question_count,
+                                 'answers_json': json.dumps(answers),
+                                 'completed_at': start + timedelta(seconds=i)})
+                db.session.execute(insert(QuizAttempt), rows)
+            db.session.commit()
+
+        load_start = time.perf_counter()
+        insert_attempts(attempt_count, datetime(2025, 1, 1))
+        load_seconds = time.perf_counter() - load_start
+
+        cache = ItemAnalysisCache(chunk_size=chunk_size)
+        start = time.perf_counter()
+        analysis = cache.get(db.session.get(Quiz, quiz_id))
+        cold_seconds = time.perf_counter() - start
+
+        # Memory is traced on a separate cold run since tracing slows it down
+        tracemalloc.start()
+        ItemAnalysisCache(chunk_size=chunk_size).get(db.session.get(Quiz, quiz_id))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        insert_attempts(10000, datetime(2026, 1, 1))
+        start = time.perf_counter()
+        refreshed = cache.get(db.session.get(Quiz, quiz_id))
+        incremental_seconds = time.perf_counter() - start
+
+        db.session.remove()
+        db.engine.dispose()
+
+    os.unlink(db_file.name)
+    del os.environ['DATABASE_URL']
+    return {
+        'attempts': analysis['attempt_count'],
+        'load_seconds': load_seconds,
+        'cold_seconds': cold_seconds,
+        'peak_mb': peak / 1024 / 1024,
+        'incremental_attempts': refreshed['attempt_count'] - analysis['attempt_count'],
+        'incremental_seconds': incremental_seconds
+    }
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    print("📊 Quiz item analysis benchmark")
+    print("=" * 60)
+    metrics = run_benchmark(count)
+    print(f"  loaded {count} attempts in {metrics['load_seconds']:.1f} s")
+    print(f"  cold analysis of {metrics['attempts']} attempts: {metrics['cold_seconds']:.2f} s "
+          f"(peak traced memory {metrics['peak_mb']:.1f} MB)")
+    print(f"  incremental refresh of {metrics['incremental_attempts']} attempts: "
+          f"{metrics['incremental_seconds']:.3f} s")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Qryti Learn quiz submissions under a cohort exam burst
+Runs parallel submitters against /api/quizzes/<id>/submit, with grading inline or on the
+exam-mode background queue, and checks attempt limits hold
+"""
+
+import sys
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    index = max(0, int(round(pct / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+def run_benchmark(submitters=200, submissions_per_user=5, max_attempts=3, question_count=20, exam_mode=False):
+    """Each submitter posts more submissions than allowed, all in parallel"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    os.environ['QUIZ_GRADING_MODE'] = 'async'
+
+    from flask_jwt_extended import create_access_token
+    from src.main import create_app
+    from src.models.user import db, User
+    from src.models.course import Course, Module
+    from src.models.quiz import Quiz, Question, QuizAttempt
+
+    app = create_app('testing')
+
+    with app.app_context():
+        course = Course(title='Exam Course', level=1, duration_hours=1.0)
+        db.session.add(course)
+        db.session.flush()
+        module = Module(course_id=course.id, title='Exam Module', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        quiz = Quiz(module_id=module.id, title='Cohort Exam', max_attempts=max_attempts, exam_mode=exam_mode)
+        db.session.add(quiz)
+        db.session.flush()
+        questions = [Question.create_mcq(quiz.id, f'Question {i}', ['A', 'B', 'C', 'D'], 'A', order_index=i)
+                     for i in range(question_count)]
+        users = [User(email=f'exam{i}@qryti.com', password_hash='x', first_name='Exam', last_name=str(i))
+                 for i in range(submitters)]
+        db.session.add_all(questions + users)
+        db.session.commit()
+        quiz_id = quiz.id
+        answers = {str(q.id): 'A' for q in questions}
+        tokens = [create_access_token(identity=str(u.id)) for u in users]
+
+    jobs = [tokens[i % submitters] for i in range(submitters * submissions_per_user)]
+
+    def submit(token):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post(f'/api/quizzes/{quiz_id}/submit',
+                               headers={'Authorization': f'Bearer {token}'},
+                               json={'answers': answers, 'time_taken': 600})
+        return response.status_code, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=submitters) as pool:
+        results = list(pool.map(submit, jobs))
+    elapsed = time.perf_counter() - start
+
+    # Sustained rate counts until every accepted submission has been graded
+    grading_queue = app.extensions['quiz_grading_queue']
+    grading_queue.join()
+    graded_elapsed = time.perf_counter() - start
+    grading_queue.shutdown()
+
+    with app.app_context():
+        per_user = db.session.query(QuizAttempt.user_id, db.func.count(QuizAttempt.id))\
+            .filter_by(quiz_id=quiz_id).group_by(QuizAttempt.user_id).all()
+        db.session.remove()
+        db.engine.dispose()
+    os.unlink(db_file.name)
+    del os.environ['DATABASE_URL']
+    del os.environ['QUIZ_GRADING_MODE']
+
+    latencies = [latency for _, latency in results]
+    statuses = [status for status, _ in results]
+    accepted_status = 202 if exam_mode else 200
+    return {
+        'requests': len(results),
+        'throughput_rps': len(results) / elapsed,
+        'sustained_rps': len(results) / graded_elapsed,
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'accepted': statuses.count(accepted_status),
+        'limited': statuses.count(400),
+        'errors': len(statuses) - statuses.count(accepted_status) - statuses.count(400),
+        'max_attempts_per_user': max(count for _, count in per_user)
+    }
+
+
+if __name__ == '__main__':
+    submitters = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print("📊 Quiz submission burst benchmark")
+    print("=" * 60)
+    for exam_mode in (False, True):
+        metrics = run_benchmark(submitters, exam_mode=exam_mode)
+        print(f"\nGrading: {'background queue (exam mode)' if exam_mode else 'inline'}")
+        print(f"  {metrics['requests']} submissions from {submitters} parallel submitters")
+        print(f"  {metrics['throughput_rps']:8.1f} req/s acknowledged   "
+              f"{metrics['sustained_rps']:8.1f} submissions/s graded")
+        print(f"  p50 {metrics['p50_ms']:7.2f} ms   p99 {metrics['p99_ms']:7.2f} ms")
+        print(f"  accepted {metrics['accepted']}   limited {metrics['limited']}   errors {metrics['errors']}")
+        print(f"  most attempts stored for one user: {metrics['max_attempts_per_user']}")
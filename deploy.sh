@@ -62,6 +62,7 @@ create_env_file() {
         cat > .env << EOF
 # Qryti Learn Environment Configuration
 JWT_SECRET_KEY=$(openssl rand -hex 32)
+CERTIFICATE_SIGNING_KEY=$(openssl rand -hex 32)
 POSTGRES_PASSWORD=$(openssl rand -hex 16)
 FLASK_ENV=production
 DATABASE_URL=sqlite:///src/database/app.db
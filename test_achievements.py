@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn achievement counters
+Checks incremental maintenance from source events, single-lookup reads and the rebuild job
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import event
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module, CourseEnrollment
+from src.models.quiz import Quiz, Question, QuizAttempt
+from src.models.progress import Certificate, StudySession, UserProgress
+from src.models.achievement import UserAchievementCounter
+
+
+def test_counters_follow_source_events():
+    """Quiz passes, completions, certificates and study time feed achievements"""
+    app = create_app('testing')
+
+    with app.app_context():
+        user = User.create_user(email='achiever@qryti.com', password='test123',
+                                first_name='Achieve', last_name='Ment')
+        course = Course(title='Achievement Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        module = Module(course_id=course.id, title='Achievement Module', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        quiz = Quiz(module_id=module.id, title='Achievement Quiz', max_attempts=20)
+        db.session.add(quiz)
+        db.session.flush()
+        question = Question.create_mcq(quiz.id, 'Pick A', ['A', 'B'], 'A')
+        db.session.add(question)
+        enrollment = CourseEnrollment(user_id=user.id, course_id=course.id)
+        db.session.add(enrollment)
+        db.session.commit()
+        user_id = user.id
+
+        for answer in ['A'] * 10 + ['B'] * 2:
+            attempt = QuizAttempt(user_id=user_id, quiz_id=quiz.id, total_questions=1)
+            db.session.add(attempt)
+            attempt.complete_attempt({str(question.id): answer})
+
+        StudySession.record(user_id, 45.5, course_id=course.id)
+        db.session.commit()
+        enrollment.complete_course(90)
+        enrollment.complete_course(90)
+        certificate = Certificate.create_certificate(user_id, course.id, 90)
+        Certificate.create_certificate(user_id, course.id, 90)
+
+        db.session.expire_all()
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda *args: statements.append(args[2]))
+        achievements = {a['id']: a for a in UserAchievementCounter.get_achievements(user_id)}
+        assert len(statements) == 1
+
+        assert achievements['first_course']['completed']
+        assert achievements['quiz_master']['current'] == 10
+        assert achievements['quiz_master']['completed']
+        assert achievements['time_keeper']['current'] == 45.5
+        assert achievements['certificate_collector']['current'] == 1
+
+        certificate.revoke()
+        counters = db.session.get(UserAchievementCounter, user_id).to_dict()
+        assert counters['certificates_earned'] == 0
+
+        db.session.execute(db.delete(UserAchievementCounter))
+        db.session.commit()
+        assert UserAchievementCounter.rebuild(user_id=user_id) == 1
+        db.session.expire_all()
+        assert db.session.get(UserAchievementCounter, user_id).to_dict() == counters
+
+
+def test_rebuild_script_counts_study_time_from_before_the_ledger():
+    """The counter rebuild backfills pre-ledger module minutes instead of resetting Time Keeper"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    try:
+        app = create_app('testing')
+        with app.app_context():
+            user = User(email='veteran@qryti.com', password_hash='x', first_name='Old', last_name='Timer')
+            course = Course(title='Veteran Course', level=1, duration_hours=1.0)
+            db.session.add_all([user, course])
+            db.session.flush()
+            module = Module(course_id=course.id, title='Veteran Module', order_index=1)
+            db.session.add(module)
+            db.session.flush()
+            db.session.add(UserProgress(user_id=user.id, course_id=course.id, module_id=module.id,
+                                        time_spent_minutes=600,
+                                        last_accessed=datetime.utcnow() - timedelta(days=90)))
+            db.session.commit()
+            user_id = user.id
+            db.session.remove()
+            db.engine.dispose()
+
+        from rebuild_achievement_counters import rebuild_achievement_counters
+        rebuild_achievement_counters(user_id)
+
+        with app.app_context():
+            achievements = {a['id']: a for a in UserAchievementCounter.get_achievements(user_id)}
+            assert achievements['time_keeper']['current'] == 600
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        del os.environ['DATABASE_URL']
+        os.unlink(db_file.name)
+
+
+if __name__ == '__main__':
+    test_counters_follow_source_events()
+    test_rebuild_script_counts_study_time_from_before_the_ledger()
+    print("✅ Achievement counter test passed")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn batch analytics ingestion
+Checks per-item validation and single-transaction writes for /api/analytics/log-events
+"""
+
+import sys
+import os
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.progress import LearningAnalytics
+
+
+def test_batch_events_are_validated_per_item():
+    """Valid events are stored with client timestamps, invalid ones are reported"""
+    app = create_app('testing')
+    client = app.test_client()
+
+    with app.app_context():
+        user = User.create_user(email='batch@qryti.com', password='test123',
+                                first_name='Batch', last_name='Events')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+    events = [{'event_type': 'video_play', 'event_data': {'video_id': i},
+               'timestamp': '2025-07-01T10:00:00Z'} for i in range(300)]
+    events.append({'event_data': {}})
+    events.append({'event_type': 'video_seek', 'timestamp': 'yesterday'})
+    events.append({'event_type': 'video_pause', 'timestamp': '2999-01-01T00:00:00'})
+
+    response = client.post('/api/analytics/log-events', json={'events': events}, headers=headers)
+    assert response.status_code == 200
+
+    data = response.get_json()
+    assert data['accepted'] == 300
+    assert data['rejected'] == 3
+    assert [r['status'] for r in data['results'][-3:]] == ['rejected'] * 3
+
+    with app.app_context():
+        stored = LearningAnalytics.query.filter_by(user_id=user_id).all()
+        assert len(stored) == 300
+        assert stored[0].timestamp.isoformat() == '2025-07-01T10:00:00'
+
+    response = client.post('/api/analytics/log-events', json={'events': []}, headers=headers)
+    assert response.status_code == 400
+
+
+if __name__ == '__main__':
+    test_batch_events_are_validated_per_item()
+    print("✅ Batch analytics ingestion test passed")
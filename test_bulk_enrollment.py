@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn organization-scoped bulk enrollment
+Checks targeting, deduplication, chunked inserts, counters and the summary records
+"""
+
+import sys
+import os
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, insert
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.admin import AdminUser, Organization, AuditLog
+from src.models.course import Course, CourseEnrollment
+from src.models.progress import LearningAnalytics
+
+
+def count_queries(app, func):
+    """Run func and return (result, number of SQL statements executed)"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        return func(), len(statements)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def setup(app, learners=5000):
+    """Two organizations of learners, an org admin and a course; returns (headers, course_id, user ids)"""
+    with app.app_context():
+        acme = Organization(name='Acme', slug='acme')
+        globex = Organization(name='Globex', slug='globex')
+        course = Course(title='Bulk Course', level=1, duration_hours=1.0)
+        admin = User(email='orgadmin@acme.com', password_hash='x', first_name='Org', last_name='Admin',
+                     organization='Acme')
+        db.session.add_all([acme, globex, course, admin])
+        db.session.flush()
+        db.session.add(AdminUser(user_id=admin.id, organization_id=acme.id, can_manage_organization=True))
+        db.session.execute(insert(User), [{
+            'email': f'learner{i}@example.com', 'password_hash': 'x', 'first_name': 'Learner',
+            'last_name': str(i), 'organization': 'Acme' if i % 5 else 'Globex',
+            'department': 'Risk' if i % 2 else 'Audit', 'is_active': i % 100 != 1, 'role': 'student'
+        } for i in range(learners)])
+        db.session.commit()
+
+        ids = dict(db.session.execute(db.select(User.email, User.id)).all())
+        # One learner enrolled themselves already
+        CourseEnrollment.enroll_user(ids['learner3@example.com'], course.id)
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+        return headers, course.id, ids
+
+
+def test_department_bulk_enrollment_is_chunked_and_deduplicated():
+    """A department is enrolled in a few set-based statements with one audit and analytics record"""
+    app = create_app('testing')
+    app.config['BULK_ENROLL_CHUNK_SIZE'] = 500
+    client = app.test_client()
+    headers, course_id, ids = setup(app)
+    url = f'/api/enterprise/courses/{course_id}/bulk-enroll'
+
+    response, queries = count_queries(app, lambda: client.post(url, json={'department': 'Risk'}, headers=headers))
+    assert response.status_code == 200
+    summary = response.get_json()['summary']
+    # Odd learners in Acme (i % 5 != 0) that are active (i % 100 != 1)
+    expected = [i for i in range(5000) if i % 2 and i % 5 and i % 100 != 1]
+    assert summary['matched'] == len(expected)
+    assert summary['already_enrolled'] == 1 and summary['enrolled'] == len(expected) - 1
+    assert queries < 40
+
+    with app.app_context():
+        enrolled = set(db.session.scalars(db.select(CourseEnrollment.user_id).where(CourseEnrollment.course_id == course_id)))
+        assert enrolled == {ids[f'learner{i}@example.com'] for i in expected}
+        assert db.session.get(Course, course_id).enrollment_count == len(expected)
+        audit = AuditLog.query.filter_by(action='bulk_enroll').one()
+        assert audit.audit_metadata['enrolled'] == summary['enrolled']
+        assert audit.audit_metadata['organization'] == 'Acme'
+        assert LearningAnalytics.query.filter_by(event_type='course_bulk_enrolled').count() == 1
+
+    # Repeating the call enrolls nobody
+    summary = client.post(url, json={'department': 'Risk'}, headers=headers).get_json()['summary']
+    assert summary['enrolled'] == 0 and summary['already_enrolled'] == len(expected)
+
+
+def test_bulk_enrollment_by_ids_is_scoped_to_the_admin_organization():
+    """Explicit ids outside the admin's organization, inactive or unknown are skipped"""
+    app = create_app('testing')
+    client = app.test_client()
+    headers, course_id, ids = setup(app, learners=20)
+    url = f'/api/enterprise/courses/{course_id}/bulk-enroll'
+
+    # Duplicates are ignored
+    user_ids = [ids[f'learner{i}@example.com'] for i in (2, 3, 5, 1, 7, 2)] + [999999]
+    response = client.post(url, json={'user_ids': user_ids}, headers=headers)
+    assert response.status_code == 200
+    # learner5 is in Globex, learner1 is inactive, 999999 does not exist, learner3 is already enrolled
+    assert response.get_json()['summary'] == {
+        'course_id': course_id, 'matched': 3, 'enrolled': 2, 'already_enrolled': 1, 'skipped': 3
+    }
+
+    assert client.post(url, json={'organization': 'Globex'}, headers=headers).status_code == 403
+    assert client.post(url, json={}, headers=headers).status_code == 400
+    assert client.post(url, json={'user_ids': ['1']}, headers=headers).status_code == 400
+    assert client.post('/api/enterprise/courses/9999/bulk-enroll', json={'department': 'Risk'},
+                       headers=headers).status_code == 404
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
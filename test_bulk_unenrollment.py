@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn set-based bulk unenrollment
+Checks dry-run counts, batched cascade deletes, counter upkeep and the audit record
+"""
+
+import sys
+import os
+from datetime import datetime
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.admin import AdminUser, Organization, AuditLog
+from src.models.achievement import UserAchievementCounter
+from src.models.course import Course, Module, CourseEnrollment
+from src.models.progress import UserProgress
+from src.models.quiz import Quiz, QuizAttempt, QuizAnswer, QuizAttemptCounter, QuizStats
+from src.models.video import Video, VideoProgress
+from src.utils.item_analysis import item_analysis_cache
+
+
+def setup(app):
+    """Learners of two organizations with progress, attempts and video progress in two courses"""
+    with app.app_context():
+        acme = Organization(name='Acme', slug='acme')
+        admin = User(email='orgadmin@acme.com', password_hash='x', first_name='Org', last_name='Admin',
+                     organization='Acme')
+        courses = [Course(title=f'Course {i}', level=1, duration_hours=1.0) for i in range(2)]
+        db.session.add_all([acme, admin] + courses)
+        db.session.flush()
+        db.session.add(AdminUser(user_id=admin.id, organization_id=acme.id, can_manage_organization=True))
+        modules = [Module(course_id=course.id, title='Intro', order_index=1) for course in courses]
+        db.session.add_all(modules)
+        db.session.flush()
+        quizzes = [Quiz(module_id=module.id, title='Check') for module in modules]
+        videos = [Video(title='Intro', youtube_id=f'yt{module.id}', youtube_url='https://youtu.be/x',
+                        module_id=module.id, course_id=module.course_id) for module in modules]
+        db.session.add_all(quizzes + videos)
+        db.session.flush()
+
+        learners = []
+        for i in range(7):
+            learner = User(email=f'learner{i}@example.com', password_hash='x', first_name='L', last_name=str(i),
+                           organization='Globex' if i == 6 else 'Acme', department='Risk' if i % 2 else 'Audit')
+            db.session.add(learner)
+            db.session.flush()
+            learners.append(learner.id)
+            for course, module, quiz, video in zip(courses, modules, quizzes, videos):
+                status = 'completed' if i == 5 and course is courses[0] else 'in_progress'
+                db.session.add(CourseEnrollment(user_id=learner.id, course_id=course.id, status=status))
+                db.session.add(UserProgress(user_id=learner.id, course_id=course.id, module_id=module.id))
+                attempt = QuizAttempt(user_id=learner.id, quiz_id=quiz.id, total_questions=1, score=100.0,
+                                      passed=True, completed_at=datetime.utcnow())
+                db.session.add(attempt)
+                db.session.flush()
+                db.session.add(QuizAnswer(attempt_id=attempt.id, question_id=1, answered=True, is_correct=True))
+                db.session.add(QuizAttemptCounter(user_id=learner.id, quiz_id=quiz.id, attempt_count=1))
+                db.session.add(VideoProgress(user_id=learner.id, video_id=video.id))
+            UserAchievementCounter.increment(learner.id, quizzes_passed=2, courses_completed=1 if i == 5 else 0)
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+        return headers, [course.id for course in courses], [quiz.id for quiz in quizzes], learners
+
+
+def test_department_unenrollment_dry_run_then_cascade():
+    """A dry run counts what a real run then deletes, batch by batch, keeping counters in step"""
+    app = create_app('testing')
+    app.config['BULK_UNENROLL_BATCH_SIZE'] = 2
+    client = app.test_client()
+    headers, course_ids, quiz_ids, learners = setup(app)
+    body = {'course_id': course_ids[0], 'department': 'Risk',
+            'include_quiz_attempts': True, 'include_video_progress': True}
+
+    # Risk learners in Acme are 1, 3 and 5; learner 5 completed the course and is kept
+    expected = {'course_enrollments': 2, 'user_progress': 2, 'quiz_attempts': 2, 'quiz_answers': 2,
+                'video_progress': 2}
+    response = client.post('/api/enterprise/enrollments/bulk-unenroll', json=dict(body, dry_run=True),
+                           headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['summary'] == dict(expected, dry_run=True)
+    with app.app_context():
+        assert CourseEnrollment.query.count() == 14 and AuditLog.query.count() == 0
+
+    response = client.post('/api/enterprise/enrollments/bulk-unenroll', json=body, headers=headers)
+    assert response.get_json()['summary'] == dict(expected, dry_run=False)
+
+    with app.app_context():
+        removed = {learners[1], learners[3]}
+        remaining = {(row.user_id, row.course_id) for row in CourseEnrollment.query}
+        assert len(remaining) == 12 and not {(user_id, course_ids[0]) for user_id in removed} & remaining
+        assert UserProgress.query.filter(UserProgress.user_id.in_(removed),
+                                         UserProgress.course_id == course_ids[0]).count() == 0
+        assert UserProgress.query.count() == 12 and VideoProgress.query.count() == 12
+        assert QuizAttempt.query.count() == 12 and QuizAnswer.query.count() == 12
+        assert QuizAttemptCounter.query.filter(QuizAttemptCounter.user_id.in_(removed),
+                                               QuizAttemptCounter.quiz_id == quiz_ids[0]).count() == 0
+        assert db.session.get(Course, course_ids[0]).enrollment_count == 5
+        stats = db.session.get(QuizStats, quiz_ids[0])
+        assert (stats.attempt_count, stats.completion_count, stats.pass_count) == (5, 5, 5)
+        assert db.session.get(UserAchievementCounter, learners[1]).quizzes_passed == 1
+        audit = AuditLog.query.filter_by(action='bulk_unenroll').one()
+        assert audit.resource_id == course_ids[0] and audit.audit_metadata['course_enrollments'] == 2
+
+
+def test_organization_cleanup_across_courses_is_scoped():
+    """Removing an organization from every course leaves other organizations and completions alone"""
+    app = create_app('testing')
+    client = app.test_client()
+    headers, course_ids, quiz_ids, learners = setup(app)
+
+    response = client.post('/api/enterprise/enrollments/bulk-unenroll', json={'organization': 'Globex'},
+                           headers=headers)
+    assert response.status_code == 403
+
+    response = client.post('/api/enterprise/enrollments/bulk-unenroll',
+                           json={'user_ids': learners}, headers=headers)
+    # Learner 6 belongs to Globex; learner 5's completed enrollment stays
+    assert response.get_json()['summary'] == {'course_enrollments': 11, 'user_progress': 11, 'dry_run': False}
+    with app.app_context():
+        remaining = {(row.user_id, row.course_id) for row in CourseEnrollment.query}
+        assert remaining == {(learners[5], course_ids[0]), (learners[6], course_ids[0]), (learners[6], course_ids[1])}
+        # Attempts were not requested, so they are kept
+        assert QuizAttempt.query.count() == 14
+        assert [db.session.get(Course, course_id).enrollment_count for course_id in course_ids] == [2, 1]
+
+    assert client.post('/api/enterprise/enrollments/bulk-unenroll', json={'course_id': course_ids[0]},
+                       headers=headers).status_code == 400
+
+
+def test_removing_completed_enrollments_keeps_achievements_consistent():
+    """Deleting a completion takes it off the achievement counter and out of cached item statistics"""
+    app = create_app('testing')
+    client = app.test_client()
+    headers, course_ids, quiz_ids, learners = setup(app)
+    with app.app_context():
+        assert item_analysis_cache.get(db.session.get(Quiz, quiz_ids[0]))['attempt_count'] == 7
+
+    response = client.post('/api/enterprise/enrollments/bulk-unenroll', headers=headers, json={
+        'course_id': course_ids[0], 'user_ids': [learners[5]], 'include_completed': True,
+        'include_quiz_attempts': True
+    })
+    assert response.get_json()['summary']['course_enrollments'] == 1
+
+    with app.app_context():
+        counters = db.session.get(UserAchievementCounter, learners[5])
+        assert (counters.courses_completed, counters.quizzes_passed) == (0, 1)
+        first_steps = UserAchievementCounter.get_achievements(learners[5])[0]
+        assert first_steps['id'] == 'first_course' and not first_steps['completed']
+        assert item_analysis_cache.get(db.session.get(Quiz, quiz_ids[0]))['attempt_count'] == 6
+
+        # A rebuild from the remaining rows agrees with the maintained counters
+        maintained = counters.to_dict()
+        UserAchievementCounter.rebuild(user_id=learners[5])
+        db.session.expire_all()
+        assert db.session.get(UserAchievementCounter, learners[5]).to_dict() == maintained
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn certificate artifact storage
+Checks content addressing, conditional and range downloads, X-Accel-Redirect and render dedupe
+"""
+
+import sys
+import os
+import hashlib
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course
+from src.models.progress import Certificate, CertificateRenderJob
+from src.utils.certificate_generator import render_certificate_pdf
+import src.utils.certificate_jobs as certificate_jobs
+
+
+def create_certificate(app):
+    """Create a learner with a certificate (no PDF yet); returns (headers, certificate_id)"""
+    with app.app_context():
+        user = User(email='artifact@qryti.com', password_hash='x', first_name='Art', last_name='Ifact')
+        course = Course(title='Artifact Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        certificate = Certificate.create_certificate(user.id, course.id, 93.0)
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+        return headers, certificate.certificate_id
+
+
+def test_rendering_is_content_addressed():
+    """The same certificate renders to the same bytes and is stored once under its hash"""
+    output_dir = tempfile.mkdtemp()
+    data = {'recipient_name': 'Art Ifact', 'course_name': 'Artifact Course',
+            'certificate_id': 'QRYTI-ART', 'final_score': 93.0, 'completion_date': '2026-01-01'}
+    first = render_certificate_pdf(data, output_dir)
+    second = render_certificate_pdf(data, output_dir)
+    assert first == second
+    with open(first, 'rb') as pdf:
+        assert os.path.basename(first) == hashlib.sha256(pdf.read()).hexdigest() + '.pdf'
+    assert sorted(os.listdir(output_dir)) == [os.path.basename(first)[:2]]
+
+
+def test_download_supports_etag_and_range():
+    """Downloads carry the content hash as ETag and honour If-None-Match and Range"""
+    app = create_app('testing')
+    app.extensions['certificate_render_queue'].output_dir = tempfile.mkdtemp()
+    client = app.test_client()
+    headers, certificate_id = create_certificate(app)
+    url = f'/api/certificates/{certificate_id}/download'
+
+    # Rendering is synchronous in testing, so the first download already has the PDF
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    body = response.data
+    etag = hashlib.sha256(body).hexdigest()
+    assert response.headers['ETag'] == f'"{etag}"'
+    last_modified = response.headers['Last-Modified']
+    assert last_modified
+
+    response = client.get(url, headers=dict(headers, **{'If-None-Match': f'"{etag}"'}))
+    assert response.status_code == 304 and not response.data
+
+    response = client.get(url, headers=dict(headers, Range='bytes=0-99'))
+    assert response.status_code == 206 and response.data == body[:100]
+
+    app.config['CERTIFICATE_X_ACCEL_PREFIX'] = '/protected-certificates/'
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200 and not response.data
+    assert response.headers['X-Accel-Redirect'] == f'/protected-certificates/{etag[:2]}/{etag}.pdf'
+    response = client.get(url, headers=dict(headers, **{'If-None-Match': f'"{etag}"'}))
+    assert response.status_code == 304
+    assert 'X-Accel-Redirect' not in response.headers
+    assert response.headers['ETag'] == f'"{etag}"'
+    response = client.get(url, headers=dict(headers, **{'If-Modified-Since': last_modified}))
+    assert response.status_code == 304
+    assert 'X-Accel-Redirect' not in response.headers
+
+
+def test_concurrent_downloads_render_once(monkeypatch):
+    """Simultaneous downloads of a missing PDF share one render job"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    try:
+        app = create_app('testing')
+    finally:
+        del os.environ['DATABASE_URL']
+    app.extensions['certificate_render_queue'].output_dir = tempfile.mkdtemp()
+    headers, certificate_id = create_certificate(app)
+
+    renders = []
+    real_render = certificate_jobs.render_certificate_pdf
+
+    def slow_render(render_data, output_dir):
+        renders.append(render_data['certificate_id'])
+        time.sleep(0.2)
+        return real_render(render_data, output_dir)
+
+    monkeypatch.setattr(certificate_jobs, 'render_certificate_pdf', slow_render)
+    statuses = []
+
+    def download():
+        statuses.append(app.test_client().get(f'/api/certificates/{certificate_id}/download',
+                                              headers=headers).status_code)
+
+    try:
+        threads = [threading.Thread(target=download) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert renders == [certificate_id]
+        assert statuses == [200] * 6
+        with app.app_context():
+            assert CertificateRenderJob.query.count() == 1
+    finally:
+        os.unlink(db_file.name)
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn bulk certificate issuance
+Checks cohort eligibility, chunked issuance, render fan-out, progress and resume
+"""
+
+import sys
+import os
+import tempfile
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, CourseEnrollment
+from src.models.achievement import UserAchievementCounter
+from src.models.progress import Certificate, CertificateIssuance, CertificateRenderJob
+import src.utils.certificate_jobs as certificate_jobs
+
+
+def create_cohort(app, completed=25):
+    """Create an admin and a course with a cohort of learners; returns (headers, course_id)"""
+    with app.app_context():
+        admin = User.create_user(email='admin@qryti.com', password='test123',
+                                 first_name='Ada', last_name='Admin', role='admin')
+        course = Course(title='Cohort Course', level=1, duration_hours=1.0)
+        db.session.add_all([admin, course])
+        db.session.flush()
+        for index in range(completed + 2):
+            learner = User(email=f'learner{index}@qryti.com', password_hash='x',
+                           first_name='Learner', last_name=str(index))
+            db.session.add(learner)
+            db.session.flush()
+            # Two learners are not eligible: one still in progress, one already certified
+            status = 'in_progress' if index == completed else 'completed'
+            db.session.add(CourseEnrollment(user_id=learner.id, course_id=course.id,
+                                            status=status, final_score=80.0 + index % 20))
+            if index == completed + 1:
+                db.session.add(Certificate(user_id=learner.id, course_id=course.id, final_score=90.0,
+                                           certificate_id='QRYTI-EXISTING', verification_code='EXIST001'))
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+        return headers, course.id
+
+
+def make_app():
+    """Testing app with small issuance chunks and a private output directory"""
+    app = create_app('testing')
+    app.config['CERTIFICATE_ISSUE_CHUNK_SIZE'] = 10
+    app.extensions['certificate_render_queue'].output_dir = tempfile.mkdtemp()
+    return app
+
+
+def test_bulk_issuance_renders_whole_cohort(monkeypatch):
+    """Eligible learners get one certificate each; failed renders are retried on resume"""
+    app = make_app()
+    client = app.test_client()
+    headers, course_id = create_cohort(app)
+
+    failing = {'enabled': True}
+    real_render = certificate_jobs.render_certificate_pdf
+
+    def flaky_render(render_data, output_dir):
+        if render_data['recipient_name'] in ('Learner 3', 'Learner 17') and failing['enabled']:
+            raise IOError('renderer crashed')
+        return real_render(render_data, output_dir)
+
+    monkeypatch.setattr(certificate_jobs, 'render_certificate_pdf', flaky_render)
+    response = client.post(f'/api/certificates/admin/courses/{course_id}/issue', headers=headers)
+    assert response.status_code == 202
+    issuance = response.get_json()['issuance']
+    assert issuance['issued'] == 25
+    assert issuance['rendered'] == 23 and issuance['failed'] == 2
+    assert issuance['status'] == 'completed_with_errors'
+
+    with app.app_context():
+        assert Certificate.query.filter_by(course_id=course_id).count() == 26
+        assert len({c.verification_code for c in Certificate.query.all()}) == 26
+        counters = UserAchievementCounter.query.all()
+        assert len(counters) == 25 and all(c.certificates_earned == 1 for c in counters)
+
+    # Re-issuing finds nobody left; resuming retries only the failed renders
+    failing['enabled'] = False
+    response = client.post(f'/api/certificates/admin/issuances/{issuance["issuance_id"]}/resume',
+                           headers=headers)
+    assert response.status_code == 202
+    issuance = response.get_json()['issuance']
+    assert issuance['issued'] == 25 and issuance['rendered'] == 25
+    assert issuance['status'] == 'completed' and issuance['progress_percentage'] == 100
+
+    with app.app_context():
+        assert CertificateRenderJob.query.count() == 25
+        assert all(certificate.has_pdf() for certificate in
+                   Certificate.query.filter(Certificate.certificate_id != 'QRYTI-EXISTING'))
+
+
+def test_interrupted_issuance_resumes_where_it_stopped(monkeypatch):
+    """A failure part way through keeps committed chunks and resume issues the rest"""
+    app = make_app()
+    client = app.test_client()
+    headers, course_id = create_cohort(app)
+
+    real_insert = CertificateIssuance._insert_certificates
+    calls = {'count': 0}
+
+    def failing_insert(self, chunk):
+        calls['count'] += 1
+        if calls['count'] == 2:
+            raise RuntimeError('database went away')
+        return real_insert(self, chunk)
+
+    monkeypatch.setattr(CertificateIssuance, '_insert_certificates', failing_insert)
+    response = client.post(f'/api/certificates/admin/courses/{course_id}/issue', headers=headers)
+    assert response.status_code == 500
+
+    with app.app_context():
+        issuance = CertificateIssuance.query.one()
+        progress = issuance.to_dict()
+        assert progress['status'] == 'issuing' and progress['issued'] == 10
+        assert 'database went away' in progress['error']
+        issuance_id = issuance.issuance_id
+
+    response = client.post(f'/api/certificates/admin/issuances/{issuance_id}/resume', headers=headers)
+    assert response.status_code == 202
+    progress = response.get_json()['issuance']
+    assert progress['issued'] == 25 and progress['rendered'] == 25 and progress['status'] == 'completed'
+    assert client.get(progress['status_url'], headers=headers).get_json()['status'] == 'completed'
+
+
+def test_bulk_issuance_requires_admin():
+    """Learners cannot issue certificates for a cohort"""
+    app = make_app()
+    client = app.test_client()
+    _, course_id = create_cohort(app, completed=1)
+    with app.app_context():
+        learner = User.query.filter_by(email='learner0@qryti.com').first()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(learner.id))}'}
+    response = client.post(f'/api/certificates/admin/courses/{course_id}/issue', headers=headers)
+    assert response.status_code == 403
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn background certificate rendering
+Checks the 202 job flow, process-pool rendering, retries and pending downloads
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, CourseEnrollment
+from src.models.progress import Certificate, CertificateRenderJob
+import src.utils.certificate_jobs as certificate_jobs
+from src.utils.certificate_generator import CertificateTemplate, render_certificate_pdf
+
+
+def create_graduate(app):
+    """Create a learner with a completed enrollment; returns (headers, course_id)"""
+    with app.app_context():
+        user = User.create_user(email='graduate@qryti.com', password='test123',
+                                first_name='Grace', last_name='Graduate')
+        course = Course(title='Certified Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        db.session.add(CourseEnrollment(user_id=user.id, course_id=course.id,
+                                        status='completed', final_score=92.0))
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+        return headers, course.id
+
+
+def test_certificate_renders_on_process_pool():
+    """Generation answers 202 with a job; download is pending until the pool finishes"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    output_dir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    os.environ['CERTIFICATE_RENDER_MODE'] = 'process'
+    os.environ['CERTIFICATE_RENDER_WORKERS'] = '1'
+    os.environ['CERTIFICATE_OUTPUT_DIR'] = output_dir
+    try:
+        app = create_app('testing')
+    finally:
+        for name in ('DATABASE_URL', 'CERTIFICATE_RENDER_MODE', 'CERTIFICATE_RENDER_WORKERS', 'CERTIFICATE_OUTPUT_DIR'):
+            del os.environ[name]
+
+    render_queue = app.extensions['certificate_render_queue']
+    assert not render_queue.synchronous and render_queue.workers == 1
+    client = app.test_client()
+
+    try:
+        headers, course_id = create_graduate(app)
+        response = client.post(f'/api/certificates/generate/{course_id}', headers=headers)
+        assert response.status_code == 202
+        data = response.get_json()
+        job = data['job']
+        certificate_id = data['certificate']['certificate_id']
+        assert job['status'] in ('rendering', 'completed')
+
+        deadline = time.time() + 60
+        while True:
+            status = client.get(job['status_url'], headers=headers).get_json()
+            if status['status'] == 'completed' or time.time() > deadline:
+                break
+            # Downloading before the PDF exists reports the running job instead of a file
+            pending = client.get(f'/api/certificates/{certificate_id}/download', headers=headers)
+            assert pending.status_code in (200, 202)
+            if pending.status_code == 202:
+                assert pending.get_json()['job']['job_id'] == job['job_id']
+            time.sleep(0.1)
+
+        assert status['status'] == 'completed' and status['attempts'] == 1
+        download = client.get(f'/api/certificates/{certificate_id}/download', headers=headers)
+        assert download.status_code == 200
+        assert download.data.startswith(b'%PDF')
+        with app.app_context():
+            assert CertificateRenderJob.query.count() == 1
+    finally:
+        render_queue.shutdown()
+        os.unlink(db_file.name)
+
+
+def test_failed_renders_are_retried(monkeypatch):
+    """A render that fails is retried up to max_attempts, then marked failed"""
+    output_dir = tempfile.mkdtemp()
+    app = create_app('testing')
+    render_queue = app.extensions['certificate_render_queue']
+    render_queue.output_dir = output_dir
+    assert render_queue.synchronous
+    client = app.test_client()
+    headers, course_id = create_graduate(app)
+
+    failures = {'left': 2}
+    real_render = certificate_jobs.render_certificate_pdf
+
+    def flaky_render(render_data, output_dir):
+        if failures['left']:
+            failures['left'] -= 1
+            raise IOError('disk full')
+        return real_render(render_data, output_dir)
+
+    monkeypatch.setattr(certificate_jobs, 'render_certificate_pdf', flaky_render)
+    response = client.post(f'/api/certificates/generate/{course_id}', headers=headers)
+    assert response.status_code == 202
+    job = response.get_json()['job']
+    assert job['status'] == 'completed' and job['attempts'] == 3
+
+    certificate_id = response.get_json()['certificate']['certificate_id']
+    with app.app_context():
+        certificate = Certificate.query.filter_by(certificate_id=certificate_id).first()
+        assert certificate.has_pdf()
+        os.unlink(certificate.pdf_path)
+
+    # Missing artifact with every attempt failing: download reports the failed job
+    failures['left'] = 10
+    response = client.get(f'/api/certificates/{certificate_id}/download', headers=headers)
+    assert response.status_code == 500
+    job = response.get_json()['job']
+    assert job['status'] == 'failed' and job['attempts'] == 3 and 'disk full' in job['error']
+
+
+def test_template_renders_static_form_and_fields():
+    """The template draws its static artwork as one form XObject plus the variable fields"""
+    template = CertificateTemplate()
+    assert set(template.fields) == {'recipient_name', 'course_name', 'score', 'date',
+                                    'certificate_id', 'verification_url'}
+    output_dir = tempfile.mkdtemp()
+    data = {
+        'recipient_name': 'A Learner With An Exceptionally Long Name That Needs Shrinking To Fit',
+        'course_name': 'Template Course',
+        'certificate_id': 'QRYTI-TEMPLATE-1',
+        'final_score': 88.5,
+        'completion_date': '2026-01-02'
+    }
+    path = render_certificate_pdf(data, output_dir)
+    with open(path, 'rb') as pdf:
+        content = pdf.read()
+    assert content.startswith(b'%PDF')
+    assert b'/Subtype /Form' in content
+    assert not [name for name in os.listdir(output_dir) if name.endswith('.tmp')]
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
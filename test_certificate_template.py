@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for the Qryti Learn pre-rendered certificate template
+Checks that the static artwork is a shared form and that renders are reproducible
+"""
+
+import sys
+import os
+import base64
+import re
+import tempfile
+import zlib
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from src.utils.certificate_generator import CertificateTemplate
+
+
+def page_streams(path):
+    """Decoded content streams of a PDF written by ReportLab (ASCII85 + Flate)"""
+    with open(path, 'rb') as pdf:
+        content = pdf.read()
+    streams = re.findall(rb'stream\r?\n(.*?~>)\s*endstream', content, re.DOTALL)
+    return [zlib.decompress(base64.a85decode(stream, adobe=True)) for stream in streams]
+
+
+def certificate(name):
+    return {
+        'recipient_name': name,
+        'course_name': 'Template Course',
+        'certificate_id': f'QRYTI-{name.upper()}',
+        'final_score': 91.0,
+        'completion_date': '2026-01-02'
+    }
+
+
+def test_static_artwork_is_one_form_per_certificate():
+    """The fixed artwork is a form XObject; the page stream only holds the certificate's own fields"""
+    template = CertificateTemplate()
+    output_dir = tempfile.mkdtemp()
+    paths = [template.render(certificate(name), os.path.join(output_dir, f'{name}.pdf'))
+             for name in ('ada', 'grace')]
+
+    form, page = page_streams(paths[0])
+    assert b'(CERTIFICATE OF COMPLETION) Tj' in form and b'(Certificate ID:) Tj' in form
+    assert b'(ada) Tj' in page and b'CERTIFICATE OF COMPLETION' not in page
+    assert b'/FormXob' in page and b' Do' in page
+
+    # Every certificate carries the same static form
+    other_form, other_page = page_streams(paths[1])
+    assert other_form == form and b'(grace) Tj' in other_page
+
+
+def test_renders_are_reproducible():
+    """The same certificate renders to the same bytes, from the same or a new template"""
+    output_dir = tempfile.mkdtemp()
+    first = CertificateTemplate().render(certificate('ada'), os.path.join(output_dir, 'first.pdf'))
+    second = CertificateTemplate().render(certificate('ada'), os.path.join(output_dir, 'second.pdf'))
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        assert a.read() == b.read()
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn signed certificate tokens
+Checks signing, DB-free verification, revocation and the signed revocation list
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import event
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course
+from src.models.progress import Certificate
+from src.utils.certificate_generator import render_certificate_pdf
+from src.utils.certificate_tokens import (
+    CertificateSigner, CertificateTokens, CertificateVerifier, InvalidToken, TOKEN_VERSION
+)
+
+
+def test_signer_rejects_tampering_and_other_keys():
+    """Tokens only verify unmodified and under the key that signed them"""
+    signer = CertificateSigner('key-one')
+    token = signer.sign({'v': TOKEN_VERSION, 'cid': 'QRYTI-1', 'score': 90})
+    assert signer.verify(token)['cid'] == 'QRYTI-1'
+
+    body, signature = token.split('.')
+    forged = CertificateSigner('key-one').sign({'v': TOKEN_VERSION, 'cid': 'QRYTI-1', 'score': 100}).split('.')[0]
+    for bad in (f'{forged}.{signature}', f'{body}.{signature[:-2]}xx', 'not-a-token', None):
+        try:
+            signer.verify(bad)
+        except InvalidToken:
+            continue
+        raise AssertionError(f'accepted {bad!r}')
+    try:
+        CertificateSigner('key-two').verify(token)
+        raise AssertionError('accepted token signed with another key')
+    except InvalidToken:
+        pass
+
+
+def test_published_keys_verify_offline_across_rotation():
+    """The public key set alone verifies tokens and documents, including those of a retired key"""
+    old = CertificateSigner('key-old')
+    new = CertificateSigner('key-new', retired_public_keys=[old.to_jwks()['keys'][0]['x']])
+    old_token = old.sign({'v': TOKEN_VERSION, 'cid': 'QRYTI-OLD'})
+    new_token = new.sign({'v': TOKEN_VERSION, 'cid': 'QRYTI-NEW'})
+    revocations = new.sign_document({'revoked': ['QRYTI-GONE']})
+
+    published = new.to_jwks()
+    assert [entry['kid'] for entry in published['keys']] == [new.key_id, old.key_id]
+    assert all('d' not in entry for entry in published['keys'])
+
+    verifier = CertificateVerifier.from_jwks(published)
+    assert not hasattr(verifier, 'sign')
+    assert verifier.verify(old_token)['cid'] == 'QRYTI-OLD'
+    assert verifier.verify(new_token)['cid'] == 'QRYTI-NEW'
+    assert verifier.verify_document(revocations) and revocations['kid'] == new.key_id
+    assert not verifier.verify_document(dict(revocations, revoked=[]))
+    assert not verifier.verify_document(dict(revocations, kid=old.key_id))
+
+
+def test_token_verification_skips_database_and_honours_revocation():
+    """The token endpoint answers from the token and the in-memory revocation set"""
+    app = create_app('testing')
+    client = app.test_client()
+
+    with app.app_context():
+        holder = User(email='holder@qryti.com', password_hash='x', first_name='Tara', last_name='Token')
+        course = Course(title='Token Course', level=1, duration_hours=1.0)
+        old_course = Course(title='Old Course', level=1, duration_hours=1.0)
+        db.session.add_all([holder, course, old_course])
+        db.session.flush()
+        certificate = Certificate.create_certificate(holder.id, course.id, 87.5)
+        expired = Certificate(user_id=holder.id, course_id=old_course.id, final_score=70.0,
+                              certificate_id='QRYTI-OLD', verification_code='OLD00001',
+                              expires_at=datetime.utcnow() - timedelta(days=1))
+        db.session.add(expired)
+        db.session.commit()
+        token = certificate.get_verification_token()
+        expired_token = expired.get_verification_token()
+        certificate_id = certificate.certificate_id
+        render_data = certificate.get_render_data()
+
+    # First use loads the revocation set; after that verification runs no SQL
+    assert client.get(f'/api/certificates/verify/token/{token}').status_code == 200
+    statements = []
+    with app.app_context():
+        engine = db.engine
+    record = lambda *args: statements.append(args[2])
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(f'/api/certificates/verify/token/{token}')
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200 and not statements
+    data = response.get_json()
+    assert data['valid'] and data['certificate']['user_name'] == 'Tara Token'
+    assert data['certificate']['final_score'] == 87.5
+
+    assert client.get(f'/api/certificates/verify/token/{expired_token}').get_json()['status'] == 'expired'
+    assert client.get(f'/api/certificates/verify/token/{token[:-3]}abc').status_code == 400
+
+    with app.app_context():
+        db.session.get(Certificate, certificate.id).revoke()
+    response = client.get(f'/api/certificates/verify/token/{token}')
+    assert response.status_code == 404 and response.get_json()['status'] == 'revoked'
+
+    # Offline verifiers only need the published public keys
+    verifier = CertificateVerifier.from_jwks(client.get('/api/certificates/signing-keys').get_json())
+    assert verifier.verify(token)['cid'] == certificate_id
+    revocations = client.get('/api/certificates/revocations').get_json()
+    assert revocations['revoked'] == [certificate_id]
+    assert verifier.verify_document(revocations)
+    revocations['revoked'] = []
+    assert not verifier.verify_document(revocations)
+
+    # The token is embedded in the rendered PDF as a QR code
+    path = render_certificate_pdf(render_data, tempfile.mkdtemp())
+    with open(path, 'rb') as pdf:
+        assert pdf.read().startswith(b'%PDF')
+
+
+def test_tokens_need_a_dedicated_signing_key():
+    """Without its own key, or with one reusing an app secret, the token feature stays off"""
+    app = create_app('testing')
+    client = app.test_client()
+    assert app.extensions['certificate_tokens'].enabled
+
+    for key in (None, app.config['SECRET_KEY'], app.config['JWT_SECRET_KEY']):
+        app.config['CERTIFICATE_SIGNING_KEY'] = key
+        tokens = CertificateTokens(app)
+        assert not tokens.enabled and app.extensions['certificate_tokens'] is tokens
+        assert tokens.issue('QRYTI-1', 'Tara Token', 'Token Course', 90.0, datetime.utcnow()) is None
+        assert client.get('/api/certificates/verify/token/abc.def').status_code == 503
+        assert client.get('/api/certificates/revocations').status_code == 503
+        assert client.get('/api/certificates/signing-keys').status_code == 503
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
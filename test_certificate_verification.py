@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn cached certificate verification
+Checks the slim projection, cache hits, negative caching and revocation
+"""
+
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, CourseEnrollment
+from src.models.progress import Certificate, CertificateRevocationVersion
+from src.utils.certificate_verification import certificate_verification_cache
+
+
+def count_queries(app, func):
+    """Run func and return (result, number of SQL statements executed)"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        return func(), len(statements)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def test_verification_is_cached_and_invalidated_on_revoke():
+    """Repeat verifications skip the database; revocation takes effect immediately"""
+    certificate_verification_cache.clear()
+    app = create_app('testing')
+    client = app.test_client()
+
+    with app.app_context():
+        admin = User.create_user(email='admin@qryti.com', password='test123',
+                                 first_name='Ada', last_name='Admin', role='admin')
+        holder = User(email='holder@qryti.com', password_hash='x', first_name='Hana',
+                      last_name='Holder', organization='Qryti')
+        course = Course(title='Popular Course', level=2, duration_hours=1.0)
+        db.session.add_all([admin, holder, course])
+        db.session.flush()
+        # A large course must not make verification any more expensive
+        for index in range(200):
+            learner = User(email=f'learner{index}@qryti.com', password_hash='x',
+                           first_name='Learner', last_name=str(index))
+            db.session.add(learner)
+            db.session.flush()
+            db.session.add(CourseEnrollment(user_id=learner.id, course_id=course.id))
+        db.session.commit()
+        certificate = Certificate.create_certificate(holder.id, course.id, 91.0)
+        certificate_id, code = certificate.certificate_id, certificate.verification_code
+        admin_headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+
+    response, queries = count_queries(app, lambda: client.get(f'/api/certificates/verify/{certificate_id}'))
+    assert response.status_code == 200 and queries == 2
+    body = response.get_json()
+    assert body['valid']
+    assert body['certificate']['user_name'] == 'Hana Holder'
+    assert body['certificate']['course_level'] == 'ISO 42001 Practitioner'
+    assert body['certificate']['organization'] == 'Qryti'
+
+    # Both lookups are served from the cache now, after checking the revocation version
+    response, queries = count_queries(app, lambda: client.get(f'/api/certificates/verify/{certificate_id}'))
+    assert response.status_code == 200 and queries == 1
+    response, queries = count_queries(app, lambda: client.post('/api/certificates/verify-code',
+                                                               json={'verification_code': code.lower()}))
+    assert response.status_code == 200 and queries == 1
+
+    # Unknown IDs are cached as misses
+    response, queries = count_queries(app, lambda: client.get('/api/certificates/verify/QRYTI-NOPE'))
+    assert response.status_code == 404 and queries == 2
+    response, queries = count_queries(app, lambda: client.get('/api/certificates/verify/QRYTI-NOPE'))
+    assert response.status_code == 404 and queries == 0
+
+    response = client.post(f'/api/certificates/admin/revoke/{certificate_id}', headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get(f'/api/certificates/verify/{certificate_id}').status_code == 404
+    response = client.post('/api/certificates/verify-code', json={'verification_code': code})
+    assert response.status_code == 404
+
+
+def test_expiry_is_evaluated_at_read_time():
+    """A cached projection stops verifying once it expires"""
+    certificate_verification_cache.clear()
+    app = create_app('testing')
+    with app.app_context():
+        holder = User(email='holder@qryti.com', password_hash='x', first_name='Eve', last_name='Expiring')
+        course = Course(title='Short Course', level=1, duration_hours=1.0)
+        db.session.add_all([holder, course])
+        db.session.flush()
+        certificate = Certificate.create_certificate(holder.id, course.id, 75.0)
+        certificate.expires_at = datetime.utcnow() + timedelta(days=1)
+        db.session.commit()
+
+        verification = Certificate.get_verification(certificate_id=certificate.certificate_id)
+        assert verification.is_current()
+        assert not verification.is_current(now=datetime.utcnow() + timedelta(days=2))
+
+
+def test_bulk_verification_reports_status_per_id():
+    """Bulk verification resolves IDs and codes in chunked queries and can stream NDJSON"""
+    app = create_app('testing')
+    app.config['CERTIFICATE_BULK_VERIFY_CHUNK_SIZE'] = 2
+    client = app.test_client()
+
+    with app.app_context():
+        course = Course(title='Bulk Course', level=1, duration_hours=1.0)
+        db.session.add(course)
+        certificates = {}
+        for status in ('valid', 'revoked', 'expired'):
+            holder = User(email=f'{status}@qryti.com', password_hash='x', first_name=status.title(), last_name='Holder')
+            db.session.add(holder)
+            db.session.flush()
+            certificates[status] = Certificate.create_certificate(holder.id, course.id, 80.0)
+        certificates['revoked'].revoke()
+        certificates['expired'].expires_at = datetime.utcnow() - timedelta(days=1)
+        db.session.commit()
+        ids = {status: certificate.certificate_id for status, certificate in certificates.items()}
+        valid_code = certificates['valid'].verification_code
+
+    body = {
+        'certificate_ids': [ids['valid'], ids['revoked'], 'QRYTI-UNKNOWN', ids['expired'], ids['valid']],
+        'verification_codes': [valid_code.lower()]
+    }
+    response, queries = count_queries(app, lambda: client.post('/api/certificates/verify-bulk', json=body))
+    assert response.status_code == 200 and queries == 4
+    data = response.get_json()
+    assert [entry['status'] for entry in data['results']] == \
+        ['valid', 'revoked', 'unknown', 'expired', 'valid', 'valid']
+    assert data['summary'] == {'valid': 3, 'revoked': 1, 'unknown': 1, 'expired': 1}
+    assert data['results'][0]['user_name'] == 'Valid Holder'
+    assert 'user' not in data['results'][0] and 'course' not in data['results'][0]
+    assert data['results'][-1]['verification_code'] == valid_code
+
+    response = client.post('/api/certificates/verify-bulk', json=body,
+                           headers={'Accept': 'application/x-ndjson'})
+    assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [entry['status'] for entry in lines] == ['valid', 'revoked', 'unknown', 'expired', 'valid', 'valid']
+
+    app.config['CERTIFICATE_BULK_VERIFY_MAX'] = 5
+    assert client.post('/api/certificates/verify-bulk', json=body).status_code == 400
+    assert client.post('/api/certificates/verify-bulk', json={'certificate_ids': [1]}).status_code == 400
+
+    # Guessable short codes are capped far below the certificate ID limit
+    app.config['CERTIFICATE_BULK_VERIFY_MAX'] = 5000
+    codes = {'verification_codes': [f'{n:08X}' for n in range(11)]}
+    response = client.post('/api/certificates/verify-bulk', json=codes)
+    assert response.status_code == 400 and 'verification codes' in response.get_json()['error']
+    codes['verification_codes'].pop()
+    assert client.post('/api/certificates/verify-bulk', json=codes).status_code == 200
+
+
+def test_revocations_elsewhere_are_seen_by_cached_lookups():
+    """A revocation committed by another process, or racing a load, is not served as valid"""
+    certificate_verification_cache.clear()
+    app = create_app('testing')
+
+    with app.app_context():
+        holder = User(email='holder@qryti.com', password_hash='x', first_name='Rae', last_name='Revoked')
+        course = Course(title='Revoked Course', level=1, duration_hours=1.0)
+        db.session.add_all([holder, course])
+        db.session.flush()
+        first = Certificate.create_certificate(holder.id, course.id, 80.0)
+        other = User(email='other@qryti.com', password_hash='x', first_name='Ray', last_name='Raced')
+        db.session.add(other)
+        db.session.flush()
+        second = Certificate.create_certificate(other.id, course.id, 80.0)
+        first_id, second_id = first.certificate_id, second.certificate_id
+
+        assert Certificate.get_verification(certificate_id=first_id).is_current()
+
+        # Another worker revokes it without touching this process's cache
+        db.session.execute(db.update(Certificate).where(Certificate.certificate_id == first_id)
+                           .values(is_valid=False))
+        CertificateRevocationVersion.bump()
+        db.session.commit()
+        assert Certificate.get_verification(certificate_id=first_id).get_status() == 'revoked'
+
+        # A load that read the certificate as valid just before its revocation committed
+        stale = Certificate.get_verification(certificate_id=second_id)
+        certificate_verification_cache.clear()
+
+        def racing_loader():
+            db.session.get(Certificate, second.id).revoke()
+            return stale
+
+        certificate_verification_cache.get(('id', second_id), racing_loader,
+                                           version=CertificateRevocationVersion.current)
+        assert Certificate.get_verification(certificate_id=second_id).get_status() == 'revoked'
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn course catalog counters
+Checks the maintained counters and the versioned, precomputed catalog payload
+"""
+
+import sys
+import os
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import event
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module, CourseEnrollment, CourseCatalog
+from src.models.quiz import Quiz
+
+
+def count_queries(app, func):
+    """Run func and return (result, number of SQL statements executed)"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        return func(), len(statements)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def test_counters_follow_inserts_and_deletes():
+    """Module, enrollment and quiz counters track ORM changes and can be rebuilt"""
+    app = create_app('testing')
+    with app.app_context():
+        course = Course(title='Counted Course', level=1, duration_hours=1.0)
+        other = Course(title='Other Course', level=2, duration_hours=1.0)
+        db.session.add_all([course, other])
+        db.session.flush()
+        modules = [Module(course_id=course.id, title=f'Module {i}', order_index=i) for i in range(3)]
+        users = [User(email=f'count{i}@qryti.com', password_hash='x', first_name='C', last_name=str(i))
+                 for i in range(4)]
+        db.session.add_all(modules + users)
+        db.session.flush()
+        db.session.add_all([CourseEnrollment(user_id=user.id, course_id=course.id) for user in users])
+        db.session.add_all([Quiz(module_id=modules[0].id, title='Quiz A'), Quiz(module_id=modules[0].id, title='Quiz B')])
+        db.session.commit()
+
+        assert (course.module_count, course.enrollment_count) == (3, 4)
+        assert modules[0].quiz_count == 2 and modules[1].quiz_count == 0
+
+        db.session.delete(CourseEnrollment.query.filter_by(user_id=users[0].id).first())
+        modules[2].course_id = other.id
+        db.session.commit()
+        assert (course.module_count, course.enrollment_count) == (2, 3)
+        assert other.module_count == 1
+        assert course.to_dict()['enrollment_count'] == 3
+
+        # Drift is repaired from the raw rows
+        course.module_count = 99
+        db.session.commit()
+        assert Course.rebuild_counters() == 2
+        assert course.module_count == 2 and modules[0].quiz_count == 2
+
+
+def test_catalog_is_precomputed_and_revalidated(monkeypatch):
+    """The listing is served from the precomputed payload with ETag/304 and rebuilt on change"""
+    monkeypatch.setattr(CourseCatalog, '_enrollments', (0.0, {}, None))
+    app = create_app('testing')
+    client = app.test_client()
+    with app.app_context():
+        for level in (1, 2):
+            course = Course(title=f'Catalog Level {level}', level=level, duration_hours=1.0)
+            db.session.add(course)
+            db.session.flush()
+            db.session.add(Module(course_id=course.id, title='Intro', order_index=1))
+        db.session.commit()
+        course_id = course.id
+
+    response = client.get('/api/courses/')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total'] == 2 and data['courses'][1]['module_count'] == 1
+    etag = response.headers['ETag']
+
+    # Unchanged catalog: one version check, served from memory
+    response, queries = count_queries(app, lambda: client.get('/api/courses/'))
+    assert response.status_code == 200 and queries == 1
+    response = client.get('/api/courses/', headers={'If-None-Match': etag})
+    assert response.status_code == 304 and not response.data
+    assert client.get('/api/courses/?level=2').get_json()['total'] == 1
+
+    with app.app_context():
+        user = User(email='catalog@qryti.com', password_hash='x', first_name='Cat', last_name='Alog')
+        db.session.add(user)
+        db.session.flush()
+        CourseEnrollment.enroll_user(user.id, course_id)
+        catalog_version = db.session.get(CourseCatalog, CourseCatalog.ROW_ID).version
+
+    # Enrollments leave the catalog version alone and show up once the counters are re-read
+    response, queries = count_queries(app, lambda: client.get('/api/courses/', headers={'If-None-Match': etag}))
+    assert response.status_code == 304 and queries == 1
+    monkeypatch.setattr(CourseCatalog, '_enrollments', (0.0, {}, None))
+    response, queries = count_queries(app, lambda: client.get('/api/courses/', headers={'If-None-Match': etag}))
+    assert response.status_code == 200 and response.headers['ETag'] != etag and queries == 2
+    data = response.get_json()
+    assert data['courses'][1]['enrollment_count'] == 1
+    assert data['catalog_version'] == catalog_version
+
+    # Course and module changes still bump the version and rebuild the payload
+    with app.app_context():
+        db.session.add(Module(course_id=course_id, title='Deep Dive', order_index=2))
+        db.session.commit()
+    data = client.get('/api/courses/').get_json()
+    assert data['catalog_version'] == catalog_version + 1
+    assert data['courses'][1]['module_count'] == 2 and data['courses'][1]['enrollment_count'] == 1
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
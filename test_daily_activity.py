@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn daily activity rollups
+Checks incremental maintenance, streaks, patterns and the rebuild job
+"""
+
+import sys
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.progress import LearningAnalytics, UserDailyActivity
+
+
+def test_rollups_drive_streaks_and_patterns():
+    """Events written through LearningAnalytics feed streaks and hourly patterns"""
+    app = create_app('testing')
+    client = app.test_client()
+    now = datetime.utcnow().replace(hour=9, minute=30)
+
+    with app.app_context():
+        user = User.create_user(email='rollup@qryti.com', password='test123',
+                                first_name='Daily', last_name='Rollup')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        rows = []
+        for days_ago in (0, 1, 2, 5):
+            for event_type in ('module_started', 'module_completed', 'login'):
+                rows.append(LearningAnalytics.build_event_row(
+                    user_id, event_type, timestamp=now - timedelta(days=days_ago)
+                ))
+        LearningAnalytics.write_events(rows[:6])
+        db.session.commit()
+        LearningAnalytics.write_events(rows[6:])
+        db.session.commit()
+
+        snapshot = sorted(a.to_dict()['event_count'] for a in UserDailyActivity.query.all())
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+    summary = client.get('/api/analytics/summary?days=7', headers=headers).get_json()
+    assert summary['learning_streak'] == {'current_streak': 3, 'longest_streak': 3}
+
+    detailed = client.get('/api/analytics/detailed?days=7', headers=headers).get_json()
+    assert detailed['learning_patterns']['hourly_activity'] == [{'hour': 9, 'count': 12}]
+    assert sum(d['count'] for d in detailed['learning_patterns']['weekly_activity']) == 12
+
+    with app.app_context():
+        assert UserDailyActivity.rebuild(user_id=user_id) == 12
+        rebuilt = sorted(a.to_dict()['event_count'] for a in UserDailyActivity.query.all())
+        assert rebuilt == snapshot == [3, 3, 3, 3]
+
+
+def test_rebuild_during_live_writes_counts_each_event_once():
+    """Events logged while a rebuild runs are neither lost nor counted twice"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    try:
+        app = create_app('testing')
+    finally:
+        del os.environ['DATABASE_URL']
+
+    try:
+        with app.app_context():
+            users = [User(email=f'live{i}@qryti.com', password_hash='x', first_name='Live', last_name=str(i))
+                     for i in range(3)]
+            db.session.add_all(users)
+            db.session.commit()
+            user_ids = [user.id for user in users]
+            LearningAnalytics.write_events([LearningAnalytics.build_event_row(uid, 'login') for uid in user_ids])
+            db.session.commit()
+
+        def write_live_events():
+            with app.app_context():
+                for i in range(60):
+                    uid = user_ids[i % len(user_ids)]
+                    LearningAnalytics.write_events([LearningAnalytics.build_event_row(uid, 'module_started')])
+                    db.session.commit()
+
+        writer = threading.Thread(target=write_live_events)
+        writer.start()
+        with app.app_context():
+            while writer.is_alive():
+                UserDailyActivity.rebuild(batch_size=1)
+        writer.join()
+
+        with app.app_context():
+            rolled_up = {row.user_id: row.event_count for row in UserDailyActivity.query}
+            logged = dict(db.session.query(LearningAnalytics.user_id, db.func.count(LearningAnalytics.id))
+                          .group_by(LearningAnalytics.user_id).all())
+            assert rolled_up == logged == {uid: 21 for uid in user_ids}
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        os.unlink(db_file.name)
+
+
+if __name__ == '__main__':
+    test_rollups_drive_streaks_and_patterns()
+    test_rebuild_during_live_writes_counts_each_event_once()
+    print("✅ Daily activity rollup test passed")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the Qryti Learn buffered analytics event writer
+Checks batching, shutdown flush and backpressure fallback
+"""
+
+import sys
+import os
+import tempfile
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.progress import LearningAnalytics
+from src.utils.event_writer import AnalyticsEventWriter
+
+
+def test_buffered_writer_flushes_on_shutdown():
+    """Events queued in buffered mode are all stored after shutdown"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    try:
+        app = create_app('testing')
+    finally:
+        del os.environ['DATABASE_URL']
+
+    try:
+        with app.app_context():
+            user = User.create_user(email='writer@qryti.com', password='test123',
+                                    first_name='Event', last_name='Writer')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        app.config['ANALYTICS_EVENT_WRITER'] = 'buffered'
+        app.config['ANALYTICS_EVENT_QUEUE_SIZE'] = 5
+        app.config['ANALYTICS_EVENT_ENQUEUE_TIMEOUT'] = 0
+        writer = AnalyticsEventWriter(app)
+        assert not writer.synchronous
+
+        with app.app_context():
+            for i in range(50):
+                LearningAnalytics.log_event(user_id, 'test_event', {'i': i})
+
+        writer.shutdown()
+
+        with app.app_context():
+            assert LearningAnalytics.query.filter_by(user_id=user_id).count() == 50
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        os.unlink(db_file.name)
+
+
+def test_sync_writer_commits_immediately():
+    """Synchronous mode stores the event before log_event returns"""
+    app = create_app('testing')
+    assert app.extensions['analytics_event_writer'].synchronous
+
+    with app.app_context():
+        user = User.create_user(email='sync@qryti.com', password='test123',
+                                first_name='Sync', last_name='Writer')
+        db.session.add(user)
+        db.session.commit()
+
+        LearningAnalytics.log_event(user.id, 'login')
+        event = LearningAnalytics.query.filter_by(user_id=user.id).one()
+        assert event.event_type == 'login'
+        assert event.timestamp is not None
+
+
+if __name__ == '__main__':
+    test_buffered_writer_flushes_on_shutdown()
+    test_sync_writer_commits_immediately()
+    print("✅ Analytics event writer tests passed")
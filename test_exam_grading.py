@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn exam-mode quiz grading
+Checks durable acceptance, idempotent retries, background grading and polling
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+from sqlalchemy.exc import OperationalError
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module
+from src.models.quiz import Quiz, Question, QuizAttempt
+
+
+def create_exam(app, max_attempts=5):
+    """Create a learner and an exam-mode quiz; returns (headers, quiz_id, question_id)"""
+    with app.app_context():
+        user = User.create_user(email='exam@qryti.com', password='test123',
+                                first_name='Exam', last_name='Taker')
+        course = Course(title='Exam Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        module = Module(course_id=course.id, title='Exam Module', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        quiz = Quiz(module_id=module.id, title='Exam', exam_mode=True, max_attempts=max_attempts)
+        db.session.add(quiz)
+        db.session.flush()
+        question = Question.create_mcq(quiz.id, 'Pick A', ['A', 'B'], 'A')
+        db.session.add(question)
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+        return headers, quiz.id, question.id
+
+
+def test_exam_submissions_are_idempotent_and_graded_in_background():
+    """Retries with the same key reuse one attempt; workers and the sweep grade it"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    os.environ['QUIZ_GRADING_MODE'] = 'async'
+    try:
+        app = create_app('testing')
+    finally:
+        del os.environ['DATABASE_URL']
+        del os.environ['QUIZ_GRADING_MODE']
+
+    grading_queue = app.extensions['quiz_grading_queue']
+    assert not grading_queue.synchronous
+    client = app.test_client()
+
+    try:
+        headers, quiz_id, question_id = create_exam(app)
+        body = {'answers': {str(question_id): 'A'}, 'time_taken': 120}
+        keyed = dict(headers, **{'Idempotency-Key': 'exam-retry-1'})
+
+        first = client.post(f'/api/quizzes/{quiz_id}/submit', json=body, headers=keyed)
+        retry = client.post(f'/api/quizzes/{quiz_id}/submit', json=body, headers=keyed)
+        assert first.status_code == retry.status_code == 202
+        attempt_id = first.get_json()['attempt_id']
+        assert retry.get_json()['attempt_id'] == attempt_id
+
+        grading_queue.join()
+        status = client.get(f'/api/quizzes/attempts/{attempt_id}/status', headers=headers).get_json()
+        assert status['status'] == 'graded'
+        assert status['score'] == 100 and status['passed']
+
+        # A submission accepted by a process that died before queuing it
+        with app.app_context():
+            quiz = db.session.get(Quiz, quiz_id)
+            user_id = db.session.get(QuizAttempt, attempt_id).user_id
+            orphan, created = QuizAttempt.accept_submission(user_id, quiz, {str(question_id): 'B'})
+            orphan_id = orphan.id
+            assert created and orphan.get_status() == 'pending'
+
+        assert grading_queue.sweep() == 1
+        grading_queue.join()
+        status = client.get(f'/api/quizzes/attempts/{orphan_id}/status', headers=headers).get_json()
+        assert status['status'] == 'graded' and status['score'] == 0
+
+        with app.app_context():
+            assert QuizAttempt.query.filter_by(quiz_id=quiz_id).count() == 2
+    finally:
+        grading_queue.shutdown()
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.unlink(db_file.name)
+
+
+def test_sync_mode_grades_before_acknowledging():
+    """Testing config grades on the request thread"""
+    app = create_app('testing')
+    client = app.test_client()
+    headers, quiz_id, question_id = create_exam(app)
+
+    response = client.post(f'/api/quizzes/{quiz_id}/submit', headers=headers,
+                           json={'answers': {str(question_id): 'A'}})
+    assert response.status_code == 202
+    assert response.get_json()['status'] == 'graded'
+
+
+def test_retrying_the_final_attempt_is_idempotent():
+    """A keyed retry of the last allowed attempt returns it instead of hitting the limit"""
+    app = create_app('testing')
+    client = app.test_client()
+    headers, quiz_id, question_id = create_exam(app, max_attempts=1)
+    body = {'answers': {str(question_id): 'A'}}
+    keyed = dict(headers, **{'Idempotency-Key': 'k1'})
+
+    first = client.post(f'/api/quizzes/{quiz_id}/submit', json=body, headers=keyed)
+    retry = client.post(f'/api/quizzes/{quiz_id}/submit', json=body, headers=keyed)
+    assert first.status_code == retry.status_code == 202
+    assert retry.get_json()['attempt_id'] == first.get_json()['attempt_id']
+    assert retry.get_json()['message'] == 'Quiz submission already received'
+
+    # A new key is a new attempt, which the limit now rejects
+    other = client.post(f'/api/quizzes/{quiz_id}/submit', json=body,
+                        headers=dict(headers, **{'Idempotency-Key': 'k2'}))
+    assert other.status_code == 400
+
+
+def test_sweeper_grades_pending_attempts_after_restart():
+    """A restarted process grades attempts left pending without waiting for a new submission"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    try:
+        previous = create_app('testing')
+        headers, quiz_id, question_id = create_exam(previous)
+        with previous.app_context():
+            quiz = db.session.get(Quiz, quiz_id)
+            user = User.query.filter_by(email='exam@qryti.com').one()
+            orphan, _ = QuizAttempt.accept_submission(user.id, quiz, {str(question_id): 'A'})
+            orphan_id = orphan.id
+            db.session.remove()
+            db.engine.dispose()
+
+        os.environ['QUIZ_GRADING_MODE'] = 'async'
+        os.environ['QUIZ_GRADING_SWEEP_INTERVAL'] = '0.05'
+        try:
+            app = create_app('testing')
+        finally:
+            del os.environ['QUIZ_GRADING_MODE']
+            del os.environ['QUIZ_GRADING_SWEEP_INTERVAL']
+    finally:
+        del os.environ['DATABASE_URL']
+
+    grading_queue = app.extensions['quiz_grading_queue']
+    try:
+        deadline = time.monotonic() + 5
+        status = None
+        while status != 'graded' and time.monotonic() < deadline:
+            time.sleep(0.05)
+            with app.app_context():
+                status = db.session.get(QuizAttempt, orphan_id).get_status()
+                db.session.remove()
+        assert status == 'graded'
+    finally:
+        grading_queue.shutdown()
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.unlink(db_file.name)
+
+
+def test_grading_errors_do_not_kill_workers_or_drop_submissions(monkeypatch):
+    """Transient errors leave the attempt pending for a retry, and a failing worker keeps running"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    os.environ['QUIZ_GRADING_MODE'] = 'async'
+    os.environ['QUIZ_GRADING_WORKERS'] = '2'
+    os.environ['QUIZ_GRADING_SWEEP_INTERVAL'] = '0'
+    try:
+        app = create_app('testing')
+    finally:
+        for name in ('DATABASE_URL', 'QUIZ_GRADING_MODE', 'QUIZ_GRADING_WORKERS', 'QUIZ_GRADING_SWEEP_INTERVAL'):
+            del os.environ[name]
+
+    grading_queue = app.extensions['quiz_grading_queue']
+
+    def locked(attempt_id):
+        raise OperationalError('UPDATE quiz_attempts', {}, Exception('database is locked'))
+
+    def broken(attempt_id):
+        raise RuntimeError('boom')
+
+    try:
+        headers, quiz_id, question_id = create_exam(app)
+        with app.app_context():
+            quiz = db.session.get(Quiz, quiz_id)
+            user = User.query.filter_by(email='exam@qryti.com').one()
+            attempt, _ = QuizAttempt.accept_submission(user.id, quiz, {str(question_id): 'A'})
+            attempt_id = attempt.id
+
+        # A locked database defers grading instead of failing the submission
+        monkeypatch.setattr(QuizAttempt, 'grade_pending', staticmethod(locked))
+        assert grading_queue.submit(attempt_id)
+        grading_queue.join()
+        with app.app_context():
+            assert db.session.get(QuizAttempt, attempt_id).get_status() == 'pending'
+
+        # Errors escaping the grader are logged without killing any worker
+        monkeypatch.setattr(QuizAttempt, 'grade_pending', staticmethod(broken))
+        monkeypatch.setattr(QuizAttempt, 'mark_grading_failed', staticmethod(broken))
+        for _ in range(4):
+            grading_queue.submit(attempt_id)
+            grading_queue.join()
+        assert all(thread.is_alive() for thread in grading_queue._threads)
+
+        monkeypatch.undo()
+        assert grading_queue.sweep() == 1
+        grading_queue.join()
+        with app.app_context():
+            assert db.session.get(QuizAttempt, attempt_id).get_status() == 'graded'
+            db.session.remove()
+    finally:
+        grading_queue.shutdown()
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.unlink(db_file.name)
+
+
+def test_sweep_skips_attempts_already_queued():
+    """A sweep does not queue an attempt a second time while it is still waiting"""
+    app = create_app('testing')
+    grading_queue = app.extensions['quiz_grading_queue']
+    grading_queue.synchronous = False
+    grading_queue.sweep_interval = 0
+    headers, quiz_id, question_id = create_exam(app)
+    with app.app_context():
+        quiz = db.session.get(Quiz, quiz_id)
+        user = User.query.filter_by(email='exam@qryti.com').one()
+        attempt, _ = QuizAttempt.accept_submission(user.id, quiz, {str(question_id): 'A'})
+        attempt_id = attempt.id
+
+    # Hold the attempt in the queue by starting no workers
+    grading_queue.workers = 0
+    assert grading_queue.submit(attempt_id)
+    assert not grading_queue.submit(attempt_id)
+    assert grading_queue.sweep() == 0
+    assert grading_queue.pending() == 1
+
+
+if __name__ == '__main__':
+    test_exam_submissions_are_idempotent_and_graded_in_background()
+    test_sync_mode_grades_before_acknowledging()
+    test_retrying_the_final_attempt_is_idempotent()
+    test_sweeper_grades_pending_attempts_after_restart()
+    test_sweep_skips_attempts_already_queued()
+    print("✅ Exam grading queue tests passed")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn quiz item analysis
+Checks vectorized statistics against a direct computation and incremental updates
+"""
+
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module
+from src.models.quiz import Quiz, Question, QuizAttempt
+from src.utils.item_analysis import ItemAnalysisCache
+
+
+def test_item_statistics_match_direct_computation():
+    """Difficulty, rest-score point-biserial and distractors over two incremental batches"""
+    app = create_app('testing')
+    client = app.test_client()
+    rng = random.Random(7)
+
+    with app.app_context():
+        admin = User.create_user(email='items@qryti.com', password='test123',
+                                 first_name='Item', last_name='Analyst', role='admin')
+        course = Course(title='Item Course', level=1, duration_hours=1.0)
+        db.session.add_all([admin, course])
+        db.session.flush()
+        module = Module(course_id=course.id, title='Item Module', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        quiz = Quiz(module_id=module.id, title='Item Quiz')
+        db.session.add(quiz)
+        db.session.flush()
+        questions = [
+            Question.create_mcq(quiz.id, 'Q1', ['A', 'B', 'C'], 'A', order_index=1),
+            Question.create_mcq(quiz.id, 'Q2', ['A', 'B', 'C'], 'B', points=2, order_index=2),
+            Question.create_multiple_select(quiz.id, 'Q3', ['A', 'B', 'C'], ['A', 'C'], order_index=3),
+        ]
+        db.session.add_all(questions)
+        db.session.commit()
+        quiz_id, admin_id = quiz.id, admin.id
+        keys = [str(q.id) for q in questions]
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin_id))}'}
+
+        def add_attempts(count, offset):
+            for i in range(count):
+                answers = {
+                    keys[0]: rng.choice(['A', 'B', 'C']),
+                    keys[1]: rng.choice(['A', 'B', 'C', 'Z']),
+                    keys[2]: rng.choice([['A', 'C'], ['A'], ['C', 'B'], 'A'])
+                }
+                if rng.random() < 0.1:
+                    del answers[keys[1]]
+                attempt = QuizAttempt(user_id=admin_id, quiz_id=quiz_id, total_questions=3,
+                                      completed_at=datetime(2025, 1, 1) + timedelta(seconds=offset + i))
+                attempt.answers = answers
+                db.session.add(attempt)
+            db.session.commit()
+
+        cache = ItemAnalysisCache(chunk_size=16)
+        add_attempts(40, 0)
+        assert cache.get(db.session.get(Quiz, quiz_id))['attempt_count'] == 40
+        add_attempts(35, 100)
+        analysis = cache.get(db.session.get(Quiz, quiz_id))
+        assert analysis['attempt_count'] == 75
+
+        quiz = db.session.get(Quiz, quiz_id)
+        graded = [quiz.grade(a.answers) for a in QuizAttempt.query.filter_by(quiz_id=quiz_id)]
+        correct = np.array([[r.is_correct for r in g.question_results] for g in graded], dtype=float)
+        totals = correct @ np.array([1, 2, 2])
+
+        for j, stats in enumerate(analysis['questions']):
+            assert abs(stats['difficulty'] - correct[:, j].mean()) < 1e-9
+            rest = totals - correct[:, j] * [1, 2, 2][j]
+            expected = np.corrcoef(correct[:, j], rest)[0, 1]
+            assert abs(stats['discrimination'] - expected) < 1e-9
+
+        q2_options = {o['option']: o['count'] for o in analysis['questions'][1]['options']}
+        answered = [a.answers.get(keys[1]) for a in QuizAttempt.query.filter_by(quiz_id=quiz_id)]
+        assert q2_options == {'A': answered.count('A'), 'B': answered.count('B'),
+                              'C': answered.count('C'), None: answered.count('Z')}
+
+    response = client.get(f'/api/quizzes/{quiz_id}/item-analysis', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['attempt_count'] == 75
+
+
+def test_late_commits_are_counted_and_entries_are_evicted():
+    """An attempt committed after a newer one was read still counts; old quizzes are evicted"""
+    app = create_app('testing')
+    with app.app_context():
+        user = User(email='late@qryti.com', password_hash='x', first_name='Late', last_name='Commit')
+        course = Course(title='Late Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        module = Module(course_id=course.id, title='Late Module', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        quizzes = [Quiz(module_id=module.id, title=f'Late Quiz {i}') for i in range(2)]
+        db.session.add_all(quizzes)
+        db.session.flush()
+        question = Question.create_mcq(quizzes[0].id, 'Q1', ['A', 'B'], 'A')
+        db.session.add(question)
+        db.session.commit()
+
+        def commit_attempt(completed_at):
+            attempt = QuizAttempt(user_id=user.id, quiz_id=quizzes[0].id, total_questions=1,
+                                  completed_at=completed_at)
+            attempt.answers = {str(question.id): 'A'}
+            db.session.add(attempt)
+            db.session.commit()
+
+        cache = ItemAnalysisCache(chunk_size=2, overlap_seconds=300, max_entries=1)
+        now = datetime(2025, 1, 1, 12)
+        for seconds in (0, 1, 2):
+            commit_attempt(now + timedelta(seconds=seconds))
+        assert cache.get(db.session.get(Quiz, quizzes[0].id))['attempt_count'] == 3
+
+        # Completed before the newest attempt read, committed after it
+        commit_attempt(now - timedelta(seconds=30))
+        commit_attempt(now + timedelta(seconds=3))
+        assert cache.get(db.session.get(Quiz, quizzes[0].id))['attempt_count'] == 5
+        assert cache.get(db.session.get(Quiz, quizzes[0].id))['attempt_count'] == 5
+
+        cache.get(db.session.get(Quiz, quizzes[1].id))
+        assert len(cache) == 1
+        assert cache.get(db.session.get(Quiz, quizzes[0].id))['attempt_count'] == 5
+
+
+if __name__ == '__main__':
+    test_item_statistics_match_direct_computation()
+    test_late_commits_are_counted_and_entries_are_evicted()
+    print("✅ Item analysis test passed")
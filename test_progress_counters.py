@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn enrollment progress counters
+Checks that module completion keeps counters in sync with raw progress rows
+"""
+
+import sys
+import os
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module, CourseEnrollment
+
+
+def test_module_completion_updates_counters():
+    """Completing every module should complete the course from counters alone"""
+    app = create_app('testing')
+    client = app.test_client()
+
+    with app.app_context():
+        user = User.create_user(
+            email='counters@qryti.com', password='test123',
+            first_name='Counter', last_name='Tester'
+        )
+        course = Course(title='Counter Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        module_ids = []
+        for i in range(3):
+            module = Module(course_id=course.id, title=f'Module {i}', order_index=i)
+            db.session.add(module)
+            db.session.flush()
+            module_ids.append(module.id)
+        db.session.commit()
+
+        CourseEnrollment.enroll_user(user.id, course.id)
+        user_id, course_id = user.id, course.id
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+    for score, module_id in zip([80, 90, 100], module_ids):
+        response = client.post(
+            f'/api/courses/modules/{module_id}/complete',
+            json={'score': score, 'time_spent_minutes': 5},
+            headers=headers
+        )
+        assert response.status_code == 200
+
+    # Completing a module twice must not double count
+    response = client.post(
+        f'/api/courses/modules/{module_ids[0]}/complete',
+        json={'score': 80},
+        headers=headers
+    )
+    assert response.status_code == 200
+
+    with app.app_context():
+        enrollment = CourseEnrollment.query.filter_by(user_id=user_id, course_id=course_id).first()
+        assert enrollment.status == 'completed'
+        assert enrollment.completed_module_count == 3
+        assert enrollment.time_spent_minutes == 15
+        assert enrollment.average_score == 90
+        assert enrollment.final_score == 90
+
+        counters = enrollment.get_progress_summary()
+        CourseEnrollment.rebuild_progress_counters()
+        db.session.refresh(enrollment)
+        assert enrollment.get_progress_summary() == counters
+
+
+if __name__ == '__main__':
+    test_module_completion_updates_counters()
+    print("✅ Progress counter test passed")
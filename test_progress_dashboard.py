@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the Qryti Learn progress dashboard
+Checks that /api/progress/dashboard issues a fixed number of queries
+"""
+
+import sys
+import os
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module, CourseEnrollment
+from src.models.quiz import Quiz, QuizAttempt
+from src.models.progress import UserProgress
+
+
+def _create_learner(course_count):
+    """Create a learner enrolled in course_count courses with some progress"""
+    user = User.create_user(
+        email=f'dashboard{course_count}@qryti.com',
+        password='test123',
+        first_name='Dashboard',
+        last_name='Tester'
+    )
+    db.session.add(user)
+    db.session.flush()
+
+    for i in range(course_count):
+        course = Course(title=f'Course {i}', level=1, duration_hours=1.0)
+        db.session.add(course)
+        db.session.flush()
+
+        modules = []
+        for j in range(3):
+            module = Module(course_id=course.id, title=f'Module {j}', order_index=j)
+            db.session.add(module)
+            modules.append(module)
+        db.session.flush()
+
+        quiz = Quiz(module_id=modules[0].id, title=f'Quiz {i}')
+        db.session.add(quiz)
+        db.session.flush()
+
+        db.session.add(CourseEnrollment(user_id=user.id, course_id=course.id))
+        db.session.add(UserProgress(
+            user_id=user.id, course_id=course.id, module_id=modules[0].id,
+            status='completed', time_spent_minutes=10
+        ))
+        db.session.add(QuizAttempt(
+            user_id=user.id, quiz_id=quiz.id, score=80.0, total_questions=1
+        ))
+
+    db.session.commit()
+    return user.id
+
+
+def _count_dashboard_queries(app, client, user_id):
+    """Return the response and number of SQL statements for a dashboard request"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        token = create_access_token(identity=str(user_id))
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get('/api/progress/dashboard', headers={'Authorization': f'Bearer {token}'})
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return response, len(statements)
+
+
+def test_dashboard_query_count_is_constant():
+    """Dashboard query count must not grow with the number of enrollments"""
+    app = create_app('testing')
+    client = app.test_client()
+
+    with app.app_context():
+        small = _create_learner(1)
+        large = _create_learner(15)
+        CourseEnrollment.rebuild_progress_counters()
+
+    small_response, small_queries = _count_dashboard_queries(app, client, small)
+    large_response, large_queries = _count_dashboard_queries(app, client, large)
+
+    assert small_response.status_code == 200
+    assert large_response.status_code == 200
+    assert small_queries == large_queries
+    assert large_queries <= 3
+
+    data = large_response.get_json()
+    assert data['overview']['enrolled_courses'] == 15
+    assert data['overview']['total_time_minutes'] == 150
+    assert len(data['courses']) == 15
+    for course in data['courses']:
+        assert course['total_modules'] == 3
+        assert course['completed_modules'] == 1
+        assert course['average_score'] == 80.0
+
+
+if __name__ == '__main__':
+    test_dashboard_query_count_is_constant()
+    print("✅ Progress dashboard query count test passed")
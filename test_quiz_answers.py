@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn per-question quiz answers
+Checks rows written on completion, backfill, pass rates and the results endpoint
+"""
+
+import sys
+import os
+from datetime import datetime
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module
+from src.models.quiz import Quiz, Question, QuizAttempt, QuizAnswer
+
+
+def test_answers_are_normalized_and_reported_from_sql():
+    """Completion and backfill write quiz_answers rows that drive stats and results"""
+    app = create_app('testing')
+    client = app.test_client()
+
+    with app.app_context():
+        user = User.create_user(email='answers@qryti.com', password='test123',
+                                first_name='Answer', last_name='Table', role='admin')
+        course = Course(title='Answer Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        module = Module(course_id=course.id, title='Answer Module', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        quiz = Quiz(module_id=module.id, title='Answer Quiz', max_attempts=10)
+        db.session.add(quiz)
+        db.session.flush()
+        mcq = Question.create_mcq(quiz.id, 'Pick B', ['A', 'B'], 'B', order_index=1)
+        multi = Question.create_multiple_select(quiz.id, 'Pick A and C', ['A', 'B', 'C'],
+                                                ['A', 'C'], order_index=2)
+        db.session.add_all([mcq, multi])
+        db.session.commit()
+        user_id, quiz_id, mcq_id, multi_id = user.id, quiz.id, mcq.id, multi.id
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+        graded = QuizAttempt.create_and_complete(user_id, quiz_id, {str(mcq_id): 'B', str(multi_id): ['C', 'A']})
+        rows = {r.question_id: r for r in QuizAnswer.query.filter_by(attempt_id=graded.id)}
+        assert rows[mcq_id].selected_mask == 0b10 and rows[mcq_id].is_correct
+        assert rows[multi_id].selected_mask == 0b101 and rows[multi_id].points_earned == 2
+
+        # A legacy attempt stored before quiz_answers existed
+        legacy = QuizAttempt(user_id=user_id, quiz_id=quiz_id, total_questions=2,
+                             completed_at=datetime.utcnow(), score=0)
+        legacy.answers = {str(mcq_id): 'A'}
+        db.session.add(legacy)
+        db.session.commit()
+        assert QuizAnswer.backfill() == 1
+        assert QuizAnswer.backfill() == 0
+
+        stats = {s['question_id']: s for s in QuizAnswer.get_question_stats(quiz_id)}
+        assert stats[mcq_id]['attempts'] == 2 and stats[mcq_id]['pass_rate'] == 50.0
+        assert stats[multi_id]['answered'] == 1 and stats[multi_id]['correct'] == 1
+        graded_id = graded.id
+
+        # An answer outside the option list, then the options are edited afterwards
+        unlisted = QuizAttempt.create_and_complete(user_id, quiz_id, {str(mcq_id): 'Z', str(multi_id): ['B']})
+        unlisted_id = unlisted.id
+        db.session.get(Question, mcq_id).options = ['B', 'A']
+        db.session.commit()
+
+    # Answers come back as submitted
+    results = client.get(f'/api/quizzes/attempts/{graded_id}/results', headers=headers).get_json()
+    answers = [(r['user_answer'], r['is_correct']) for r in results['questions_results']]
+    assert answers == [('B', True), (['C', 'A'], True)]
+
+    results = client.get(f'/api/quizzes/attempts/{unlisted_id}/results', headers=headers).get_json()
+    answers = [(r['user_answer'], r['is_correct']) for r in results['questions_results']]
+    assert answers == [('Z', False), (['B'], False)]
+
+    stats = client.get(f'/api/quizzes/{quiz_id}/question-stats', headers=headers).get_json()
+    assert [q['correct'] for q in stats['questions']] == [1, 1]
+
+
+if __name__ == '__main__':
+    test_answers_are_normalized_and_reported_from_sql()
+    print("✅ Quiz answer table test passed")
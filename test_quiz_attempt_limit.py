@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn quiz attempt limiting
+Fires concurrent submissions and checks max_attempts is never exceeded
+"""
+
+import sys
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module
+from src.models.quiz import Quiz, Question, QuizAttempt, QuizAttemptCounter
+
+
+def test_concurrent_submissions_respect_max_attempts():
+    """Only max_attempts of many parallel submissions succeed"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    try:
+        app = create_app('testing')
+    finally:
+        del os.environ['DATABASE_URL']
+
+    try:
+        with app.app_context():
+            user = User.create_user(email='limit@qryti.com', password='test123',
+                                    first_name='Attempt', last_name='Limit')
+            course = Course(title='Limit Course', level=1, duration_hours=1.0)
+            db.session.add_all([user, course])
+            db.session.flush()
+            module = Module(course_id=course.id, title='Limit Module', order_index=1)
+            db.session.add(module)
+            db.session.flush()
+            quiz = Quiz(module_id=module.id, title='Limit Quiz', max_attempts=3)
+            db.session.add(quiz)
+            db.session.flush()
+            question = Question.create_mcq(quiz.id, 'Pick A', ['A', 'B'], 'A')
+            db.session.add(question)
+            db.session.commit()
+            user_id, quiz_id, question_id = user.id, quiz.id, question.id
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+        def submit(_):
+            client = app.test_client()
+            return client.post(f'/api/quizzes/{quiz_id}/submit', headers=headers,
+                               json={'answers': {str(question_id): 'A'}, 'time_taken': 30}).status_code
+
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            statuses = list(pool.map(submit, range(40)))
+
+        assert statuses.count(200) == 3
+        assert statuses.count(400) == 37
+
+        with app.app_context():
+            assert QuizAttempt.query.filter_by(user_id=user_id, quiz_id=quiz_id).count() == 3
+            assert QuizAttemptCounter.get_attempt_count(user_id, quiz_id) == 3
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        os.unlink(db_file.name)
+
+
+if __name__ == '__main__':
+    test_concurrent_submissions_respect_max_attempts()
+    print("✅ Quiz attempt limit test passed")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script for the Qryti Learn compiled quiz cache
+Checks single-pass grading, cache reuse and invalidation on question edits
+"""
+
+import sys
+import os
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module
+from src.models.quiz import Quiz, Question, QuizAttempt
+from src.utils.quiz_cache import compiled_quiz_cache
+
+
+def test_grading_uses_compiled_quiz_and_invalidates():
+    """Grading matches check_answer and follows question edits"""
+    app = create_app('testing')
+
+    with app.app_context():
+        user = User.create_user(email='grader@qryti.com', password='test123',
+                                first_name='Quiz', last_name='Grader')
+        course = Course(title='Grading Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        module = Module(course_id=course.id, title='Grading Module', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        quiz = Quiz(module_id=module.id, title='Grading Quiz', passing_score=60)
+        db.session.add(quiz)
+        db.session.flush()
+        mcq = Question.create_mcq(quiz.id, 'Pick A', ['A', 'B'], 'A', order_index=1)
+        multi = Question.create_multiple_select(quiz.id, 'Pick A and C', ['A', 'B', 'C'],
+                                                ['A', 'C'], order_index=2)
+        db.session.add_all([mcq, multi])
+        db.session.commit()
+        quiz_id, mcq_id, multi_id = quiz.id, mcq.id, multi.id
+
+        answers = {str(mcq_id): ['A'], str(multi_id): ['C', 'A']}
+        result = quiz.grade(answers)
+        assert result.correct_count == 1
+        assert result.earned_points == 2 and result.total_points == 3
+        assert [r.is_correct for r in result.question_results] == [
+            mcq.check_answer(answers[str(mcq_id)]), multi.check_answer(answers[str(multi_id)])
+        ]
+        assert compiled_quiz_cache.get(quiz) is compiled_quiz_cache.get(quiz)
+
+        attempt = QuizAttempt(user_id=user.id, quiz=quiz, total_questions=2)
+        db.session.add(attempt)
+        attempt.complete_attempt({str(mcq_id): 'A', str(multi_id): ['A', 'C']})
+        assert attempt.score == 100 and attempt.correct_answers == 2 and attempt.passed
+
+        version = quiz.updated_at
+        db.session.get(Question, mcq_id).correct_answers = ['B']
+        db.session.commit()
+        quiz = db.session.get(Quiz, quiz_id)
+        assert quiz.updated_at > version
+        assert quiz.calculate_score({str(mcq_id): 'A', str(multi_id): ['A', 'C']}) == 2 / 3 * 100
+
+
+if __name__ == '__main__':
+    test_grading_uses_compiled_quiz_and_invalidates()
+    print("✅ Compiled quiz cache test passed")
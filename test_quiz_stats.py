@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn materialized quiz statistics
+Checks maintenance on attempts and question edits and single-query listings
+"""
+
+import sys
+import os
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import event
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module
+from src.models.quiz import Quiz, Question, QuizAttempt, QuizStats
+
+
+def count_queries(app, call):
+    """Run call and return (result, number of SQL statements executed)"""
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            result = call()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    return result, len(statements)
+
+
+def test_stats_are_maintained_and_listings_use_one_query():
+    """Attempts and question edits keep quiz_stats current; listings do not scale with quizzes"""
+    app = create_app('testing')
+    client = app.test_client()
+
+    with app.app_context():
+        user = User.create_user(email='stats@qryti.com', password='test123',
+                                first_name='Quiz', last_name='Stats')
+        course = Course(title='Stats Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        module = Module(course_id=course.id, title='Stats Module', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        quizzes = [Quiz(module_id=module.id, title=f'Stats Quiz {i}', max_attempts=10) for i in range(6)]
+        db.session.add_all(quizzes)
+        db.session.flush()
+        for quiz in quizzes:
+            db.session.add(Question.create_mcq(quiz.id, 'Pick A', ['A', 'B'], 'A', points=2))
+        db.session.commit()
+        user_id, course_id, quiz_id = user.id, course.id, quizzes[0].id
+        question_id = quizzes[0].questions[0].id
+
+        QuizAttempt.create_and_complete(user_id, quiz_id, {str(question_id): 'A'})
+        QuizAttempt.create_and_complete(user_id, quiz_id, {str(question_id): 'B'})
+        QuizAttempt.start_attempt(user_id, quiz_id)
+        db.session.add(Question.create_mcq(quiz_id, 'Pick B', ['A', 'B'], 'B', points=3, order_index=2))
+        db.session.commit()
+
+        stats = db.session.get(QuizStats, quiz_id).to_dict()
+        assert stats['attempt_count'] == 3 and stats['completion_count'] == 2
+        assert stats['average_score'] == 50.0 and stats['pass_rate'] == 50.0
+        assert stats['question_count'] == 2 and stats['total_points'] == 5
+
+        db.session.execute(db.delete(QuizStats))
+        db.session.commit()
+        assert QuizStats.rebuild() == 6
+        assert db.session.get(QuizStats, quiz_id).to_dict() == stats
+
+    response, queries = count_queries(app, lambda: client.get('/api/quizzes/'))
+    listed = {q['id']: q for q in response.get_json()}
+    assert queries == 1
+    assert listed[quiz_id]['stats'] == {'total_attempts': 3, 'average_score': 50.0}
+    assert listed[quiz_id]['question_count'] == 2
+
+    response, queries = count_queries(app, lambda: client.get(f'/api/courses/{course_id}/quizzes'))
+    assert len(response.get_json()) == 6
+    assert queries == 2
+
+
+if __name__ == '__main__':
+    test_stats_are_maintained_and_listings_use_one_query()
+    print("✅ Quiz stats test passed")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test script for the Qryti Learn study session ledger
+Checks that daily study time is built from the ledger, including past days
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module, CourseEnrollment
+from src.models.progress import UserProgress, StudySession, UserDailyActivity
+
+
+def test_daily_study_time_keeps_history():
+    """Time logged on earlier days stays on those days after later access"""
+    app = create_app('testing')
+    client = app.test_client()
+
+    with app.app_context():
+        user = User.create_user(email='ledger@qryti.com', password='test123',
+                                first_name='Study', last_name='Ledger')
+        course = Course(title='Ledger Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        module = Module(course_id=course.id, title='Ledger Module', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        db.session.add(CourseEnrollment(user_id=user.id, course_id=course.id))
+        db.session.add(UserProgress(user_id=user.id, course_id=course.id, module_id=module.id))
+
+        StudySession.record(user.id, 40, course_id=course.id, module_id=module.id,
+                            ended_at=datetime.utcnow() - timedelta(days=3))
+        StudySession.record(user.id, 15, course_id=course.id, module_id=module.id,
+                            ended_at=datetime.utcnow() - timedelta(days=400))
+        db.session.commit()
+        module_id = module.id
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+    for minutes in (10, 20):
+        response = client.post(f'/api/progress/module/{module_id}/time',
+                               json={'additional_minutes': minutes}, headers=headers)
+        assert response.status_code == 200
+
+    summary = client.get('/api/analytics/summary?days=365', headers=headers).get_json()
+    daily = summary['daily_study_time']
+    assert len(daily) == 365
+    assert daily[-1] == {'date': datetime.utcnow().date().isoformat(), 'minutes': 30}
+    assert daily[-4]['minutes'] == 40
+    assert sum(day['minutes'] for day in daily) == 70
+
+
+def test_heartbeat_sized_sessions_reach_the_daily_rollup():
+    """Sub-minute sessions add up in the rollup instead of each rounding to zero"""
+    app = create_app('testing')
+    with app.app_context():
+        user = User(email='heartbeats@qryti.com', password_hash='x', first_name='Beat', last_name='Heart')
+        db.session.add(user)
+        db.session.flush()
+        for _ in range(60):
+            StudySession.record(user.id, 5 / 60)
+        db.session.commit()
+
+        rollup = UserDailyActivity.query.filter_by(user_id=user.id).one()
+        assert abs(rollup.minutes_studied - 5.0) < 1e-9
+
+        UserDailyActivity.rebuild(user_id=user.id)
+        rebuilt = UserDailyActivity.query.filter_by(user_id=user.id).one()
+        assert abs(rebuilt.minutes_studied - 5.0) < 1e-9
+
+
+def test_backfill_covers_module_time_from_before_the_ledger():
+    """Pre-ledger module minutes become one session at last_accessed, and a rerun adds nothing"""
+    app = create_app('testing')
+    with app.app_context():
+        user = User(email='backfill@qryti.com', password_hash='x', first_name='Back', last_name='Fill')
+        course = Course(title='Backfill Course', level=1, duration_hours=1.0)
+        db.session.add_all([user, course])
+        db.session.flush()
+        old, new = (Module(course_id=course.id, title=f'Module {i}', order_index=i) for i in (1, 2))
+        db.session.add_all([old, new])
+        db.session.flush()
+        last_accessed = datetime.utcnow() - timedelta(days=30)
+        db.session.add_all([
+            UserProgress(user_id=user.id, course_id=course.id, module_id=old.id,
+                         time_spent_minutes=90, last_accessed=last_accessed),
+            UserProgress(user_id=user.id, course_id=course.id, module_id=new.id, time_spent_minutes=15)
+        ])
+        # 20 of the first module's minutes and all of the second's were logged after the ledger existed
+        StudySession.record(user.id, 20, course_id=course.id, module_id=old.id)
+        StudySession.record(user.id, 15, course_id=course.id, module_id=new.id)
+        db.session.commit()
+
+        assert StudySession.backfill() == 1
+        assert StudySession.backfill() == 0
+
+        backfilled = StudySession.query.filter_by(user_id=user.id, ended_at=last_accessed).one()
+        assert backfilled.module_id == old.id and backfilled.minutes == 70
+        assert backfilled.study_date == last_accessed.date()
+        assert sum(StudySession.get_daily_minutes(user.id, last_accessed.date(), datetime.utcnow().date()).values()) == 105
+
+
+if __name__ == '__main__':
+    test_daily_study_time_keeps_history()
+    test_heartbeat_sized_sessions_reach_the_daily_rollup()
+    test_backfill_covers_module_time_from_before_the_ledger()
+    print("✅ Study session ledger test passed")
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test script for the Qryti Learn write-behind video progress buffer
+Checks heartbeat coalescing, batched upserts, completion flushes and shutdown flush
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module
+from src.models.progress import StudySession
+from src.models.video import Video, VideoProgress
+from src.utils.progress_buffer import VideoProgressBuffer
+
+
+def setup(app):
+    """Two viewers and a 10 minute video; returns (headers per viewer, video_id)"""
+    with app.app_context():
+        course = Course(title='Video Course', level=1, duration_hours=1.0)
+        db.session.add(course)
+        db.session.flush()
+        module = Module(course_id=course.id, title='Intro', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        video = Video(title='Intro', youtube_id='intro', youtube_url='https://youtu.be/intro',
+                      duration_seconds=600, module_id=module.id, course_id=course.id)
+        viewers = [User(email=f'viewer{i}@qryti.com', password_hash='x', first_name='V', last_name=str(i))
+                   for i in range(2)]
+        db.session.add_all([video] + viewers)
+        db.session.commit()
+        headers = [{'Authorization': f'Bearer {create_access_token(identity=str(viewer.id))}'}
+                   for viewer in viewers]
+        return headers, video.id
+
+
+def heartbeat(client, headers, video_id, position, **extra):
+    body = dict(current_position_seconds=position, watch_time_increment=5, **extra)
+    return client.post(f'/api/videos/videos/{video_id}/progress', json=body, headers=headers)
+
+
+def test_heartbeats_are_coalesced_until_flush():
+    """Many heartbeats become one row per viewer, written on flush and on completion"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    try:
+        app = create_app('testing')
+    finally:
+        del os.environ['DATABASE_URL']
+
+    try:
+        app.config['VIDEO_PROGRESS_WRITER'] = 'buffered'
+        app.config['VIDEO_PROGRESS_FLUSH_INTERVAL'] = 60.0
+        progress_buffer = VideoProgressBuffer(app)
+        client = app.test_client()
+        headers, video_id = setup(app)
+
+        for position in range(10, 130, 10):
+            response = heartbeat(client, headers[0], video_id, position, play_count_increment=1)
+            assert response.status_code == 200
+        heartbeat(client, headers[1], video_id, 30, playback_quality='720p')
+        assert response.get_json()['progress']['current_position_seconds'] == 120
+        assert progress_buffer.pending() == 2
+        with app.app_context():
+            assert VideoProgress.query.count() == 0
+
+        progress_buffer.flush()
+        with app.app_context():
+            rows = {row.user_id: row for row in VideoProgress.query}
+            first, second = sorted(rows.values(), key=lambda row: row.user_id)
+            assert (first.current_position_seconds, first.watch_time_seconds, first.play_count) == (120, 60, 12)
+            # Twelve 5 second heartbeats cover 60 of the 600 seconds
+            assert first.watched_seconds == 60 and first.completion_percentage == 10.0
+            assert second.playback_quality == '720p' and second.watch_time_seconds == 5
+            assert StudySession.query.count() == 2
+
+        # Later heartbeats add to the stored row; nearing the end flushes without waiting
+        heartbeat(client, headers[0], video_id, 560, seek_count_increment=2,
+                  watched_segments=[[0, 560]])
+        deadline = time.monotonic() + 5
+        while progress_buffer.pending() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert progress_buffer.pending() == 0
+        progress_buffer.flush()  # Waits for the background write in flight
+        with app.app_context():
+            first = VideoProgress.query.filter_by(user_id=first.user_id).one()
+            assert first.is_completed and first.completed_at is not None
+            assert (first.watch_time_seconds, first.play_count, first.seek_count) == (65, 12, 2)
+
+        # Whatever is pending at shutdown is written
+        heartbeat(client, headers[1], video_id, 90)
+        progress_buffer.shutdown()
+        with app.app_context():
+            second = VideoProgress.query.filter_by(user_id=second.user_id).one()
+            assert (second.current_position_seconds, second.watch_time_seconds) == (90, 10)
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        os.unlink(db_file.name)
+
+
+def test_failed_flush_keeps_entries_for_retry(monkeypatch):
+    """A write error puts the taken entries back, merged with heartbeats that arrived meanwhile"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    try:
+        app = create_app('testing')
+    finally:
+        del os.environ['DATABASE_URL']
+
+    try:
+        app.config['VIDEO_PROGRESS_WRITER'] = 'buffered'
+        app.config['VIDEO_PROGRESS_FLUSH_INTERVAL'] = 60.0
+        progress_buffer = VideoProgressBuffer(app)
+        client = app.test_client()
+        headers, video_id = setup(app)
+
+        apply_heartbeats = VideoProgress.apply_heartbeats
+
+        def locked_then_late_heartbeat(entries):
+            # Another heartbeat lands while the failing write is in flight
+            heartbeat(client, headers[0], video_id, 40, pause_count_increment=1)
+            raise RuntimeError('database is locked')
+
+        heartbeat(client, headers[0], video_id, 20, play_count_increment=1)
+        heartbeat(client, headers[0], video_id, 30)
+        monkeypatch.setattr(VideoProgress, 'apply_heartbeats', staticmethod(locked_then_late_heartbeat))
+        progress_buffer.flush()
+        assert progress_buffer.pending() == 1
+        with app.app_context():
+            assert VideoProgress.query.count() == 0
+
+        monkeypatch.setattr(VideoProgress, 'apply_heartbeats', staticmethod(apply_heartbeats))
+        progress_buffer.flush()
+        assert progress_buffer.pending() == 0
+        with app.app_context():
+            row = VideoProgress.query.one()
+            assert (row.current_position_seconds, row.watch_time_seconds) == (40, 15)
+            # Each 5 second heartbeat covers the seconds leading up to its position
+            assert (row.play_count, row.pause_count, row.watched_seconds) == (1, 1, 15)
+            assert StudySession.query.count() == 1
+        progress_buffer.shutdown()
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        os.unlink(db_file.name)
+
+
+def test_sync_mode_writes_each_heartbeat():
+    """Synchronous mode stores every heartbeat and returns the stored progress"""
+    app = create_app('testing')
+    assert app.extensions['video_progress_buffer'].synchronous
+    client = app.test_client()
+    headers, video_id = setup(app)
+
+    heartbeat(client, headers[0], video_id, 300)
+    response = heartbeat(client, headers[0], video_id, 590, pause_count_increment=1,
+                         watched_segments=[[0, 300], [300, 590]])
+    assert response.status_code == 200
+    progress = response.get_json()['progress']
+    assert progress['watch_time_seconds'] == 10 and progress['pause_count'] == 1
+    assert progress['watched_seconds'] == 590
+    assert progress['is_completed'] and progress['remaining_time_seconds'] == 10
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
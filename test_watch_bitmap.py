@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test script for Qryti Learn watched-segment bitmaps
+Checks segment masks, OR merging, popcount completion and merge speed
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import timeit
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flask_jwt_extended import create_access_token
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.course import Course, Module
+from src.models.video import Video, VideoProgress
+from src.utils.progress_buffer import PendingProgress
+from src.utils.watch_bitmap import (segment_mask, segments_mask, merge, to_mask, valid_segments,
+                                    MAX_SEGMENTS, MAX_TRACKED_SECONDS)
+
+
+def add_video(youtube_id, duration_seconds):
+    """Add a video in a new course and module (inside an app context)"""
+    course = Course(title='Bitmap Course', level=1, duration_hours=1.0)
+    db.session.add(course)
+    db.session.flush()
+    module = Module(course_id=course.id, title='Intro', order_index=1)
+    db.session.add(module)
+    db.session.flush()
+    video = Video(title=youtube_id, youtube_id=youtube_id, youtube_url=f'https://youtu.be/{youtube_id}',
+                  duration_seconds=duration_seconds, module_id=module.id, course_id=course.id)
+    db.session.add(video)
+    return video
+
+
+def test_segments_merge_with_or():
+    """Overlapping segments count each second once and are clipped to the video"""
+    bitmap, watched = merge(None, segment_mask(0, 10))
+    assert watched == 10
+    bitmap, watched = merge(bitmap, segments_mask([[5, 15], [100, 102.9], [7, 3], 'bad'], duration_seconds=101))
+    assert watched == 16
+    assert to_mask(bitmap) == (1 << 15) - 1 | 1 << 100
+    assert segment_mask(-5, 2) == 0b11 and segment_mask(None, 4) == 0
+
+
+def test_two_hour_merge_is_fast():
+    """Merging a heartbeat into a full 2 hour bitmap stays in the microseconds"""
+    bitmap, _ = merge(None, segments_mask([[start, start + 30] for start in range(0, 7200, 60)]))
+    mask = segment_mask(3600, 3605)
+    seconds = min(timeit.repeat(lambda: merge(bitmap, mask), number=1000, repeat=3)) / 1000
+    assert seconds < 100e-6
+
+
+def test_seeking_to_the_end_does_not_complete():
+    """Completion comes from seconds actually watched, not from the position"""
+    app = create_app('testing')
+    client = app.test_client()
+    with app.app_context():
+        course = Course(title='Bitmap Course', level=1, duration_hours=1.0)
+        db.session.add(course)
+        db.session.flush()
+        module = Module(course_id=course.id, title='Intro', order_index=1)
+        db.session.add(module)
+        db.session.flush()
+        video = Video(title='Intro', youtube_id='bitmap', youtube_url='https://youtu.be/bitmap',
+                      duration_seconds=100, module_id=module.id, course_id=course.id)
+        viewer = User(email='seeker@qryti.com', password_hash='x', first_name='See', last_name='Ker')
+        db.session.add_all([video, viewer])
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(viewer.id))}'}
+        url = f'/api/videos/videos/{video.id}/progress'
+
+    progress = client.post(url, json={'current_position_seconds': 5, 'watch_time_increment': 5},
+                           headers=headers).get_json()['progress']
+    progress = client.post(url, json={'current_position_seconds': 99, 'watch_time_increment': 5},
+                           headers=headers).get_json()['progress']
+    assert progress['watched_seconds'] == 10 and progress['completion_percentage'] == 10.0
+    assert not progress['is_completed']
+
+    # Rewatching the same seconds adds watch time but no coverage
+    progress = client.post(url, json={'current_position_seconds': 99, 'watch_time_increment': 5},
+                           headers=headers).get_json()['progress']
+    assert progress['watched_seconds'] == 10 and progress['watch_time_seconds'] == 15
+
+    progress = client.post(url, json={'current_position_seconds': 90, 'watch_time_increment': 85,
+                                      'watched_segments': [[5, 90]]}, headers=headers).get_json()['progress']
+    assert progress['watched_seconds'] == 95 and progress['is_completed']
+
+    with app.app_context():
+        row = VideoProgress.query.one()
+        row.update_progress(50, 0, segments=[[90, 94]])
+        assert row.watched_seconds == 99 and row.is_completed
+
+
+def test_client_segments_are_bounded():
+    """Huge or numerous segments cannot build an unbounded mask"""
+    assert segment_mask(0, 1e10).bit_length() == MAX_TRACKED_SECONDS
+    assert segments_mask([[i, i + 1] for i in range(MAX_SEGMENTS * 2)]).bit_count() == MAX_SEGMENTS
+    assert valid_segments([[0, 5], [10, 12.5]])
+    assert not valid_segments([[0, 5]] * (MAX_SEGMENTS + 1))
+    assert not valid_segments([[0, float('inf')]]) and not valid_segments([[0, True]])
+    assert not valid_segments([[0, '5']]) and not valid_segments({'0': 5}) and not valid_segments([[1, 2, 3]])
+
+
+def test_videos_without_duration_skip_coverage():
+    """A video of unknown length tracks no bitmap, and malformed segments are rejected"""
+    app = create_app('testing')
+    client = app.test_client()
+    with app.app_context():
+        video = add_video('live', 0)
+        viewer = User(email='unbounded@qryti.com', password_hash='x', first_name='Un', last_name='Bounded')
+        db.session.add_all([video, viewer])
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(viewer.id))}'}
+        url = f'/api/videos/videos/{video.id}/progress'
+
+    progress = client.post(url, json={'current_position_seconds': 10 ** 10, 'watch_time_increment': 10 ** 10,
+                                      'watched_segments': [[0, 1e10]]}, headers=headers).get_json()['progress']
+    assert progress['watched_seconds'] == 0 and not progress['is_completed']
+    with app.app_context():
+        assert not VideoProgress.query.one().watched_bitmap
+
+    response = client.post(url, json={'watched_segments': [[0, 5]] * (MAX_SEGMENTS + 1)}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_concurrent_flushes_keep_every_watched_second():
+    """Two writers merging the same viewer's bitmap never lose each other's seconds"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    try:
+        app = create_app('testing')
+    finally:
+        del os.environ['DATABASE_URL']
+
+    try:
+        with app.app_context():
+            video = add_video('shared', 400)
+            viewer = User(email='twice@qryti.com', password_hash='x', first_name='Two', last_name='Workers')
+            db.session.add_all([video, viewer])
+            db.session.commit()
+            user_id, video_id = viewer.id, video.id
+
+        def flush_segments(offset):
+            with app.app_context():
+                for start in range(offset, 400, 20):
+                    entry = PendingProgress(user_id, video_id, duration_seconds=400)
+                    entry.merge(segments=[[start, start + 10]])
+                    VideoProgress.apply_heartbeats([entry])
+                    db.session.commit()
+
+        workers = [threading.Thread(target=flush_segments, args=(offset,)) for offset in (0, 10)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        with app.app_context():
+            row = VideoProgress.query.one()
+            assert row.watched_seconds == 400 and to_mask(row.watched_bitmap) == (1 << 400) - 1
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        os.unlink(db_file.name)
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))